@@ -0,0 +1,85 @@
+"""
+Compares the JSON text storage of blocks against the binary block form.
+
+For each block size, reports the stored bytes per block, the time to encode a block for
+storage, the time to load it back (including reading its transactions) and the time to
+validate its hash, for version 2 blocks stored as JSON text rows and version 3 blocks stored
+with Block.to_bytes() (JSON and, if installed, msgpack transactions).
+
+Usage:
+    python benchmarks/bench_encoding.py --transactions 1 10 100 1000 --blocks 200
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from liotbchain.block import Block
+from liotbchain.codec import msgpack
+from liotbchain.database.base import BLOCK_COLUMNS, block_row, row_to_block
+
+
+def make_blocks(count, transactions, version):
+    blocks = []
+    previous_hash = "0" * 64
+    for index in range(count):
+        timestamp = time.time()
+        data = [{"device": f"Raspberry Pi {i}", "distance": 100 + i, "timestamp": timestamp} for i in range(transactions)]
+        block = Block(index, timestamp, data, previous_hash, version=version)
+        block.hash = block.calculate_hash()
+        previous_hash = block.hash
+        blocks.append(block)
+    return blocks
+
+
+def fresh(blocks):
+    # Copies without memoized encodings, so every run starts from plain Python objects
+    return [Block(b.index, b.timestamp, b.data, b.previous_hash, b.nonce, b.hash, version=b.version) for b in blocks]
+
+
+def timed(func, items):
+    start = time.perf_counter()
+    results = [func(item) for item in items]
+    return results, (time.perf_counter() - start) / len(items)
+
+
+def bench_json(blocks):
+    records, encode = timed(lambda b: json.dumps(block_row(b, binary=False)).encode(), fresh(blocks))
+    loaded, load = timed(lambda r: row_to_block(dict(zip(BLOCK_COLUMNS, json.loads(r)))), records)
+    _, read = timed(lambda b: b.data, loaded)
+    _, validate = timed(lambda b: b.calculate_hash(), loaded)
+    return records, encode, load + read, validate
+
+
+def bench_binary(blocks, codec):
+    records, encode = timed(lambda b: b.to_bytes(codec=codec), fresh(blocks))
+    loaded, load = timed(Block.from_bytes, records)
+    _, read = timed(lambda b: b.data, loaded)
+    _, validate = timed(lambda b: b.calculate_hash(), loaded)
+    return records, encode, load + read, validate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--transactions', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--blocks', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'transactions':>12} {'format':>14} {'bytes/block':>12} {'encode us':>10} {'load us':>10} {'hash us':>10}")
+    for transactions in args.transactions:
+        runs = [('json text v2', bench_json(make_blocks(args.blocks, transactions, 2)))]
+        blocks = make_blocks(args.blocks, transactions, 3)
+        runs.append(('binary v3', bench_binary(blocks, 'json')))
+        if msgpack is not None:
+            runs.append(('msgpack v3', bench_binary(blocks, 'msgpack')))
+        for name, (records, encode, load, validate) in runs:
+            size = sum(len(record) for record in records) / len(records)
+            print(f"{transactions:>12} {name:>14} {size:>12,.0f} {encode * 1e6:>10.1f} {load * 1e6:>10.1f} "
+                  f"{validate * 1e6:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
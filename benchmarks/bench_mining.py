@@ -0,0 +1,87 @@
+"""
+Compares the hashing throughput of the naive proof-of-work loop against the midstate nonce search.
+
+Usage:
+    python benchmarks/bench_mining.py --transactions 100 --attempts 20000
+    python benchmarks/bench_mining.py --workers 1 2 4 --difficulty 5
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from liotbchain.block import Block
+from liotbchain.mining import search_nonce, ParallelMiner
+
+
+def make_block(transactions):
+    timestamp = time.time()
+    data = [{"device": f"Raspberry Pi {i}", "distance": 100 + i, "timestamp": timestamp} for i in range(transactions)]
+    return Block(1, timestamp, data, "0" * 64)
+
+
+def naive_loop(block, attempts):
+    for nonce in range(attempts):
+        block.nonce = nonce
+        block.calculate_hash()
+
+
+def midstate_loop(block, attempts):
+    prefix, suffix = block.header_parts()
+    # An unreachable difficulty forces the search to visit every nonce in the range
+    search_nonce(prefix, suffix, 64, 0, attempts, binary_nonce=block.binary_nonce)
+
+
+def measure(func, block, attempts):
+    start = time.perf_counter()
+    func(block, attempts)
+    return attempts / (time.perf_counter() - start)
+
+
+def parallel_latency(block, workers, difficulty, stop):
+    prefix, suffix = block.header_parts()
+    miner = ParallelMiner(workers, deterministic=True)
+    try:
+        # Warm up the pool so process start-up is not counted
+        miner.search(prefix, suffix, 0, 1, block.binary_nonce)
+        start = time.perf_counter()
+        result = miner.search(prefix, suffix, difficulty, stop, block.binary_nonce)
+        return time.perf_counter() - start, result
+    finally:
+        miner.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--transactions', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--attempts', type=int, default=20000)
+    parser.add_argument('--workers', type=int, nargs='*', default=[])
+    parser.add_argument('--difficulty', type=int, default=5)
+    parser.add_argument('--nonce-limit', type=int, default=50000000)
+    args = parser.parse_args()
+
+    print(f"{'transactions':>12} {'naive H/s':>14} {'midstate H/s':>14} {'speedup':>8}")
+    for transactions in args.transactions:
+        block = make_block(transactions)
+        naive_attempts = max(1, args.attempts // max(1, transactions))
+        naive = measure(naive_loop, block, naive_attempts)
+        midstate = measure(midstate_loop, block, args.attempts)
+        print(f"{transactions:>12} {naive:>14,.0f} {midstate:>14,.0f} {midstate / naive:>7.1f}x")
+
+    if args.workers:
+        block = make_block(args.transactions[0])
+        start = time.perf_counter()
+        serial_result = search_nonce(*block.header_parts(), args.difficulty, 0, args.nonce_limit,
+                                     binary_nonce=block.binary_nonce)
+        serial = time.perf_counter() - start
+        print(f"\ndifficulty {args.difficulty}: serial {serial:.3f}s, nonce {serial_result and serial_result[0]}")
+        print(f"{'workers':>8} {'latency s':>10} {'speedup':>8} {'nonce':>10}")
+        for workers in args.workers:
+            latency, result = parallel_latency(block, workers, args.difficulty, args.nonce_limit)
+            print(f"{workers:>8} {latency:>10.3f} {serial / latency:>7.1f}x {result and result[0]:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,316 @@
+"""
+Benchmark suite: times the core operations over parameterized workloads, writes the results as
+JSON and compares them against a stored baseline.
+
+Workloads:
+    hash      Block.calculate_hash() on new blocks, by transaction count and block version
+    merkle    The Merkle root of pre-encoded transactions, by leaf count
+    pow       Blockchain.proof_of_work() on fixed blocks, by difficulty
+    save      save_block() of each block into an empty local store, by backend
+    load      Loading every stored block with iter_blocks(), by backend
+    validate  Blockchain.is_chain_valid(full=True), by chain length, in memory or lazy
+
+Each case is run once to warm up and then timed --repeats times; the median time per operation
+(a block, a tree or a nonce search) is the figure compared against the baseline. Blocks and
+transactions are built from fixed values, so every run does the same work.
+
+Usage:
+    python benchmarks/suite.py --output benchmarks/baseline.json
+    python benchmarks/suite.py --baseline benchmarks/baseline.json --output results.json
+    python benchmarks/suite.py --only hash merkle --quick --repeats 3
+
+No baseline is committed, since timings are only comparable on one machine: record one with
+the first command before comparing. A --baseline file that does not exist is reported and the
+comparison skipped.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from liotbchain.block import Block
+from liotbchain.blockchain import Blockchain
+from liotbchain.database.filestore import FileStore
+from liotbchain.database.sqlite import SQLiteBackend
+from liotbchain.merkle import MerkleTree, encode_transaction
+
+# A prepared case: run() does the timed work, which covers ``ops`` operations; ``info`` holds
+# workload-specific figures recorded alongside the timings
+Case = namedtuple('Case', 'run ops info', defaults=(None,))
+
+WORKLOADS = {}
+
+BASE_TIMESTAMP = 1700000000.0
+BACKENDS = {
+    'sqlite': lambda directory: SQLiteBackend(os.path.join(directory, 'bench.db')),
+    'file': lambda directory: FileStore(os.path.join(directory, 'bench-store')),
+}
+
+
+def workload(name, **grid):
+    """
+    Registers a workload: a generator function taking one value of each grid parameter, which
+    does its setup, yields a Case and cleans up when resumed.
+    """
+    def register(func):
+        WORKLOADS[name] = (contextmanager(func), grid)
+        return func
+    return register
+
+
+def readings(count, offset=0):
+    return [{"device": f"Raspberry Pi {i % 10}", "distance": 100 + i, "timestamp": BASE_TIMESTAMP + offset + i}
+            for i in range(count)]
+
+
+def make_chain(length, transactions, difficulty):
+    """
+    Builds a linked, mined chain of fixed blocks, starting with a genesis block.
+    """
+    genesis = Block(0, BASE_TIMESTAMP, "Genesis Block", "0")
+    genesis.hash = genesis.calculate_hash()
+    chain = [genesis]
+    for index in range(1, length):
+        block = Block(index, BASE_TIMESTAMP + index, readings(transactions, index), chain[-1].hash)
+        while True:
+            block.hash = block.calculate_hash()
+            if block.hash.startswith('0' * difficulty):
+                break
+            block.nonce += 1
+        chain.append(block)
+    return chain
+
+
+@workload('hash', transactions=[1, 10, 100, 1000], version=[2, 4])
+def bench_hash(transactions, version):
+    batches = [readings(transactions, i) for i in range(20)]
+
+    def run():
+        for i, data in enumerate(batches):
+            Block(i + 1, BASE_TIMESTAMP + i, data, "0" * 64, version=version).calculate_hash()
+
+    yield Case(run, len(batches))
+
+
+@workload('merkle', leaves=[1, 10, 100, 1000, 10000])
+def bench_merkle(leaves):
+    encoded = [encode_transaction(tx) for tx in readings(leaves)]
+    trees = max(1, 10000 // leaves)
+
+    def run():
+        for _ in range(trees):
+            MerkleTree(encoded).root
+
+    yield Case(run, trees)
+
+
+@workload('pow', difficulty=[1, 2, 3, 4])
+def bench_pow(difficulty):
+    blocks = [Block(index, BASE_TIMESTAMP + index, readings(10, index), "0" * 64) for index in range(1, 9)]
+    with tempfile.TemporaryDirectory() as directory, \
+            SQLiteBackend(os.path.join(directory, 'bench.db')) as store, \
+            Blockchain(storage=store, difficulty=difficulty, nonce_limit=2 ** 32) as blockchain:
+        def run():
+            for block in blocks:
+                block.nonce = 0
+                blockchain.proof_of_work(block)
+
+        run()
+        # The search starts from 0 on fixed blocks, so the nonces tried are the same every run
+        attempts = sum(block.nonce + 1 for block in blocks)
+        yield Case(run, len(blocks), {'attempts_per_block': attempts / len(blocks)})
+
+
+@workload('save', backend=list(BACKENDS), blocks=[100, 1000])
+def bench_save(backend, blocks):
+    chain = make_chain(blocks, 10, 1)
+    with tempfile.TemporaryDirectory() as root:
+        runs = itertools.count()
+
+        def run():
+            directory = os.path.join(root, str(next(runs)))
+            os.mkdir(directory)
+            with BACKENDS[backend](directory) as store:
+                store.create()
+                for block in chain:
+                    store.save_block(block)
+
+        yield Case(run, len(chain))
+
+
+@workload('load', backend=list(BACKENDS), blocks=[100, 1000])
+def bench_load(backend, blocks):
+    with tempfile.TemporaryDirectory() as directory:
+        with BACKENDS[backend](directory) as store:
+            store.create()
+            store.save_blocks(make_chain(blocks, 10, 1))
+
+        def run():
+            with BACKENDS[backend](directory) as store:
+                store.create()  # Opens the existing store, as Blockchain does on startup
+                for block in store.iter_blocks():
+                    block.data  # Blocks decode their transactions lazily
+
+        yield Case(run, blocks)
+
+
+@workload('validate', blocks=[100, 1000], chain=['memory', 'lazy'])
+def bench_validate(blocks, chain):
+    with tempfile.TemporaryDirectory() as directory, \
+            SQLiteBackend(os.path.join(directory, 'bench.db')) as store:
+        store.create()
+        store.save_blocks(make_chain(blocks, 10, 1))
+        # A lazy chain streams the blocks from the database on every run instead of keeping them in memory
+        with Blockchain(storage=store, difficulty=1, lazy_chain=chain == 'lazy') as blockchain:
+            def run():
+                if not blockchain.is_chain_valid(full=True):
+                    raise RuntimeError("The benchmark chain failed validation")
+
+            yield Case(run, blocks)
+
+
+def cases(only=None, quick=False):
+    """
+    Yields the (workload name, parameters) of every case to run, in a stable order.
+    """
+    for name, (_, grid) in WORKLOADS.items():
+        if only and name not in only:
+            continue
+        values = [grid[param][:2] if quick else grid[param] for param in grid]
+        for combination in itertools.product(*values):
+            yield name, dict(zip(grid, combination))
+
+
+def case_key(name, params):
+    return name + '[' + ','.join(f"{param}={value}" for param, value in params.items()) + ']'
+
+
+def measure(name, params, repeats):
+    """
+    Sets up one case, runs it once to warm up and then ``repeats`` times.
+
+    Returns:
+        dict: The timings per operation, in seconds, and the case's figures.
+    """
+    setup, _ = WORKLOADS[name]
+    with setup(**params) as case:
+        case.run()
+        seconds = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            case.run()
+            seconds.append((time.perf_counter() - start) / case.ops)
+    median = statistics.median(seconds)
+    return {
+        'key': case_key(name, params),
+        'workload': name,
+        'params': params,
+        'ops': case.ops,
+        'repeats': repeats,
+        'median': median,
+        'min': min(seconds),
+        'mean': statistics.mean(seconds),
+        'stdev': statistics.stdev(seconds) if repeats > 1 else 0.0,
+        'ops_per_second': 1 / median if median > 0 else None,
+        'info': case.info or {},
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Compares the median time per operation of each case against the baseline's.
+
+    Returns:
+        list: The (key, baseline median, current median, ratio) of each case in both runs, and
+        whether it regressed by more than ``threshold``.
+    """
+    previous = {result['key']: result for result in baseline['results']}
+    rows = []
+    for result in results:
+        before = previous.get(result['key'])
+        if before is None:
+            continue
+        ratio = result['median'] / before['median'] if before['median'] > 0 else float('inf')
+        rows.append((result['key'], before['median'], result['median'], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def format_seconds(seconds):
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', nargs='+', choices=list(WORKLOADS), help="Workloads to run; all by default")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--quick', action='store_true', help="Only the two smallest values of each parameter")
+    parser.add_argument('--output', help="File to write the results to, as JSON")
+    parser.add_argument('--baseline', help="Results file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Slowdown of the median, as a fraction, reported as a regression (default 0.25)")
+    args = parser.parse_args()
+    if args.repeats < 1:
+        parser.error("--repeats must be at least 1")
+
+    results = []
+    print(f"{'case':<40} {'median':>10} {'min':>10} {'stdev':>10} {'ops/s':>12}")
+    for name, params in cases(args.only, args.quick):
+        result = measure(name, params, args.repeats)
+        results.append(result)
+        print(f"{result['key']:<40} {format_seconds(result['median']):>10} {format_seconds(result['min']):>10} "
+              f"{format_seconds(result['stdev']):>10} {result['ops_per_second']:>12,.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'environment': environment(), 'results': results}, f, indent=2)
+            f.write('\n')
+
+    if args.baseline and not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; record one with: python benchmarks/suite.py --output {args.baseline}")
+    elif args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, args.threshold)
+        print(f"\nAgainst {args.baseline} (commit {baseline['environment'].get('commit')}):")
+        print(f"{'case':<40} {'baseline':>10} {'current':>10} {'ratio':>8}")
+        for key, before, after, ratio, regressed in rows:
+            print(f"{key:<40} {format_seconds(before):>10} {format_seconds(after):>10} {ratio:>7.2f}x"
+                  f"{'  REGRESSION' if regressed else ''}")
+        regressions = sum(row[4] for row in rows)
+        if regressions:
+            print(f"\n{regressions} of {len(rows)} cases are more than {args.threshold:.0%} slower than the baseline")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
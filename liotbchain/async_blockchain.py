@@ -0,0 +1,167 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from .blockchain import Blockchain
+from .utils import BlockchainOperationError
+from liotbchain.config import ASYNC_QUEUE_SIZE
+from liotbchain.utils import logger
+
+# Queue markers handled by the consumer task alongside transactions
+_FLUSH = object()
+_STOP = object()
+
+
+class AsyncBlockchain:
+    """
+    Asyncio front-end that decouples transaction ingestion from mining and persistence.
+
+    ``add_transaction`` only awaits an enqueue into a bounded queue, so sensor loops are never
+    blocked by proof-of-work or database writes; when the queue is full it waits, which applies
+    backpressure to producers instead of dropping readings. A consumer task hands the queued
+    transactions, in order, to ``Blockchain.add_transaction`` on a dedicated worker thread, so
+    async ingest goes through the same write-ahead log, sealing policy and metrics as
+    synchronous callers do.
+
+    Attributes:
+        blockchain (Blockchain): The underlying blockchain.
+        max_pending (int): The capacity of the ingestion queue.
+    """
+
+    def __init__(self, blockchain=None, max_pending=None, **kwargs):
+        """
+        Args:
+            blockchain (Blockchain): The blockchain to feed. If omitted, one is created from kwargs
+                and closed together with this front-end.
+            max_pending (int): The capacity of the ingestion queue. Defaults to ASYNC_QUEUE_SIZE.
+            **kwargs: Passed to Blockchain() when no blockchain is given.
+        """
+        self._owns_blockchain = blockchain is None
+        self.blockchain = blockchain or Blockchain(**kwargs)
+        self.max_pending = max_pending or ASYNC_QUEUE_SIZE
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='liotbchain-miner')
+        self._queue = None
+        self._consumer = None
+        self._in_flight = 0  # Taken off the queue and not yet added to the blockchain
+        self._error = None
+        self._closed = False
+
+    async def start(self):
+        """
+        Starts the consumer task on the running event loop. Called implicitly on first use.
+        """
+        if self._consumer is None:
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._consumer = asyncio.get_running_loop().create_task(self._consume())
+
+    @property
+    def pending(self):
+        """
+        int: The number of transactions accepted but not yet sealed into a block.
+        """
+        return (self._queue.qsize() if self._queue else 0) + self._in_flight + len(self.blockchain.transactions)
+
+    async def add_transaction(self, transaction):
+        """
+        Accepts a transaction for inclusion in a future block.
+
+        Args:
+            transaction: The transaction data to be added.
+
+        Raises:
+            BlockchainOperationError: If the front-end has been closed.
+        """
+        if self._closed:
+            raise BlockchainOperationError("AsyncBlockchain is closed")
+        await self.start()
+        await self._queue.put(transaction)
+
+    async def flush(self):
+        """
+        Waits until every transaction accepted so far is mined and persisted, sealing a final
+        partial block if needed.
+
+        Raises:
+            BlockchainOperationError: If mining or persisting a batch failed since the last flush.
+                The transactions of a failed batch stay pending and are retried by the next flush.
+        """
+        await self.start()
+        done = asyncio.get_running_loop().create_future()
+        await self._queue.put((_FLUSH, done))
+        await done
+
+    async def close(self):
+        """
+        Flushes pending transactions, stops the consumer task and releases the worker thread.
+        The underlying blockchain is closed too if it was created by this front-end.
+        """
+        if self._closed:
+            return
+        try:
+            if self._consumer is not None:
+                await self.flush()
+        finally:
+            self._closed = True
+            if self._consumer is not None:
+                await self._queue.put((_STOP, None))
+                await self._consumer
+            self._executor.shutdown()
+            if self._owns_blockchain:
+                self.blockchain.close()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def _consume(self):
+        loop = asyncio.get_running_loop()
+        item = await self._queue.get()
+        while True:
+            marker = _marker(item)
+            if marker is _STOP:
+                return
+            if marker is _FLUSH:
+                try:
+                    await loop.run_in_executor(self._executor, self.blockchain.flush)
+                except Exception as e:
+                    logger.error("Failed to flush pending transactions: %s", e)
+                    self._error = e
+                done = item[1]
+                if self._error is not None:
+                    done.set_exception(BlockchainOperationError(f"Failed to persist pending transactions: {self._error}"))
+                    self._error = None
+                else:
+                    done.set_result(None)
+                item = await self._queue.get()
+                continue
+            # Hand over everything queued up to the next marker in one trip to the worker thread
+            transactions = [item]
+            item = None
+            while not self._queue.empty():
+                item = self._queue.get_nowait()
+                if _marker(item) is not None:
+                    break
+                transactions.append(item)
+                item = None
+            self._in_flight = len(transactions)
+            await loop.run_in_executor(self._executor, self._ingest, transactions)
+            if item is None:
+                item = await self._queue.get()
+
+    def _ingest(self, transactions):
+        """
+        Adds transactions to the blockchain on the worker thread. A transaction whose block fails
+        to be mined stays pending in the blockchain; the error is reported by the next flush.
+        """
+        for transaction in transactions:
+            try:
+                self.blockchain.add_transaction(transaction)
+            except Exception as e:
+                logger.error("Failed to mine a batch of transactions: %s", e)
+                self._error = e
+            self._in_flight -= 1
+
+
+def _marker(item):
+    return item[0] if isinstance(item, tuple) and len(item) == 2 and item[0] in (_FLUSH, _STOP) else None
@@ -1,9 +1,41 @@
 import hashlib
 import json
+import struct
+from . import codec as transaction_codec
 from .utils import BlockchainOperationError
-from collections import OrderedDict
+from .merkle import MerkleTree
+from liotbchain.config import BLOCK_CODEC
 from liotbchain.utils import logger
 
+# Version 1: legacy Merkle root over hex-encoded intermediate hashes, header without a version key
+# Version 2: MerkleTree root over raw digests, version recorded in the hashed header
+# Version 3: fixed-width binary header committing to the transactions through the Merkle root only
+# Version 4: the binary header also commits to the difficulty the block was mined at
+LEGACY_BLOCK_VERSION = 1
+BINARY_HEADER_VERSION = 3
+DIFFICULTY_HEADER_VERSION = 4
+BLOCK_VERSION = 4
+
+# Version 3 header: version, index, timestamp, previous hash and Merkle root digests, then the nonce as u64
+_BINARY_HEADER = struct.Struct('<BQd32s32s')
+# Version 4 header: as version 3, with the difficulty after the timestamp
+_DIFFICULTY_HEADER = struct.Struct('<BQdB32s32s')
+_HEADER_TEXT_TAG = b'liotbchain-text:'
+
+# to_bytes() layout: magic, format, block version, flags, index, timestamp, nonce, then the hash fields
+# and the length-prefixed transactions
+_BINARY_MAGIC = b'LB'
+_BINARY_FORMAT = 1
+_BINARY_HEAD = struct.Struct('<2sBBBQdQ')
+_BINARY_HEAD_INT_TIMESTAMP = struct.Struct('<2sBBBQqQ')
+_FLAG_MSGPACK = 0x01  # Transactions are msgpack-encoded rather than canonical JSON
+_FLAG_TRANSACTIONS = 0x02  # The data is a list, stored one length-prefixed transaction at a time
+_FLAG_INT_TIMESTAMP = 0x04  # The timestamp is an int and is stored as one
+_FLAG_DIFFICULTY = 0x08  # The difficulty follows the fixed-width head as one byte
+_HASH_NONE, _HASH_DIGEST, _HASH_TEXT = 0, 1, 2
+_LENGTH = struct.Struct('<I')
+_TEXT_LENGTH = struct.Struct('<H')
+
 class Block:
     """
     Represents a block in the blockchain.
@@ -15,17 +47,74 @@ class Block:
         previous_hash (str): The hash of the block's predecessor.
         nonce (int): The nonce used for the proof-of-work.
         hash (str): The hash of the current block.
+        merkle_root (str): The Merkle root hash of the block's transactions.
+        version (int): The block format version, which selects the Merkle and header encoding.
+        difficulty (int): The number of leading zeros the block was mined to, or None if not
+            recorded. From version 4 it is part of the hashed header.
+
+    The Merkle root, the serialized transactions and the header bytes are computed once and
+    memoized for mining and hashing. Assigning to ``data`` or to any other hashed field
+    invalidates them; mutating the ``data`` list in place does not, so reassign it instead.
+    verify_merkle_root() does not use them, so validation still detects such a change.
+
+    A block may also be built from ``encoded_data``, the canonical JSON text of its transactions
+    as stored in the database. The header is then assembled from that text directly and the
+    transactions are only decoded when ``data`` is first read.
+
+    Blocks have a compact binary form, produced by to_bytes() and read back by from_bytes(),
+    which is what the storage backends persist.
     """
 
-    def __init__(self, index, timestamp, data, previous_hash, nonce=0, hash=None, merkle_root=None):
+    # Fields serialized into the header bytes cached by header_parts()
+    _HEADER_FIELDS = frozenset(('index', 'timestamp', 'previous_hash', 'merkle_root', 'version', 'difficulty'))
+
+    def __init__(self, index, timestamp, data, previous_hash, nonce=0, hash=None, merkle_root=None, encoded_data=None,
+                 version=BLOCK_VERSION, difficulty=None):
         self.index = index
         self.timestamp = timestamp
         self.data = data
+        if data is None and encoded_data is not None:
+            self._encoded_data = encoded_data
+        self.version = version
         self.previous_hash = previous_hash
         self.nonce = nonce
         self.hash = hash
         self.merkle_root = merkle_root
+        self.difficulty = difficulty
 
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in self._HEADER_FIELDS:
+            object.__setattr__(self, '_header', None)
+        if name == 'version':
+            object.__setattr__(self, '_tree', None)
+            object.__setattr__(self, '_computed_merkle_root', None)
+
+    @property
+    def data(self):
+        if self._data is None and self._encoded_data is not None:
+            self._data = json.loads(self._encoded_data)
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+        self._encoded_data = None
+        self._leaves = None
+        self._tree = None
+        self._computed_merkle_root = None
+        self.merkle_root = None
+
+    def encoded_data(self):
+        """
+        Returns the canonical (key-sorted) JSON text of the block's transactions.
+
+        Returns:
+            str: The JSON-encoded transactions, as embedded in the hashed header.
+        """
+        if self._encoded_data is None:
+            self._encoded_data = json.dumps(self.data, sort_keys=True)
+        return self._encoded_data
 
     def calculate_hash(self):
         """
@@ -35,59 +124,390 @@ class Block:
             str: The hexadecimal string of the hash.
         """
         try:
-            # Creating an ordered dictionary to keep the block information consistent for hashing
-            block_dict = OrderedDict({
-                'index': self.index,
-                'timestamp': self.timestamp,
-                'data': self.data,
-                'previous_hash': self.previous_hash,
-                'nonce': self.nonce,
-                'merkle_root': self.calculate_merkle_root()
-            })
-            block_string = json.dumps(block_dict, sort_keys=True).encode()
-            return hashlib.sha256(block_string).hexdigest()
+            prefix, suffix = self.header_parts()
+            return hashlib.sha256(prefix + self.encode_nonce(self.nonce) + suffix).hexdigest()
         except Exception as e:
-            logger.error(f"Failed to calculate hash: {str(e)}")
+            logger.error("Failed to calculate hash: %s", e)
             raise BlockchainOperationError(f"Failed to calculate hash: {str(e)}")
 
+    @property
+    def binary_nonce(self):
+        """
+        bool: Whether the header encodes the nonce as 8 little-endian bytes rather than decimal digits.
+        """
+        return self.version >= BINARY_HEADER_VERSION
+
+    def encode_nonce(self, nonce):
+        """
+        Encodes a nonce as it appears in the hashed header.
+
+        Args:
+            nonce (int): The nonce.
+
+        Returns:
+            bytes: The bytes placed between the header prefix and suffix.
+        """
+        if self.binary_nonce:
+            return nonce.to_bytes(8, 'little')
+        return b'%d' % nonce
+
+    def header_parts(self):
+        """
+        Serializes the block header around the nonce slot.
+
+        From version 3 the header is a fixed-width binary record of the version, index,
+        timestamp, previous hash and Merkle root, followed by the nonce; it commits to the
+        transactions through the Merkle root only, so hashing never serializes them. Hash
+        fields that are not 64 hex digits, such as the genesis block's previous hash, are
+        committed through the SHA-256 of their text. From version 4 the difficulty follows the
+        timestamp (0 when not recorded), so it cannot be lowered after the block is mined.
+
+        Earlier versions hash the key-sorted JSON encoding of the block fields. Because the
+        keys are sorted, the nonce always sits between the Merkle root and the previous hash.
+
+        Either way, the header splits into an invariant prefix and suffix that only need to be
+        serialized once per mining run.
+
+        Returns:
+            tuple: The (prefix, suffix) bytes; the hashed header is prefix + encode_nonce(nonce) + suffix.
+        """
+        if self._header is not None:
+            return self._header
+        if self.version >= DIFFICULTY_HEADER_VERSION:
+            self._header = _DIFFICULTY_HEADER.pack(
+                self.version,
+                self.index,
+                self.timestamp,
+                self.difficulty or 0,
+                _header_digest(self.previous_hash),
+                _header_digest(self.calculate_merkle_root())
+            ), b''
+            return self._header
+        if self.binary_nonce:
+            self._header = _BINARY_HEADER.pack(
+                self.version,
+                self.index,
+                self.timestamp,
+                _header_digest(self.previous_hash),
+                _header_digest(self.calculate_merkle_root())
+            ), b''
+            return self._header
+        head = '{"data": %s, "index": %s, "merkle_root": %s, "nonce": ' % (
+            self.encoded_data(),
+            json.dumps(self.index),
+            json.dumps(self.calculate_merkle_root())
+        )
+        tail = {
+            'previous_hash': self.previous_hash,
+            'timestamp': self.timestamp
+        }
+        if self.version != LEGACY_BLOCK_VERSION:
+            tail['version'] = self.version
+        tail = json.dumps(tail, sort_keys=True)
+        self._header = head.encode(), (', ' + tail[1:]).encode()
+        return self._header
+
+    def to_bytes(self, codec=None):
+        """
+        Encodes the block in its compact binary form.
+
+        The record starts with a fixed-width header (magic, format, version, flags, index,
+        timestamp and nonce) and the difficulty byte if recorded, followed by the previous hash,
+        hash and Merkle root as raw 32-byte
+        digests (or length-prefixed text for any other value), and then the transactions, each
+        length-prefixed. With the JSON codec each transaction is its canonical JSON text, so the
+        Merkle leaves are reused when encoding and decoding.
+
+        Args:
+            codec (str): The transaction codec, 'json' or 'msgpack'. Defaults to BLOCK_CODEC.
+
+        Returns:
+            bytes: The encoded block.
+
+        Raises:
+            ValueError: If the codec is unknown.
+            ImportError: If the codec's package is not installed.
+        """
+        codec = codec or BLOCK_CODEC
+        transaction_codec.check_codec(codec)
+        flags = _FLAG_MSGPACK if codec == transaction_codec.MSGPACK_CODEC else 0
+        if isinstance(self.data, list):
+            flags |= _FLAG_TRANSACTIONS
+            if codec == transaction_codec.JSON_CODEC:
+                payloads = self.leaves()
+            else:
+                payloads = [transaction_codec.encode(tx, codec) for tx in self.data]
+        elif codec == transaction_codec.JSON_CODEC:
+            payloads = [self.encoded_data().encode()]
+        else:
+            payloads = [transaction_codec.encode(self.data, codec)]
+        head = _BINARY_HEAD
+        if isinstance(self.timestamp, int):
+            flags |= _FLAG_INT_TIMESTAMP
+            head = _BINARY_HEAD_INT_TIMESTAMP
+        if self.difficulty is not None:
+            flags |= _FLAG_DIFFICULTY
+        parts = [head.pack(_BINARY_MAGIC, _BINARY_FORMAT, self.version, flags, self.index, self.timestamp, self.nonce)]
+        if flags & _FLAG_DIFFICULTY:
+            parts.append(bytes((self.difficulty,)))
+        parts += [
+            _pack_hash(self.previous_hash),
+            _pack_hash(self.hash),
+            _pack_hash(self.calculate_merkle_root())
+        ]
+        if flags & _FLAG_TRANSACTIONS:
+            parts.append(_LENGTH.pack(len(payloads)))
+        for payload in payloads:
+            parts.append(_LENGTH.pack(len(payload)))
+            parts.append(payload)
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, payload):
+        """
+        Decodes a block encoded by to_bytes().
+
+        JSON-encoded transactions are kept as text and only parsed when ``data`` is first
+        read; the stored Merkle root is trusted, as for blocks built from ``encoded_data``.
+
+        Args:
+            payload (bytes): The encoded block.
+
+        Returns:
+            Block: The decoded block.
+
+        Raises:
+            BlockchainOperationError: If the payload is not a valid encoded block.
+        """
+        try:
+            payload = bytes(payload)
+            magic, fmt, version, flags = struct.unpack_from('<2sBBB', payload)
+            if magic != _BINARY_MAGIC or fmt != _BINARY_FORMAT:
+                raise ValueError(f"unknown magic {magic!r} or format {fmt}")
+            head = _BINARY_HEAD_INT_TIMESTAMP if flags & _FLAG_INT_TIMESTAMP else _BINARY_HEAD
+            _, _, _, _, index, timestamp, nonce = head.unpack_from(payload)
+            offset = head.size
+            difficulty = None
+            if flags & _FLAG_DIFFICULTY:
+                difficulty = payload[offset]
+                offset += 1
+            previous_hash, offset = _unpack_hash(payload, offset)
+            block_hash, offset = _unpack_hash(payload, offset)
+            merkle_root, offset = _unpack_hash(payload, offset)
+            count = 1
+            if flags & _FLAG_TRANSACTIONS:
+                (count,) = _LENGTH.unpack_from(payload, offset)
+                offset += _LENGTH.size
+            payloads = []
+            for _ in range(count):
+                (length,) = _LENGTH.unpack_from(payload, offset)
+                offset += _LENGTH.size
+                if offset + length > len(payload):
+                    raise ValueError("truncated transaction")
+                payloads.append(payload[offset:offset + length])
+                offset += length
+            if offset != len(payload):
+                raise ValueError(f"{len(payload) - offset} trailing bytes")
+        except (struct.error, IndexError, ValueError) as e:
+            logger.error("Failed to decode block: %s", e)
+            raise BlockchainOperationError(f"Failed to decode block: {str(e)}")
+
+        data, encoded_data = None, None
+        if flags & _FLAG_MSGPACK:
+            codec = transaction_codec.MSGPACK_CODEC
+            transaction_codec.check_codec(codec)
+            if flags & _FLAG_TRANSACTIONS:
+                data = [transaction_codec.decode(tx, codec) for tx in payloads]
+            else:
+                data = transaction_codec.decode(payloads[0], codec)
+        elif flags & _FLAG_TRANSACTIONS:
+            encoded_data = '[' + b', '.join(payloads).decode() + ']'
+        else:
+            encoded_data = payloads[0].decode()
+        block = cls(index, timestamp, data, previous_hash, nonce, block_hash, merkle_root=merkle_root,
+                    encoded_data=encoded_data, version=version, difficulty=difficulty)
+        if encoded_data is not None and flags & _FLAG_TRANSACTIONS:
+            block._leaves = payloads
+        return block
+
     def calculate_merkle_root(self):
         """
         Calculates the Merkle root hash of the block's transactions.
 
+        A root supplied at construction (e.g. loaded from the database) is trusted and returned
+        without touching the transactions; use verify_merkle_root() to check it against them.
+
+        Returns:
+            str: The hexadecimal string of the Merkle root hash.
+        """
+        if self.merkle_root is None:
+            self.merkle_root = self._compute_merkle_root()
+        return self.merkle_root
+
+    def verify_merkle_root(self):
+        """
+        Checks that the block's Merkle root matches its transactions.
+
+        The root is recomputed from the current transactions, re-encoding them rather than
+        reading the memoized encodings and root, so a transaction changed in place is detected.
+        Transactions that were never decoded from their stored encoding cannot have been
+        changed, so that encoding is used as is.
+
+        Returns:
+            bool: True if the Merkle root was derived from the current transactions.
+        """
+        if self._data is None:
+            return self.calculate_merkle_root() == self._compute_merkle_root()
+        root = self._merkle_root_of(lambda: [json.dumps(tx, sort_keys=True).encode() for tx in self._data])
+        return self.calculate_merkle_root() == root
+
+    def leaves(self):
+        """
+        Returns the canonical JSON encoding of each transaction, computed once per ``data``.
+
+        Returns:
+            list: The encoded transactions, in block order.
+        """
+        if self._leaves is None:
+            self._leaves = [json.dumps(tx, sort_keys=True).encode() for tx in self.data]
+        return self._leaves
+
+    def merkle_tree(self):
+        """
+        Returns the Merkle tree over the block's transactions, built once per ``data``.
+
+        Returns:
+            MerkleTree: The tree whose root is the block's Merkle root.
+
+        Raises:
+            BlockchainOperationError: If the block uses the legacy Merkle format.
+        """
+        if self.version == LEGACY_BLOCK_VERSION:
+            raise BlockchainOperationError(f"Block {self.index} uses the legacy Merkle format, which has no tree")
+        if self._tree is None:
+            self._tree = MerkleTree(self.leaves())
+        return self._tree
+
+    def get_proof(self, tx_index):
+        """
+        Builds the inclusion proof for one of the block's transactions.
+
+        Args:
+            tx_index (int): The position of the transaction within the block.
+
+        Returns:
+            list: The (side, sibling_hash) pairs accepted by MerkleTree.verify_proof().
+        """
+        return self.merkle_tree().get_proof(tx_index)
+
+    def _compute_merkle_root(self):
+        if self._computed_merkle_root is not None:
+            return self._computed_merkle_root
+        self._computed_merkle_root = self._merkle_root_of(self.leaves, self.merkle_tree)
+        return self._computed_merkle_root
+
+    def _merkle_root_of(self, leaves, tree=None):
+        """
+        Calculates the Merkle root over encoded transactions in the block's format.
+
+        Args:
+            leaves (callable): Returns the encoded transactions.
+            tree (callable): Returns the MerkleTree over them, when it may be reused.
+
         Returns:
             str: The hexadecimal string of the Merkle root hash.
         """
         try:
-            transactions = [json.dumps(tx, sort_keys=True).encode() for tx in self.data]
-            if len(transactions) == 0:
-                return ''
-            elif len(transactions) == 1:
-                return hashlib.sha256(transactions[0]).hexdigest()
-            else:
-                return self._calculate_merkle_root(transactions)
+            if self.version == LEGACY_BLOCK_VERSION:
+                return self._calculate_legacy_merkle_root(leaves())
+            return (tree() if tree else MerkleTree(leaves())).root_hex()
+        except BlockchainOperationError:
+            raise
         except Exception as e:
-            logger.error(f"Failed to calculate Merkle root: {str(e)}")
+            logger.error("Failed to calculate Merkle root: %s", e)
             raise BlockchainOperationError(f"Failed to calculate Merkle root: {str(e)}")
 
-    def _calculate_merkle_root(self, transactions):
+    @staticmethod
+    def _calculate_legacy_merkle_root(transactions):
         """
-        Helper method to recursively calculate the Merkle root hash.
+        Calculates the version 1 Merkle root, in which the transactions themselves are paired at
+        the first level, every intermediate hash is hex-encoded before being hashed again, and
+        the last node of an odd level is paired with itself.
 
         Args:
-            transactions (list): List of transaction hashes.
+            transactions (list): List of encoded transactions.
 
         Returns:
             str: The hexadecimal string of the Merkle root hash.
         """
-        if len(transactions) == 1:
-            return hashlib.sha256(transactions[0]).hexdigest()
+        if not transactions:
+            return ''
+        level = transactions
+        while len(level) > 1:
+            level = [
+                hashlib.sha256(level[i] + (level[i + 1] if i + 1 < len(level) else level[i])).hexdigest().encode()
+                for i in range(0, len(level), 2)
+            ]
+        return hashlib.sha256(level[0]).hexdigest()
 
-        new_level = []
 
-        for i in range(0, len(transactions), 2):
-            left = transactions[i]
-            right = transactions[i + 1] if i + 1 < len(transactions) else left
-            new_hash = hashlib.sha256(left + right).hexdigest().encode()
-            new_level.append(new_hash)
+def _hex_digest(value):
+    """
+    Returns the raw digest of a hash field holding 64 lowercase hex digits, or None.
+    """
+    if value is None or len(value) != 64:
+        return None
+    try:
+        digest = bytes.fromhex(value)
+    except ValueError:
+        return None
+    return digest if digest.hex() == value else None
 
-        return self._calculate_merkle_root(new_level)
+
+def _header_digest(value):
+    """
+    Returns the 32 bytes a hash field contributes to the binary header: the digest itself for
+    64 lowercase hex digits, otherwise the SHA-256 of the text.
+    """
+    digest = _hex_digest(value)
+    if digest is not None:
+        return digest
+    return hashlib.sha256(_HEADER_TEXT_TAG + ('' if value is None else value).encode()).digest()
+
+
+def _pack_hash(value):
+    """
+    Encodes a hash field of the binary block form: a tag byte, then nothing for None, the raw
+    digest for 64 lowercase hex digits, or the length-prefixed text for anything else.
+    """
+    if value is None:
+        return bytes((_HASH_NONE,))
+    digest = _hex_digest(value)
+    if digest is not None:
+        return bytes((_HASH_DIGEST,)) + digest
+    text = value.encode()
+    return bytes((_HASH_TEXT,)) + _TEXT_LENGTH.pack(len(text)) + text
+
+
+def _unpack_hash(payload, offset):
+    """
+    Decodes a hash field written by _pack_hash().
+
+    Returns:
+        tuple: The value and the offset just past it.
+    """
+    tag = payload[offset]
+    offset += 1
+    if tag == _HASH_NONE:
+        return None, offset
+    if tag == _HASH_DIGEST:
+        if offset + 32 > len(payload):
+            raise ValueError("truncated hash field")
+        return payload[offset:offset + 32].hex(), offset + 32
+    if tag == _HASH_TEXT:
+        (length,) = _TEXT_LENGTH.unpack_from(payload, offset)
+        offset += _TEXT_LENGTH.size
+        if offset + length > len(payload):
+            raise ValueError("truncated hash field")
+        return payload[offset:offset + length].decode(), offset + length
+    raise ValueError(f"unknown hash field tag {tag}")
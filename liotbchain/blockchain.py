@@ -1,9 +1,29 @@
-from .block import Block
-from .utils import InvalidBlockError, InvalidChainError, MiningFailedError, DatabaseConfigurationError
-from .database.db import create_database, save_block, load_blocks
+from .block import Block, DIFFICULTY_HEADER_VERSION
+from .utils import InvalidBlockError, InvalidChainError, MiningFailedError, DatabaseConfigurationError, BlockConflictError
+from .validation import ValidationReport, verify_blocks, verify_chain_parallel, history_depth, expected_difficulty
+from .database.postgres import PostgresBackend
+from .database.sqlite import SQLiteBackend
+from .database.filestore import FileStore
+from .chain import LazyChain
+from .pipeline import MiningPipeline
+from .mining import search_nonce, ParallelMiner
+from .sealing import build_policy
+from .retarget import build_retargeter
+from .wal import WriteAheadLog
+from .columnar import ReadingIndex
+from .metrics import MetricsRegistry, NullRegistry, MetricsServer
+import itertools
+import json
+import threading
 import time
-import psycopg2
-from liotbchain.config import DATABASE_URL, TRANSACTIONS_PER_BLOCK, DIFFICULTY, NONCE_LIMIT
+from collections import Counter, deque
+from liotbchain.config import DATABASE_URL, TRANSACTIONS_PER_BLOCK, DIFFICULTY, NONCE_LIMIT, MINING_WORKERS, DETERMINISTIC_MINING, \
+    POOL_MIN_SIZE, POOL_MAX_SIZE, POOL_HEALTH_CHECK_INTERVAL, LAZY_CHAIN, CHAIN_WINDOW, CHAIN_CACHE_SIZE, \
+    VALIDATION_WORKERS, VALIDATION_CHUNK_SIZE, PIPELINED_MINING, PIPELINE_DEPTH, MAX_BLOCK_BYTES, MAX_BLOCK_AGE, \
+    ADAPTIVE_SEALING, MAX_TRANSACTIONS_PER_BLOCK, SEALING_TARGET_INTERVAL, COMMIT_RETRIES, \
+    WAL_PATH, WAL_SYNC_INTERVAL, STORAGE_BACKEND, STORAGE_PATH, COLUMNAR_INDEX, COLUMNAR_FIELDS, \
+    METRICS_ENABLED, METRICS_PORT, DIFFICULTY_RETARGET, TARGET_BLOCK_INTERVAL, RETARGET_WINDOW, RETARGET_MAX_STEP, \
+    MIN_DIFFICULTY, MAX_DIFFICULTY
 from liotbchain.utils import logger
 
 
@@ -12,23 +32,150 @@ class Blockchain:
     Blockchain implementation with proof-of-work mechanism.
 
     Attributes:
-        chain (list): A list of blocks that form the blockchain.
-        difficulty (int): The number of leading zeros required in the hash.
+        chain (list or LazyChain): The blocks that form the blockchain. In lazy mode this is a
+            database-backed sequence that keeps only the last ``chain_window`` blocks in memory.
+        difficulty (int): The number of leading zeros required in the hash of a new chain, recorded in its
+            genesis block; later blocks follow the recorded difficulties, so changing it does not affect
+            a stored chain. Blocks that did not record their difficulty are checked against it.
+        retargeter (Retargeter): Adjusts the difficulty of new blocks to the observed block times, or None.
+            Blocks that record their difficulty must record the one it assigns after their predecessors,
+            or their predecessor's difficulty without one.
         transactions (list): A list to hold transactions temporarily until a block is created.
         transactions_per_block (int): The number of transactions to be grouped into a single block.
+        sealing_policy (SealingPolicy): Decides when pending transactions are sealed into a block.
         nonce_limit (int): The maximum limit for nonce to prevent infinite loops.
+        mining_workers (int): The number of processes used for proof-of-work; 1 mines in-process.
+        deterministic_mining (bool): Whether parallel mining must return the lowest winning nonce.
+        storage (StorageBackend): Where blocks and the validation checkpoint are persisted.
+        pool (ConnectionPool): The connection pool of the PostgreSQL storage, or None for other backends.
+        lazy_chain (bool): Whether only the tip of the chain is loaded into memory.
+        chain_window (int): The number of most recent blocks kept in memory in lazy mode.
+        checkpoint (tuple): The (index, hash) of the highest block verified by validate_chain, or None.
+        pipeline (MiningPipeline): The background mining and persistence stages in pipelined mode, or None.
+        pipeline_depth (int): The number of sealed batches queued per stage before producers wait for mining.
+        wal (WriteAheadLog): The log that makes pending transactions durable, or None.
+        readings (ReadingIndex): The columnar index of the readings stored in the chain, or None.
+        metrics (MetricsRegistry): The mining, storage and validation metrics; a NullRegistry
+            when metrics are disabled.
+
+    The blockchain can be used as a context manager, which calls close() on exit.
     """
-    def __init__(self, difficulty=None, nonce_limit=None, db_url=None, transactions_per_block=None):
+    def __init__(self, difficulty=None, nonce_limit=None, db_url=None, transactions_per_block=None,
+                 mining_workers=None, deterministic_mining=None, pool_min_size=None, pool_max_size=None,
+                 lazy_chain=None, chain_window=None, pipelined=None, sealing_policy=None,
+                 wal_path=None, wal_sync_interval=None, storage=None, columnar_index=None,
+                 metrics=None, retargeter=None, pipeline_depth=None):
         self.chain = []
+        if metrics is None:
+            metrics = MetricsRegistry() if METRICS_ENABLED else NullRegistry()
+        self.metrics = metrics
+        self._metrics_server = None
+        self._register_metrics()
         self.difficulty = difficulty or DIFFICULTY  # Difficulty for the proof of work algorithm
+        self.retargeter = retargeter or build_retargeter(
+            DIFFICULTY_RETARGET,
+            TARGET_BLOCK_INTERVAL,
+            window=RETARGET_WINDOW,
+            max_step=RETARGET_MAX_STEP,
+            min_difficulty=MIN_DIFFICULTY,
+            max_difficulty=MAX_DIFFICULTY
+        )
         self.nonce_limit = nonce_limit or NONCE_LIMIT  # Limit to prevent infinite loops
         self.transactions = []  # Temporary storage for transactions
-        self.db_url = db_url or DATABASE_URL
-        if not self.db_url:
-            raise DatabaseConfigurationError("Database URL is missing. Please provide a valid DATABASE_URL.")
+        self._owns_storage = storage is None
+        self.storage = storage if storage is not None else self._create_storage(db_url, pool_min_size, pool_max_size)
+        self.pool = getattr(self.storage, 'pool', None)
+        self.db_url = self.pool.db_url if self.pool else None
         self.transactions_per_block = transactions_per_block or TRANSACTIONS_PER_BLOCK
-        self.initialize_blockchain()
-
+        self.sealing_policy = sealing_policy or build_policy(
+            self.transactions_per_block,
+            max_bytes=MAX_BLOCK_BYTES,
+            max_age=MAX_BLOCK_AGE,
+            adaptive=ADAPTIVE_SEALING,
+            max_transactions=MAX_TRANSACTIONS_PER_BLOCK,
+            target_interval=SEALING_TARGET_INTERVAL
+        )
+        self._pending_lock = threading.Lock()
+        self._mining_lock = threading.RLock()  # Held by the single thread allowed to extend the chain
+        self._sealed = deque()
+        self.pipeline_depth = pipeline_depth or PIPELINE_DEPTH
+        self._pending_bytes = 0
+        self._pending_since = None
+        self._sealing_timer = None
+        self._stop_sealing = threading.Event()
+        self.mining_workers = mining_workers or MINING_WORKERS
+        self.deterministic_mining = DETERMINISTIC_MINING if deterministic_mining is None else deterministic_mining
+        self.miner = ParallelMiner(self.mining_workers, self.deterministic_mining) if self.mining_workers > 1 else None
+        self.lazy_chain = LAZY_CHAIN if lazy_chain is None else lazy_chain
+        self.chain_window = chain_window or CHAIN_WINDOW
+        self.pipeline = None
+        self._block_listeners = []
+        self.readings = None
+        if COLUMNAR_INDEX if columnar_index is None else columnar_index:
+            self.readings = ReadingIndex(fields=COLUMNAR_FIELDS)
+            self._block_listeners.append(self.readings.add_block)
+        wal_path = WAL_PATH if wal_path is None else wal_path
+        self.wal = WriteAheadLog(wal_path, WAL_SYNC_INTERVAL if wal_sync_interval is None else wal_sync_interval) if wal_path else None
+        try:
+            self.initialize_blockchain()
+        except Exception:
+            self.close()
+            raise
+        if PIPELINED_MINING if pipelined is None else pipelined:
+            self.pipeline = MiningPipeline(self, depth=self.pipeline_depth)
+        if self.sealing_policy.max_age:
+            self._sealing_timer = threading.Thread(target=self._seal_expired, name='liotbchain-sealer', daemon=True)
+            self._sealing_timer.start()
+        if self.metrics.enabled and METRICS_PORT:
+            self._metrics_server = MetricsServer(self.metrics, METRICS_PORT)
+
+
+    def _register_metrics(self):
+        """
+        Creates the metrics updated by the blockchain. With a NullRegistry every update is a no-op.
+        """
+        m = self.metrics
+        self._pow_attempts = m.counter('liotbchain_pow_attempts_total', 'Nonces tried by proof-of-work.')
+        self._pow_seconds = m.histogram('liotbchain_pow_seconds', 'Duration of proof-of-work per block.')
+        self._pow_hash_rate = m.gauge('liotbchain_pow_hashes_per_second', 'Hash rate of the last proof-of-work.')
+        self._pow_difficulty = m.gauge('liotbchain_pow_difficulty', 'Difficulty of the last proof-of-work.')
+        self._save_seconds = m.histogram('liotbchain_storage_save_seconds', 'Latency of saving a block.')
+        self._load_seconds = m.histogram('liotbchain_storage_load_seconds', 'Latency of loading the chain.')
+        self._commit_conflicts = m.counter('liotbchain_commit_conflicts_total',
+                                           'Blocks rebased because another writer took their index.')
+        self._transactions_added = m.counter('liotbchain_transactions_total', 'Transactions accepted.')
+        self._validated_blocks = m.counter('liotbchain_validated_blocks_total', 'Blocks verified by validation runs.')
+        self._validation_seconds = m.histogram('liotbchain_validation_seconds', 'Duration of validation runs.')
+        self._validation_rate = m.gauge('liotbchain_validation_blocks_per_second',
+                                        'Throughput of the last validation run.')
+        m.gauge('liotbchain_pending_transactions', 'Transactions waiting to be sealed into a block.',
+                lambda: len(self.transactions))
+        m.gauge('liotbchain_sealed_batches', 'Sealed batches waiting to be mined inline.', lambda: len(self._sealed))
+        m.gauge('liotbchain_chain_length', 'Blocks in the chain.', lambda: len(self.chain))
+        m.gauge('liotbchain_pipeline_sealed_queue_depth', 'Batches queued for the pipeline mining stage.',
+                lambda: self.pipeline_stats().get('sealed_queue_depth', 0))
+        m.gauge('liotbchain_pipeline_mined_queue_depth', 'Blocks queued for the pipeline persistence stage.',
+                lambda: self.pipeline_stats().get('mined_queue_depth', 0))
+
+    @staticmethod
+    def _create_storage(db_url, pool_min_size, pool_max_size):
+        """
+        Builds the storage backend from the configuration: PostgreSQL when a database URL is
+        given, otherwise the backend named by STORAGE_BACKEND.
+        """
+        if db_url is None and STORAGE_BACKEND == 'sqlite':
+            return SQLiteBackend(STORAGE_PATH)
+        if db_url is None and STORAGE_BACKEND == 'file':
+            return FileStore(STORAGE_PATH)
+        db_url = db_url or DATABASE_URL
+        if not db_url:
+            raise DatabaseConfigurationError("Database URL is missing. Please provide a valid DATABASE_URL.")
+        return PostgresBackend(
+            db_url,
+            min_size=pool_min_size or POOL_MIN_SIZE,
+            max_size=pool_max_size or POOL_MAX_SIZE,
+            health_check_interval=POOL_HEALTH_CHECK_INTERVAL
+        )
 
     def create_genesis_block(self):
         """
@@ -37,33 +184,97 @@ class Blockchain:
         Returns:
             Block: The genesis block with predefined values.
         """
-        genesis_block = Block(0, time.time(), "Genesis Block", "0")
+        # The genesis block records the difficulty the chain starts at, which later blocks follow
+        genesis_block = Block(0, time.time(), "Genesis Block", "0", difficulty=self.difficulty)
         genesis_block.hash = genesis_block.calculate_hash()  # Set the hash for the genesis block
         self.chain.append(genesis_block)
-        save_block(genesis_block, self.db_url)  # Save the genesis block to the database
-        logger.info(f"Genesis block created with index: {genesis_block.index}")
+        self.storage.save_block(genesis_block)  # Save the genesis block to the database
+        self._notify_listeners(genesis_block)
+        logger.info("Genesis block created with index: %s", genesis_block.index)
 
 
     def initialize_blockchain(self):
         """
         Initializes the blockchain by creating the database and loading existing blocks from the database.
-        If no existing blocks are found, it creates the genesis block.
+        In lazy mode only the chain length and the last ``chain_window`` blocks are loaded.
+        If no existing blocks are found, it creates the genesis block. With a write-ahead log, the
+        transactions it holds that never made it into a stored block become pending again.
         """
-        create_database(self.db_url)
-        loaded_blocks = load_blocks(self.db_url)
-        if loaded_blocks:
-            self.chain = loaded_blocks
-        else:
+        self.storage.create()
+        self.checkpoint = self.storage.load_checkpoint()
+        with self._load_seconds.time():
+            if self.lazy_chain:
+                self.chain = LazyChain(self.storage, window=self.chain_window, cache_size=CHAIN_CACHE_SIZE)
+                self.chain.load()
+            else:
+                self.chain = list(self.storage.iter_blocks())
+        if self.readings is not None:
+            # A lazy chain keeps only its tail in memory, so the index is built from a stream of the stored blocks
+            self.readings.extend(self.storage.iter_blocks() if self.lazy_chain else self.chain)
+        if not self.chain:
             self.create_genesis_block()
-        logger.info(f"Blockchain initialized with {len(self.chain)} blocks.")
+        if self.wal:
+            self._replay_wal()
+        logger.info("Blockchain initialized with %s blocks.", len(self.chain))
+
+    def _replay_wal(self):
+        """
+        Restores the logged transactions that are not stored in any block after the log's base
+        index, then rewrites the log to hold just those.
+        """
+        base, logged = self.wal.read()
+        replay = []
+        if base is not None and logged:
+            persisted = Counter()
+            for block in self.storage.iter_blocks(start_index=base + 1):
+                persisted.update(json.dumps(transaction, sort_keys=True) for transaction in block.data)
+            for transaction in logged:
+                key = json.dumps(transaction, sort_keys=True)
+                if persisted[key]:
+                    persisted[key] -= 1
+                else:
+                    replay.append(transaction)
+        with self._pending_lock:
+            if replay:
+                self.transactions = replay
+                self._pending_since = time.monotonic()
+                if self.sealing_policy.tracks_bytes:
+                    self._pending_bytes = sum(self._transaction_size(transaction) for transaction in replay)
+                logger.info("Replayed %s pending transactions from the write-ahead log.", len(replay))
+            self.wal.rewrite(self.get_latest_block().index, self.transactions)
+
+    def _compact_wal(self):
+        """
+        Rewrites the write-ahead log to the transactions not yet stored in a block. The caller
+        must hold the mining and pending locks and, without a pipeline, ensure no sealed batch
+        is in flight.
+        """
+        unpersisted = self.pipeline.unpersisted() if self.pipeline else []
+        self.wal.rewrite(self.get_latest_block().index, unpersisted + self.transactions)
+
+    def _try_compact_wal(self):
+        """
+        Compacts the write-ahead log after the pipeline commits a block. The caller must hold the
+        mining lock. The log is left alone while another thread holds the pending lock, since it
+        may be waiting to hand a batch to the pipeline; a later commit compacts it instead.
+        """
+        if not self._pending_lock.acquire(blocking=False):
+            return
+        try:
+            self._compact_wal()
+        finally:
+            self._pending_lock.release()
 
 
     def save_blockchain(self):
         """
-        Saves the entire blockchain to the database.
+        Saves the entire blockchain to the database in a single batched transaction.
+        Blocks that are already stored are left untouched.
+
+        Returns:
+            int: The number of blocks written.
         """
-        for block in self.chain:
-            save_block(block, self.db_url)
+        return self.storage.save_blocks(self.chain, on_conflict='skip')
 
 
     def add_block(self, block):
@@ -77,23 +288,136 @@ class Blockchain:
             InvalidBlockError: If the block cannot be added to the blockchain.
         """
         try:
-            block.previous_hash = self.get_latest_block().hash
-            # block.merkle_root = block.calculate_merkle_root()  # Calculate the Merkle root before hashing
-            block.hash = self.proof_of_work(block)  # Calculate the hash after setting previous_hash and merkle_root
-            self.chain.append(block)
-            save_block(block, self.db_url)  # Save the updated blockchain to the database
-            logger.info(f"Block added with index: {block.index}")
+            with self._mining_lock:
+                block.previous_hash = self.get_latest_block().hash
+                # block.merkle_root = block.calculate_merkle_root()  # Calculate the Merkle root before hashing
+                block.hash = self.proof_of_work(block)  # Calculate the hash after setting previous_hash and merkle_root
+                self._commit_block(block)
+            logger.info("Block added with index: %s", block.index)
         except Exception as e:
-            logger.error(f"Error in add_block: {str(e)}")
+            logger.error("Error in add_block: %s", e)
             raise InvalidBlockError(f"Failed to add block: {str(e)}")
 
+    def _commit_block(self, block):
+        """
+        Persists a mined block and then appends it to the chain, so the in-memory tip never
+        runs ahead of the database.
+
+        If another writer has already committed a block with the same index, the blocks it
+        committed are appended first and the block is re-mined on top of them, at the difficulty
+        that follows them, up to COMMIT_RETRIES times.
+        """
+        for attempt in range(COMMIT_RETRIES + 1):
+            try:
+                with self._save_seconds.time():
+                    self.storage.save_block(block)  # Save the updated blockchain to the database
+                break
+            except BlockConflictError:
+                if attempt == COMMIT_RETRIES:
+                    raise
+                self._commit_conflicts.inc()
+                self.sync()
+                tip = self.get_latest_block()
+                block.index = tip.index + 1
+                block.previous_hash = tip.hash
+                block.difficulty = None  # Assigned again for the new predecessor
+                self.proof_of_work(block)
+                logger.info("Block rebased onto index %s after a conflicting commit", block.index)
+        self.chain.append(block)
+        self._notify_listeners(block)
+
+    def sync(self):
+        """
+        Appends the blocks committed to the database by other writers after the in-memory tip.
+        Each one is verified against its predecessor before it is accepted.
+
+        Returns:
+            int: The number of blocks appended.
+
+        Raises:
+            InvalidChainError: If a stored block does not extend the in-memory chain.
+        """
+        with self._mining_lock:
+            history = self._history()
+            appended = 0
+            blocks = self.storage.iter_blocks(start_index=history[-1].index + 1)
+            for block, reason in verify_blocks(blocks, history, self.difficulty, self.retargeter):
+                if reason:
+                    raise InvalidChainError(f"Cannot sync with the database: {reason}")
+                self.chain.append(block)
+                self._notify_listeners(block)
+                appended += 1
+            if appended:
+                logger.info("Synced %s blocks committed by other writers.", appended)
+            return appended
+
+    def add_block_listener(self, listener):
+        """
+        Registers a callable to be called with each block once it is persisted and appended
+        to the chain, including blocks committed by other writers and picked up by sync().
+
+        Listeners run on the thread that committed the block, while it holds the mining lock,
+        so they should be quick. An exception raised by a listener is logged and ignored.
+
+        Args:
+            listener (callable): Called with the Block as its only argument.
+        """
+        self._block_listeners.append(listener)
+
+    def remove_block_listener(self, listener):
+        """
+        Unregisters a listener added with add_block_listener().
 
-    def proof_of_work(self, block):
+        Args:
+            listener (callable): The listener to remove.
+        """
+        self._block_listeners.remove(listener)
+
+    def _notify_listeners(self, block):
+        for listener in list(self._block_listeners):
+            try:
+                listener(block)
+            except Exception as e:
+                logger.error("Block listener failed on block %s: %s", block.index, e)
+
+    def next_difficulty(self, history=None):
+        """
+        Returns the difficulty the next block is mined at: the retargeter's choice, or without one
+        the difficulty its predecessor recorded (see validation.expected_difficulty).
+
+        Args:
+            history (sequence): The blocks ending with the new block's predecessor, at least the
+                last ``retargeter.depth`` of them. Defaults to the chain, for a block on the current tip.
+
+        Returns:
+            int: The number of leading zeros required of the next block.
+        """
+        if history is not None:
+            return expected_difficulty(history, self.difficulty, self.retargeter)
+        with self._mining_lock:
+            return expected_difficulty(self.chain, self.difficulty, self.retargeter)
+
+    def _history(self):
+        """
+        Returns:
+            deque: The last blocks of the chain that checking the next block reads, bounded to that many.
+        """
+        depth = history_depth(self.retargeter)
+        return deque(self.chain[-depth:], maxlen=depth)
+
+    def proof_of_work(self, block, history=None):
         """
         Performs the proof of work to adjust the block's nonce until the hash meets the blockchain difficulty.
+        With more than one mining worker, the nonce space is searched across a process pool.
+
+        A block that records its difficulty (version 4 on) is mined at that difficulty; when it
+        has none yet, it is assigned next_difficulty(history) first. Older blocks are mined at
+        ``difficulty``.
 
         Args:
             block (Block): The block for which the nonce is adjusted.
+            history (sequence): The blocks ending with the block's predecessor, when that is not
+                the current tip; see next_difficulty().
 
         Returns:
             str: The hash of the block that satisfies the difficulty criteria.
@@ -101,41 +425,141 @@ class Blockchain:
         Raises:
             MiningFailedError: If the mining process fails to find a valid hash within the threshold.
         """
-        block.nonce = 0
-        block.hash = block.calculate_hash()
+        difficulty = self.difficulty
+        if block.version >= DIFFICULTY_HEADER_VERSION:
+            if block.difficulty is None:
+                block.difficulty = self.next_difficulty(history)
+            difficulty = block.difficulty
         block.merkle_root = block.calculate_merkle_root()
-        while not block.hash.startswith('0' * self.difficulty):
-            block.nonce += 1
-            block.hash = block.calculate_hash()
-            if block.nonce > self.nonce_limit:  # Use the configurable limit to prevent infinite loops
-                raise MiningFailedError("Mining failed: Nonce exceeds threshold")
+        prefix, suffix = block.header_parts()
+        started = time.perf_counter()
+        if self.miner:
+            result = self.miner.search(prefix, suffix, difficulty, self.nonce_limit + 1, block.binary_nonce)
+        else:
+            result = search_nonce(prefix, suffix, difficulty, 0, self.nonce_limit + 1, binary_nonce=block.binary_nonce)
+        elapsed = time.perf_counter() - started
+        # Nonces are tried in increasing order, so the winning nonce tells how many were tried
+        # (exactly for serial mining, approximately for parallel mining)
+        attempts = result[0] + 1 if result else self.nonce_limit + 1
+        self._pow_attempts.inc(attempts)
+        self._pow_seconds.observe(elapsed)
+        self._pow_difficulty.set(difficulty)
+        if elapsed > 0:
+            self._pow_hash_rate.set(attempts / elapsed)
+        if result is None:
+            raise MiningFailedError("Mining failed: Nonce exceeds threshold")
+        block.nonce, block.hash = result
         return block.hash
 
-    def is_chain_valid(self):
+    def is_chain_valid(self, full=False):
         """
         Validates the blockchain's integrity by ensuring each block's link and proof-of-work are correct.
+        Only the blocks appended since the last validation checkpoint are verified unless ``full`` is set.
+
+        Args:
+            full (bool): Whether to ignore the checkpoint and verify the whole chain.
 
         Returns:
-            bool: True if the blockchain is valid, otherwise raises InvalidChainError.
+            bool: True if the blockchain is valid, otherwise raises InvalidBlockError.
         """
-        try:
-            for i in range(1, len(self.chain)):
-                current = self.chain[i]
-                previous = self.chain[i - 1]
-
-                if current.hash != current.calculate_hash():
-                    logger.error(f"Hash mismatch: Block {i}'s stored hash {current.hash} does not match calculated hash {current.calculate_hash()}.")
-                    raise InvalidBlockError(f"Hash mismatch: Block {i}'s stored hash {current.hash} does not match calculated hash {current.calculate_hash()}.")
-                if current.previous_hash != previous.hash:
-                    logger.error(f"Link error: Block {i}'s previous hash {current.previous_hash} does not link to Block {i-1}'s hash {previous.hash}.")
-                    raise InvalidBlockError(f"Link error: Block {i}'s previous hash {current.previous_hash} does not link to Block {i-1}'s hash.")
-                if not current.hash.startswith('0' * self.difficulty):
-                    logger.error(f"Proof of Work error: Block {i}'s hash {current.hash} does not meet the difficulty requirement.")
-                    raise InvalidBlockError(f"Proof of Work error: Block {i}'s hash {current.hash} does not meet the difficulty requirement.")
-
-            return True
-        except InvalidChainError as e:
-            return False
+        report = self.validate_chain(full=full)
+        if not report:
+            logger.error("%s", report.reason)
+            raise InvalidBlockError(report.reason)
+        return True
+
+    def validate_chain(self, full=False):
+        """
+        Validates the blockchain and reports the outcome instead of raising.
+
+        Validation resumes from the checkpoint, the highest block index verified so far and its
+        hash. The checkpointed block is re-hashed first, so tampering with it is still detected,
+        and then only the blocks after it are verified. After a successful run the checkpoint
+        moves to the tip and is persisted to the database.
+
+        Args:
+            full (bool): Whether to ignore the checkpoint and verify the whole chain.
+
+        Returns:
+            ValidationReport: The outcome, including the first bad index and the throughput.
+        """
+        checkpoint = None if full else self.checkpoint
+        if checkpoint is not None and checkpoint[0] >= len(self.chain):
+            checkpoint = None  # The chain no longer reaches the checkpoint; verify everything
+
+        depth = history_depth(self.retargeter)
+        if checkpoint is None:
+            report = ValidationReport(start_index=1)
+            # Walk the chain sequentially so a lazy chain is streamed rather than fetched block by block
+            blocks = iter(self.chain)
+            history = deque(itertools.islice(blocks, 1), maxlen=depth)
+        else:
+            checkpoint_index, checkpoint_hash = checkpoint
+            report = ValidationReport(start_index=checkpoint_index + 1, incremental=True)
+            # Start far enough back for the retargeter to see the blocks before the checkpoint
+            start = max(0, checkpoint_index + 1 - depth)
+            blocks = iter(self.chain[start:])
+            history = deque(itertools.islice(blocks, checkpoint_index + 1 - start), maxlen=depth)
+            previous = history[-1]
+            if previous.hash != checkpoint_hash or not previous.verify_merkle_root() \
+                    or previous.calculate_hash() != checkpoint_hash:
+                report.fail(checkpoint_index, f"Checkpoint mismatch: Block {checkpoint_index} no longer hashes to the verified hash {checkpoint_hash}.")
+                return report.finish()
+
+        if history:
+            for current, reason in verify_blocks(blocks, history, self.difficulty, self.retargeter):
+                if reason:
+                    report.fail(current.index, reason)
+                    break
+                report.blocks_checked += 1
+        previous = history[-1] if history else None
+        report.finish()
+        self._record_validation(report)
+
+        if report and previous is not None and (previous.index, previous.hash) != self.checkpoint:
+            self.checkpoint = (previous.index, previous.hash)
+            self.storage.save_checkpoint(previous.index, previous.hash)
+        logger.info("Validation %s: %s", 'passed' if report else 'failed', report)
+        return report
+
+    def verify_chain_parallel(self, workers=None, chunk_size=None):
+        """
+        Verifies the whole chain stored in the database across a pool of worker processes.
+
+        Blocks are streamed from the database in chunks; each chunk's hashes, links and
+        proof-of-work are verified by a worker, with the link to the preceding chunk checked at
+        the boundary. The first failure reported is the same one the serial validator reports.
+        A successful run moves the validation checkpoint to the last verified block.
+
+        Args:
+            workers (int): The number of worker processes. Defaults to VALIDATION_WORKERS.
+            chunk_size (int): The number of blocks per task. Defaults to VALIDATION_CHUNK_SIZE.
+
+        Returns:
+            ValidationReport: The outcome, including the first bad index and the throughput.
+        """
+        chunk_size = chunk_size or VALIDATION_CHUNK_SIZE
+        report = verify_chain_parallel(
+            self.storage.iter_blocks(batch_size=chunk_size),
+            self.difficulty,
+            workers=workers or VALIDATION_WORKERS,
+            chunk_size=chunk_size,
+            retargeter=self.retargeter
+        )
+        self._record_validation(report)
+        if report and report.last_block is not None and report.last_block != self.checkpoint:
+            self.checkpoint = report.last_block
+            self.storage.save_checkpoint(*report.last_block)
+        logger.info("Parallel validation %s: %s", 'passed' if report else 'failed', report)
+        return report
+
+    def _record_validation(self, report):
+        """
+        Feeds the outcome of a validation run to the validation metrics.
+        """
+        self._validated_blocks.inc(report.blocks_checked)
+        self._validation_seconds.observe(report.elapsed)
+        self._validation_rate.set(report.blocks_per_second)
 
     def get_latest_block(self):
         """
@@ -148,46 +572,187 @@ class Blockchain:
 
     def add_transaction(self, transaction):
         """
-        Adds a transaction to the temporary storage. When the number of transactions reaches
-        the configured TRANSACTIONS_PER_BLOCK, a new block is mined and added to the blockchain.
+        Adds a transaction to the temporary storage. When the sealing policy says so (by default,
+        once TRANSACTIONS_PER_BLOCK transactions are pending), a new block is sealed.
+
+        Safe to call from several threads at once: the pending buffer is only locked for the
+        append, and sealed batches are mined by a single owner thread at a time, so producers do
+        not wait for proof-of-work unless ``pipeline_depth`` sealed batches are already queued.
+        With a write-ahead log, the transaction is logged before it is accepted.
 
         Args:
             transaction: The transaction data to be added.
         """
-        self.transactions.append(transaction)
-        if len(self.transactions) >= self.transactions_per_block:
-            self.mine_block()
+        with self._pending_lock:
+            # Logged under the pending lock so a concurrent log rewrite cannot drop the record
+            sequence = self.wal.append(transaction) if self.wal else None
+            now = time.monotonic()
+            if not self.transactions:
+                self._pending_since = now
+            self.transactions.append(transaction)
+            self._transactions_added.inc()
+            if self.sealing_policy.tracks_bytes:
+                self._pending_bytes += self._transaction_size(transaction)
+            seal = self.sealing_policy.should_seal(len(self.transactions), self._pending_bytes, now - self._pending_since)
+            if seal:
+                self._seal_pending()
+        if sequence:
+            self.wal.commit(sequence)
+        if seal:
+            self._mine_sealed(wait=len(self._sealed) >= self.pipeline_depth)
+
+    def seal_block(self):
+        """
+        Closes the current batch of pending transactions. In pipelined mode the batch is handed
+        to the mining stage and new transactions start a fresh batch immediately; otherwise the
+        block is mined before returning. If mining fails, the batch goes back to the pending
+        transactions.
+        """
+        with self._pending_lock:
+            if self.transactions:
+                self._seal_pending()
+        self._mine_sealed(wait=True)
+
+    def _seal_pending(self):
+        """
+        Moves the pending transactions to the sealed queue, or to the pipeline in pipelined mode.
+        The caller must hold the pending lock, which keeps batches in sealing order.
+        """
+        batch, age = self._take_pending()
+        self.sealing_policy.on_seal(len(batch), age)
+        if self.pipeline:
+            self.pipeline.submit(batch)
+        else:
+            self._sealed.append(batch)
 
-    def mine_block(self):
+    def _mine_sealed(self, wait):
+        """
+        Mines the sealed batches in order. Only the thread holding the mining lock mines; other
+        threads leave their batches to it unless ``wait`` is set. The queue is re-checked after
+        the lock is released, so a batch sealed in the meantime is never stranded.
+        """
+        while self._sealed:
+            if not self._mining_lock.acquire(blocking=wait):
+                return
+            try:
+                while self._sealed:
+                    batch = self._sealed[0]
+                    try:
+                        self.mine_block(batch)
+                    except Exception:
+                        self._sealed.popleft()
+                        self._restore_pending(batch)
+                        raise
+                    self._sealed.popleft()
+                if self.wal and not self.pipeline:
+                    with self._pending_lock:
+                        if not self._sealed:
+                            self._compact_wal()
+            finally:
+                self._mining_lock.release()
+
+    def _take_pending(self):
+        """
+        Empties the pending buffer. The caller must hold the pending lock.
+
+        Returns:
+            tuple: The pending transactions and the seconds since the oldest was added.
+        """
+        batch, self.transactions = self.transactions, []
+        age = time.monotonic() - self._pending_since if batch else 0.0
+        self._pending_bytes = 0
+        return batch, age
+
+    def _restore_pending(self, batch):
+        """
+        Puts a batch that failed to be mined back in front of the pending transactions.
+        """
+        with self._pending_lock:
+            if not self.transactions:
+                self._pending_since = time.monotonic()
+            self.transactions[:0] = batch
+            if self.sealing_policy.tracks_bytes:
+                self._pending_bytes += sum(self._transaction_size(transaction) for transaction in batch)
+
+    @staticmethod
+    def _transaction_size(transaction):
+        return len(json.dumps(transaction, sort_keys=True))
+
+    def _seal_expired(self):
+        """
+        Background timer that seals pending transactions once the oldest exceeds the policy's max age.
+        """
+        max_age = self.sealing_policy.max_age
+        while not self._stop_sealing.wait(max(0.01, max_age / 4)):
+            with self._pending_lock:
+                expired = self.transactions and time.monotonic() - self._pending_since >= max_age
+            if expired:
+                try:
+                    self.seal_block()
+                except Exception as e:
+                    logger.error("Failed to seal expired transactions: %s", e)
+
+    def flush(self):
+        """
+        Seals any pending transactions and waits until every sealed batch is mined and persisted.
+
+        Raises:
+            MiningFailedError: If a batch failed to be mined or persisted.
+        """
+        self.seal_block()
+        if self.pipeline:
+            self.pipeline.join()
+            if self.wal:
+                with self._mining_lock, self._pending_lock:
+                    if self.pipeline.idle():
+                        self._compact_wal()
+
+    def pipeline_stats(self):
+        """
+        Returns the pipelined mode metrics: queue depths, block counts and stage times.
+
+        Returns:
+            dict: The pipeline metrics, or an empty dict when not in pipelined mode.
+        """
+        return self.pipeline.stats() if self.pipeline else {}
+
+    def mine_block(self, transactions=None):
         """
         Mines a new block with the current transactions. Resets the transactions list after mining.
 
+        The index is allocated from the in-memory tip without a database round-trip. Allocation,
+        mining and the insert happen under the mining lock, so concurrent callers never receive
+        the same index, and a conflict with another process is resolved by the commit step.
+
+        Args:
+            transactions (list): A batch to mine instead of the pending transactions, which are
+                then left untouched.
+
         Returns:
             Block: The newly mined block, now part of the blockchain.
 
         Raises:
-            MiningFailedError: If the mining process fails.
+            MiningFailedError: If the mining process fails. Pending transactions are kept.
         """
-        try:
-            # Get the maximum index from the database
-            with psycopg2.connect(self.db_url) as conn:
-                c = conn.cursor()
-                c.execute('SELECT MAX("index") FROM blocks')
-                max_index = c.fetchone()[0]
-                if max_index is None:
-                    max_index = 0
-                logger.info(f"Max index from database: {max_index}")
-
-            new_index = max_index + 1  # Ensure the new block receives a unique index
-            logger.info(f"New block index: {new_index}")
-            new_block = Block(new_index, time.time(), self.transactions, self.get_latest_block().hash if self.chain else "0")
-            self.add_block(new_block)  # Add the newly mined block to the chain
-            self.transactions = []  # Reset transactions
-            return new_block
-
-        except Exception as e:
-            logger.error(f"Error in mine_block: {str(e)}")
-            raise MiningFailedError(f"Failed to mine block: {str(e)}")
+        with self._mining_lock:
+            if transactions is None:
+                with self._pending_lock:
+                    batch, _ = self._take_pending()
+            else:
+                batch = transactions
+            try:
+                # The in-memory tip is authoritative; a conflicting commit by another writer is
+                # detected by the primary key on insert and resolved by rebasing
+                tip = self.get_latest_block()
+                new_block = Block(tip.index + 1, time.time(), batch, tip.hash)
+                self.add_block(new_block)  # Add the newly mined block to the chain
+                return new_block
+
+            except Exception as e:
+                if transactions is None:
+                    self._restore_pending(batch)
+                logger.error("Error in mine_block: %s", e)
+                raise MiningFailedError(f"Failed to mine block: {str(e)}")
 
     def get_chain(self):
         """
@@ -196,4 +761,76 @@ class Blockchain:
         Returns:
             list: The list of blocks that comprise the blockchain.
         """
-        return load_blocks(self.db_url)
+        return list(self.iter_chain())
+
+    def iter_chain(self, start_index=None, end_index=None, start_time=None, end_time=None):
+        """
+        Streams blocks from the database in index order with bounded memory use.
+        All bounds are inclusive and optional.
+
+        Args:
+            start_index (int): The lowest block index to return.
+            end_index (int): The highest block index to return.
+            start_time (float): The earliest block timestamp to return.
+            end_time (float): The latest block timestamp to return.
+
+        Returns:
+            generator: The blocks in the requested range.
+        """
+        return self.storage.iter_blocks(start_index=start_index, end_index=end_index, start_time=start_time, end_time=end_time)
+
+    def find_transactions(self, device=None, since=None, until=None, tx_hash=None):
+        """
+        Finds stored transactions by device, reading time and hash through the storage's
+        transactions index, without loading the blocks. All filters are optional and combined;
+        the time bounds are inclusive.
+
+        Args:
+            device (str): Only transactions of this device.
+            since (float): The earliest reading timestamp to return.
+            until (float): The latest reading timestamp to return.
+            tx_hash (str): Only the transaction with this hash (its Merkle leaf digest).
+
+        Returns:
+            list: One dict per transaction with its 'block_index', 'position', 'device',
+            'timestamp' and 'tx_hash', in block order.
+        """
+        return self.storage.find_transactions(device=device, since=since, until=until, tx_hash=tx_hash)
+
+    def get_block_by_hash(self, block_hash):
+        """
+        Loads a stored block by its hash.
+
+        Args:
+            block_hash (str): The hash of the block.
+
+        Returns:
+            Block: The block, or None if no stored block has this hash.
+        """
+        return self.storage.get_block_by_hash(block_hash)
+
+    def close(self):
+        """
+        Releases the resources held by the blockchain: the sealing timer, the metrics server, the mining pipeline,
+        which is drained first, the mining worker processes, the write-ahead log and the
+        storage backend, unless it was passed in by the caller.
+        """
+        self._stop_sealing.set()
+        if self._sealing_timer:
+            self._sealing_timer.join()
+        if self._metrics_server:
+            self._metrics_server.close()
+        if self.pipeline:
+            self.pipeline.close()
+        if self.miner:
+            self.miner.close()
+        if self.wal:
+            self.wal.close()
+        if self._owns_storage:
+            self.storage.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,106 @@
+from collections import OrderedDict, deque
+from collections.abc import Sequence
+from liotbchain.utils import logger
+
+
+class LazyChain(Sequence):
+    """
+    Storage-backed sequence of blocks that keeps only the tip of the chain in memory.
+
+    The last ``window`` blocks stay resident. Older blocks are fetched from the storage backend on
+    demand and kept in an LRU cache of ``cache_size`` entries, so ``chain[i]``, ``chain[-1]``,
+    slices, ``len(chain)`` and iteration behave like they do on the list of blocks, without
+    loading the whole ledger. Blocks are assumed to be stored contiguously from index 0, so a
+    block's position in the sequence is its index.
+
+    Attributes:
+        storage (StorageBackend): Where the blocks are stored.
+        window (int): The number of most recent blocks kept in memory.
+        cache_size (int): The maximum number of older blocks kept in the LRU cache.
+    """
+
+    def __init__(self, storage, window=1, cache_size=1024):
+        self.storage = storage
+        self.window = max(1, window)
+        self.cache_size = cache_size
+        self._tail = deque(maxlen=self.window)
+        self._cache = OrderedDict()
+        self._length = 0
+
+    def load(self):
+        """
+        Loads the chain length and the tail window from storage.
+        """
+        max_index = self.storage.get_max_index()
+        self._tail.clear()
+        self._cache.clear()
+        self._length = 0 if max_index is None else max_index + 1
+        if self._length:
+            self._tail.extend(self.storage.iter_blocks(start_index=max(0, self._length - self.window)))
+        logger.info("Lazy chain loaded with %s blocks, %s resident.", self._length, len(self._tail))
+
+    def append(self, block):
+        """
+        Appends a newly added block, evicting the oldest block of the window into the LRU cache.
+
+        Args:
+            block (Block): The block to append; its index must equal the current length.
+        """
+        if len(self._tail) == self.window:
+            self._remember(self._tail[0])
+        self._tail.append(block)
+        self._length = block.index + 1
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(self._length)
+            if step == 1 and stop > start:
+                return self._fetch_range(start, stop)
+            return [self[i] for i in range(start, stop, step)]
+        index = item + self._length if item < 0 else item
+        if not 0 <= index < self._length:
+            raise IndexError("chain index out of range")
+        tail_start = self._length - len(self._tail)
+        if index >= tail_start:
+            return self._tail[index - tail_start]
+        block = self._cache.get(index)
+        if block is not None:
+            self._cache.move_to_end(index)
+            return block
+        return self._fetch_range(index, index + 1)[0]
+
+    def __iter__(self):
+        tail_start = self._length - len(self._tail)
+        if tail_start > 0:
+            # Stream the older part of the chain rather than fetching it block by block
+            yield from self.storage.iter_blocks(end_index=tail_start - 1)
+        yield from list(self._tail)
+
+    def _fetch_range(self, start, stop):
+        tail_start = self._length - len(self._tail)
+        blocks = []
+        missing_from = None
+        for index in range(start, min(stop, tail_start)):
+            block = self._cache.get(index)
+            if block is None:
+                missing_from = index
+                break
+            blocks.append(block)
+        if missing_from is not None:
+            for block in self.storage.iter_blocks(start_index=missing_from, end_index=min(stop, tail_start) - 1):
+                self._remember(block)
+                blocks.append(block)
+        if stop > tail_start:
+            blocks.extend(list(self._tail)[max(start, tail_start) - tail_start:stop - tail_start])
+        return blocks
+
+    def _remember(self, block):
+        if self.cache_size <= 0:
+            return
+        self._cache[block.index] = block
+        self._cache.move_to_end(block.index)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
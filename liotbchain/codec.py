@@ -0,0 +1,71 @@
+import json
+
+try:
+    import msgpack
+except ImportError:  # Optional: transactions are encoded as canonical JSON without it
+    msgpack = None
+
+JSON_CODEC = 'json'
+MSGPACK_CODEC = 'msgpack'
+CODECS = (JSON_CODEC, MSGPACK_CODEC)
+
+
+def check_codec(codec):
+    """
+    Checks that a transaction codec is known and its package is installed.
+
+    Args:
+        codec (str): The codec name, 'json' or 'msgpack'.
+
+    Raises:
+        ValueError: If the codec is unknown.
+        ImportError: If the codec is 'msgpack' and the msgpack package is not installed.
+    """
+    if codec not in CODECS:
+        raise ValueError(f"codec must be one of {list(CODECS)}, got {codec!r}")
+    if codec == MSGPACK_CODEC and msgpack is None:
+        raise ImportError("The msgpack codec requires the msgpack package: pip install msgpack")
+
+
+def canonicalize(value):
+    """
+    Returns a copy of a JSON-like value with the keys of every mapping in sorted order, so
+    that its msgpack encoding is deterministic.
+    """
+    if isinstance(value, dict):
+        return {key: canonicalize(item) for key, item in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [canonicalize(item) for item in value]
+    return value
+
+
+def encode(value, codec):
+    """
+    Encodes a transaction, or any JSON-like value, canonically.
+
+    Args:
+        value: The value to encode.
+        codec (str): The codec name, 'json' or 'msgpack'.
+
+    Returns:
+        bytes: The key-sorted JSON text, or the msgpack encoding of the key-sorted value.
+    """
+    if codec == MSGPACK_CODEC:
+        return msgpack.packb(canonicalize(value), use_bin_type=True)
+    return json.dumps(value, sort_keys=True).encode()
+
+
+def decode(payload, codec):
+    """
+    Decodes a value encoded by ``encode``.
+
+    Args:
+        payload (bytes): The encoded value.
+        codec (str): The codec name, 'json' or 'msgpack'.
+
+    Returns:
+        The decoded value.
+    """
+    if codec == MSGPACK_CODEC:
+        return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+    return json.loads(payload)
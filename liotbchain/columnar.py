@@ -0,0 +1,296 @@
+import math
+import threading
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # Optional: queries fall back to plain Python loops over the columns
+    np = None
+
+AGGREGATES = ('count', 'sum', 'mean', 'min', 'max')
+
+# Initial rows allocated per column; the capacity doubles as rows are added
+INITIAL_CAPACITY = 1024
+
+
+class ReadingIndex:
+    """
+    In-memory columnar index of the sensor readings stored in the chain.
+
+    Every transaction that is a mapping becomes one row, kept in typed arrays: the block index
+    and position of the transaction, the device (dictionary-encoded as an integer code), the
+    reading timestamp and one float column per indexed field. A field missing from a reading,
+    or holding a non-numeric value, is stored as NaN and ignored by aggregates; a reading
+    without a timestamp takes its block's. Other transactions, like the genesis block's data,
+    are skipped.
+
+    Queries filter and aggregate over the columns without decoding any block. With NumPy
+    installed they run vectorized over the arrays; otherwise they loop over them in Python.
+
+    The index is fed by Blockchain as blocks are persisted and is safe to query from other
+    threads. Blocks are indexed once: a block whose index is not above the last indexed one is
+    ignored. Columns only ever grow by reallocation, and rows are never changed once written, so
+    a query records the row count under the lock and then reads the filled rows in place,
+    without copying the columns or holding up ingest.
+
+    Attributes:
+        fields (tuple): The numeric transaction fields with a column in the index.
+        device_field (str): The transaction field naming the device.
+        time_field (str): The transaction field holding the reading timestamp.
+    """
+
+    def __init__(self, fields=('distance',), device_field='device', time_field='timestamp'):
+        self.fields = tuple(fields)
+        self.device_field = device_field
+        self.time_field = time_field
+        self._lock = threading.Lock()
+        self._rows = 0
+        self._block_index = _allocate('q', INITIAL_CAPACITY)
+        self._position = _allocate('I', INITIAL_CAPACITY)
+        self._device = _allocate('i', INITIAL_CAPACITY)
+        self._timestamp = _allocate('d', INITIAL_CAPACITY)
+        self._values = {field: _allocate('d', INITIAL_CAPACITY) for field in self.fields}
+        self._devices = []  # Device names by code
+        self._codes = {}  # Device codes by name
+        self._last_block = -1
+
+    def __len__(self):
+        return self._rows
+
+    def add_block(self, block):
+        """
+        Indexes the readings of a block. Usable directly as a Blockchain block listener.
+
+        Args:
+            block (Block): The persisted block.
+        """
+        if not isinstance(block.data, list):
+            return
+        with self._lock:
+            if block.index <= self._last_block:
+                return
+            self._last_block = block.index
+            for position, transaction in enumerate(block.data):
+                if not isinstance(transaction, dict):
+                    continue
+                device = transaction.get(self.device_field)
+                code = -1
+                if device is not None:
+                    key = str(device)
+                    code = self._codes.get(key)
+                    if code is None:
+                        code = self._codes[key] = len(self._devices)
+                        self._devices.append(key)
+                timestamp = _number(transaction.get(self.time_field))
+                row = self._rows
+                if row == len(self._block_index):
+                    self._grow()
+                self._block_index[row] = block.index
+                self._position[row] = position
+                self._device[row] = code
+                self._timestamp[row] = block.timestamp if math.isnan(timestamp) else timestamp
+                for field, column in self._values.items():
+                    column[row] = _number(transaction.get(field))
+                self._rows = row + 1
+
+    def _grow(self):
+        """
+        Doubles the capacity of every column. Each column is copied into a new array instead of
+        being resized in place, so queries still reading the old arrays are unaffected. The
+        caller must hold the lock.
+        """
+        self._block_index = _reallocate(self._block_index)
+        self._position = _reallocate(self._position)
+        self._device = _reallocate(self._device)
+        self._timestamp = _reallocate(self._timestamp)
+        self._values = {field: _reallocate(column) for field, column in self._values.items()}
+
+    def extend(self, blocks):
+        """
+        Indexes the readings of many blocks, in index order.
+
+        Args:
+            blocks (iterable): The blocks to index.
+        """
+        for block in blocks:
+            self.add_block(block)
+
+    def devices(self):
+        """
+        Returns:
+            list: The names of the devices seen so far, in order of first appearance.
+        """
+        with self._lock:
+            return list(self._devices)
+
+    def query(self, device=None, since=None, until=None, fields=None):
+        """
+        Selects the readings matching a device and an inclusive time range.
+
+        Args:
+            device (str): Only readings of this device; all devices if None.
+            since (float): The earliest reading timestamp to return.
+            until (float): The latest reading timestamp to return.
+            fields (list): The indexed fields to return. Defaults to all of them.
+
+        Returns:
+            dict: Columns keyed by 'block_index', 'position', 'device', 'timestamp' and each
+            requested field, as NumPy arrays, or lists without NumPy, in index order.
+        """
+        fields = self._check_fields(self.fields if fields is None else fields)
+        with self._lock:
+            code, columns = self._snapshot(device, fields)
+            devices = list(self._devices)
+        selected = self._select(code, since, until, columns)
+        codes = columns.pop('_device')
+        if np is not None:
+            result = {name: column[selected] for name, column in columns.items()}
+            result['device'] = np.array([devices[c] if c >= 0 else None for c in codes[selected]], dtype=object)
+        else:
+            result = {name: [column[i] for i in selected] for name, column in columns.items()}
+            result['device'] = [devices[codes[i]] if codes[i] >= 0 else None for i in selected]
+        return result
+
+    def aggregate(self, field, func='mean', device=None, since=None, until=None, by_device=False):
+        """
+        Aggregates an indexed field over the readings matching a device and a time range.
+        Readings where the field is missing are ignored.
+
+        Args:
+            field (str): The indexed field to aggregate.
+            func (str): One of 'count', 'sum', 'mean', 'min' or 'max'.
+            device (str): Only readings of this device; all devices if None.
+            since (float): The earliest reading timestamp to include.
+            until (float): The latest reading timestamp to include.
+            by_device (bool): Whether to aggregate each device separately.
+
+        Returns:
+            The aggregate as a float (an int for 'count'), None if no reading matched; or, with
+            ``by_device``, a dict of the aggregates keyed by device name.
+
+        Raises:
+            ValueError: If the field is not indexed or the aggregate is unknown.
+        """
+        if func not in AGGREGATES:
+            raise ValueError(f"func must be one of {list(AGGREGATES)}, got {func!r}")
+        self._check_fields([field])
+        with self._lock:
+            code, columns = self._snapshot(device, [field])
+            devices = list(self._devices)
+        selected = self._select(code, since, until, columns)
+        codes, values = columns['_device'], columns[field]
+        if np is not None:
+            codes, values = codes[selected], values[selected]
+            present = ~np.isnan(values)
+            codes, values = codes[present], values[present]
+            if not by_device:
+                return _aggregate(values, func)
+            # Sort by device code so each device's values form one contiguous run
+            order = np.argsort(codes, kind='stable')
+            codes, values = codes[order], values[order]
+            unique_codes, starts = np.unique(codes, return_index=True)
+            return {devices[c]: _aggregate(group, func)
+                    for c, group in zip(unique_codes, np.split(values, starts[1:])) if c >= 0}
+        groups = {}
+        for i in selected:
+            value = values[i]
+            if not math.isnan(value):
+                groups.setdefault(codes[i] if by_device else 0, []).append(value)
+        if not by_device:
+            return _aggregate(groups.get(0, []), func)
+        return {devices[c]: _aggregate(group, func) for c, group in groups.items() if c >= 0}
+
+    def _check_fields(self, fields):
+        unknown = [field for field in fields if field not in self._values]
+        if unknown:
+            raise ValueError(f"Fields {unknown} are not indexed; indexed fields are {list(self.fields)}")
+        return list(fields)
+
+    def _snapshot(self, device, fields):
+        """
+        Takes views of the filled rows of the columns needed by a query, so it can run without
+        holding the lock. The rows below the recorded count are never written again, and the
+        arrays are replaced rather than resized when they grow, so the views stay valid. The
+        caller must hold the lock.
+
+        Returns:
+            tuple: The device code to match (-2 for any device, None for an unknown device) and
+            the columns, as NumPy views or, without NumPy, memoryviews, the device codes under
+            '_device'.
+        """
+        if device is None:
+            code = -2
+        else:
+            code = self._codes.get(str(device))
+        names = {'block_index': self._block_index, 'position': self._position, 'timestamp': self._timestamp,
+                 '_device': self._device}
+        names.update((field, self._values[field]) for field in fields)
+        rows = self._rows
+        if np is not None:
+            return code, {name: np.frombuffer(column, dtype=column.typecode)[:rows] for name, column in names.items()}
+        return code, {name: memoryview(column)[:rows] for name, column in names.items()}
+
+    @staticmethod
+    def _select(code, since, until, columns):
+        """
+        Returns the rows matching a device code and a time range: a boolean mask with NumPy,
+        otherwise a list of row numbers.
+        """
+        codes, timestamps = columns['_device'], columns['timestamp']
+        if code is None:
+            return np.zeros(len(codes), dtype=bool) if np is not None else []
+        if np is not None:
+            mask = np.ones(len(codes), dtype=bool)
+            if code != -2:
+                mask &= codes == code
+            if since is not None:
+                mask &= timestamps >= since
+            if until is not None:
+                mask &= timestamps <= until
+            return mask
+        return [i for i in range(len(codes))
+                if (code == -2 or codes[i] == code)
+                and (since is None or timestamps[i] >= since)
+                and (until is None or timestamps[i] <= until)]
+
+
+def _allocate(typecode, capacity):
+    """
+    Returns a zero-filled typed array of ``capacity`` items.
+    """
+    column = array(typecode)
+    column.frombytes(bytes(column.itemsize * capacity))
+    return column
+
+
+def _reallocate(column):
+    """
+    Returns a copy of a typed array with twice its capacity.
+    """
+    grown = column[:]
+    grown.frombytes(bytes(column.itemsize * len(column)))
+    return grown
+
+
+def _number(value):
+    """
+    Returns a numeric transaction value as a float, or NaN for anything else.
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return math.nan
+
+
+def _aggregate(values, func):
+    count = len(values)
+    if func == 'count':
+        return int(count)
+    if not count:
+        return None
+    if np is not None and not isinstance(values, list):
+        return float({'sum': np.sum, 'mean': np.mean, 'min': np.min, 'max': np.max}[func](values))
+    if func == 'sum':
+        return math.fsum(values)
+    if func == 'mean':
+        return math.fsum(values) / count
+    return min(values) if func == 'min' else max(values)
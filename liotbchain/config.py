@@ -9,6 +9,44 @@ DEFAULT_DATABASE_URL = "default_db_url"
 DEFAULT_TRANSACTIONS_PER_BLOCK = 2
 DEFAULT_DIFFICULTY = 2
 DEFAULT_NONCE_LIMIT = 1000000
+DEFAULT_MINING_WORKERS = 1
+DEFAULT_DETERMINISTIC_MINING = False
+DEFAULT_POOL_MIN_SIZE = 1
+DEFAULT_POOL_MAX_SIZE = 5
+DEFAULT_POOL_HEALTH_CHECK_INTERVAL = 30
+DEFAULT_LOAD_BATCH_SIZE = 1000
+DEFAULT_LAZY_CHAIN = False
+DEFAULT_CHAIN_WINDOW = 16
+DEFAULT_CHAIN_CACHE_SIZE = 1024
+DEFAULT_VALIDATION_WORKERS = os.cpu_count() or 1
+DEFAULT_VALIDATION_CHUNK_SIZE = 1000
+DEFAULT_ASYNC_QUEUE_SIZE = 10000
+DEFAULT_PIPELINED_MINING = False
+DEFAULT_PIPELINE_DEPTH = 4
+DEFAULT_MAX_BLOCK_BYTES = 0
+DEFAULT_MAX_BLOCK_AGE = 0
+DEFAULT_ADAPTIVE_SEALING = False
+DEFAULT_MAX_TRANSACTIONS_PER_BLOCK = 1000
+DEFAULT_SEALING_TARGET_INTERVAL = 1.0
+DEFAULT_COMMIT_RETRIES = 5
+DEFAULT_WAL_PATH = ""
+DEFAULT_WAL_SYNC_INTERVAL = 0.0
+DEFAULT_STORAGE_BACKEND = "postgres"
+DEFAULT_STORAGE_PATH = "liotbchain.db"
+DEFAULT_BLOCK_CODEC = "json"
+DEFAULT_BINARY_BLOCKS = True
+DEFAULT_COLUMNAR_INDEX = False
+DEFAULT_COLUMNAR_FIELDS = "distance"
+DEFAULT_METRICS_ENABLED = False
+DEFAULT_METRICS_PORT = 0
+DEFAULT_LOG_LEVEL = "WARNING"
+DEFAULT_DIFFICULTY_RETARGET = False
+DEFAULT_TARGET_BLOCK_INTERVAL = 10.0
+DEFAULT_RETARGET_WINDOW = 16
+DEFAULT_RETARGET_MAX_STEP = 1
+DEFAULT_MIN_DIFFICULTY = 1
+DEFAULT_MAX_DIFFICULTY = 8
+DEFAULT_LOG_FILE = ""
 
 # Database URL for PostgreSQL database connection
 DATABASE_URL = os.getenv("DATABASE_URL", DEFAULT_DATABASE_URL)
@@ -17,7 +55,8 @@ DATABASE_URL = os.getenv("DATABASE_URL", DEFAULT_DATABASE_URL)
 # Default is 1 transaction per block
 TRANSACTIONS_PER_BLOCK = int(os.getenv("TRANSACTIONS_PER_BLOCK", DEFAULT_TRANSACTIONS_PER_BLOCK))
 
-# Mining difficulty: the number of leading zeros required in the block hash
+# Mining difficulty: the number of leading zeros required in the block hash, recorded in the genesis block of a new
+# chain; a stored chain keeps the difficulty it was started at
 # Default is 4
 # Warning: Setting a high value increases the time and computational resources needed for mining
 DIFFICULTY = int(os.getenv("DIFFICULTY", DEFAULT_DIFFICULTY))
@@ -26,3 +65,111 @@ DIFFICULTY = int(os.getenv("DIFFICULTY", DEFAULT_DIFFICULTY))
 # Default is 1000000
 # Warning: Setting a very high value can lead to long mining times and excessive computational resource usage
 NONCE_LIMIT = int(os.getenv("NONCE_LIMIT", DEFAULT_NONCE_LIMIT))
+
+# Number of worker processes used for proof-of-work
+# Default is 1 (mine in the calling process); set to the number of cores to mine in parallel
+MINING_WORKERS = int(os.getenv("MINING_WORKERS", DEFAULT_MINING_WORKERS))
+
+# Whether parallel mining must always return the lowest winning nonce (same result as serial mining)
+# Default is false: the first nonce found by any worker wins
+DETERMINISTIC_MINING = os.getenv("DETERMINISTIC_MINING", str(DEFAULT_DETERMINISTIC_MINING)).lower() in ("1", "true", "yes")
+
+# Database connection pool sizing: idle connections kept open, and the maximum open at once
+# Defaults are 1 and 5
+POOL_MIN_SIZE = int(os.getenv("POOL_MIN_SIZE", DEFAULT_POOL_MIN_SIZE))
+POOL_MAX_SIZE = int(os.getenv("POOL_MAX_SIZE", DEFAULT_POOL_MAX_SIZE))
+
+# Seconds a pooled connection may sit idle before it is pinged to check it is still alive
+# Default is 30
+POOL_HEALTH_CHECK_INTERVAL = float(os.getenv("POOL_HEALTH_CHECK_INTERVAL", DEFAULT_POOL_HEALTH_CHECK_INTERVAL))
+
+# Number of blocks fetched per database round-trip when streaming the chain
+# Default is 1000
+LOAD_BATCH_SIZE = int(os.getenv("LOAD_BATCH_SIZE", DEFAULT_LOAD_BATCH_SIZE))
+
+# Lazy chain mode: keep only the last CHAIN_WINDOW blocks in memory and fetch older blocks on demand,
+# caching up to CHAIN_CACHE_SIZE of them
+# Defaults are false, 16 and 1024
+LAZY_CHAIN = os.getenv("LAZY_CHAIN", str(DEFAULT_LAZY_CHAIN)).lower() in ("1", "true", "yes")
+CHAIN_WINDOW = int(os.getenv("CHAIN_WINDOW", DEFAULT_CHAIN_WINDOW))
+CHAIN_CACHE_SIZE = int(os.getenv("CHAIN_CACHE_SIZE", DEFAULT_CHAIN_CACHE_SIZE))
+
+# Worker processes and blocks per task used by Blockchain.verify_chain_parallel
+# Defaults are the number of CPUs and 1000
+VALIDATION_WORKERS = int(os.getenv("VALIDATION_WORKERS", DEFAULT_VALIDATION_WORKERS))
+VALIDATION_CHUNK_SIZE = int(os.getenv("VALIDATION_CHUNK_SIZE", DEFAULT_VALIDATION_CHUNK_SIZE))
+
+# Capacity of the AsyncBlockchain ingestion queue; producers wait when it is full
+# Default is 10000
+ASYNC_QUEUE_SIZE = int(os.getenv("ASYNC_QUEUE_SIZE", DEFAULT_ASYNC_QUEUE_SIZE))
+
+# Pipelined mode: mine sealed batches and persist mined blocks on background threads while new
+# transactions keep accumulating, with at most PIPELINE_DEPTH batches queued per stage
+# Defaults are false and 4
+PIPELINED_MINING = os.getenv("PIPELINED_MINING", str(DEFAULT_PIPELINED_MINING)).lower() in ("1", "true", "yes")
+PIPELINE_DEPTH = int(os.getenv("PIPELINE_DEPTH", DEFAULT_PIPELINE_DEPTH))
+
+# Seal the pending transactions once their serialized size reaches MAX_BLOCK_BYTES, or once the oldest
+# has waited MAX_BLOCK_AGE seconds (checked by a background timer), in addition to TRANSACTIONS_PER_BLOCK
+# Defaults are 0 (disabled) for both
+MAX_BLOCK_BYTES = int(os.getenv("MAX_BLOCK_BYTES", DEFAULT_MAX_BLOCK_BYTES))
+MAX_BLOCK_AGE = float(os.getenv("MAX_BLOCK_AGE", DEFAULT_MAX_BLOCK_AGE))
+
+# Adaptive sealing: start at TRANSACTIONS_PER_BLOCK and double the batch, up to MAX_TRANSACTIONS_PER_BLOCK,
+# while batches fill faster than SEALING_TARGET_INTERVAL seconds; halve it again when ingest slows down
+# Defaults are false, 1000 and 1.0
+ADAPTIVE_SEALING = os.getenv("ADAPTIVE_SEALING", str(DEFAULT_ADAPTIVE_SEALING)).lower() in ("1", "true", "yes")
+MAX_TRANSACTIONS_PER_BLOCK = int(os.getenv("MAX_TRANSACTIONS_PER_BLOCK", DEFAULT_MAX_TRANSACTIONS_PER_BLOCK))
+SEALING_TARGET_INTERVAL = float(os.getenv("SEALING_TARGET_INTERVAL", DEFAULT_SEALING_TARGET_INTERVAL))
+
+# Times a block is rebased onto blocks committed by another writer and retried before giving up
+# Default is 5
+COMMIT_RETRIES = int(os.getenv("COMMIT_RETRIES", DEFAULT_COMMIT_RETRIES))
+
+# Write-ahead log of accepted transactions, replayed on startup; empty disables it
+# WAL_SYNC_INTERVAL is the seconds between background fsyncs; 0 fsyncs (with group commit) before add_transaction returns
+# Defaults are "" and 0
+WAL_PATH = os.getenv("WAL_PATH", DEFAULT_WAL_PATH)
+WAL_SYNC_INTERVAL = float(os.getenv("WAL_SYNC_INTERVAL", DEFAULT_WAL_SYNC_INTERVAL))
+
+# Storage used when no db_url or storage is passed to Blockchain: "postgres" (DATABASE_URL), "sqlite"
+# (a database file at STORAGE_PATH) or "file" (an append-only segmented file store in the STORAGE_PATH directory)
+# Defaults are "postgres" and "liotbchain.db"
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", DEFAULT_STORAGE_BACKEND).lower()
+STORAGE_PATH = os.getenv("STORAGE_PATH", DEFAULT_STORAGE_PATH)
+
+# Encoding of the transactions in the binary block form: "json" (canonical JSON) or "msgpack" (needs the msgpack package)
+# BINARY_BLOCKS stores new blocks in the binary form rather than as JSON text; rows of either kind are always readable
+# Defaults are "json" and true
+BLOCK_CODEC = os.getenv("BLOCK_CODEC", DEFAULT_BLOCK_CODEC).lower()
+BINARY_BLOCKS = os.getenv("BINARY_BLOCKS", str(DEFAULT_BINARY_BLOCKS)).lower() in ("1", "true", "yes")
+
+# In-memory columnar index of the readings (see Blockchain.readings), built at startup and fed as blocks are persisted
+# COLUMNAR_FIELDS lists the numeric transaction fields it indexes, separated by commas
+# Defaults are false and "distance"
+COLUMNAR_INDEX = os.getenv("COLUMNAR_INDEX", str(DEFAULT_COLUMNAR_INDEX)).lower() in ("1", "true", "yes")
+COLUMNAR_FIELDS = tuple(field.strip() for field in os.getenv("COLUMNAR_FIELDS", DEFAULT_COLUMNAR_FIELDS).split(",") if field.strip())
+
+# Metrics of mining, storage, validation and ingest (see Blockchain.metrics); when disabled, updates are no-ops
+# METRICS_PORT serves them in the Prometheus text format over HTTP; 0 serves nothing
+# Defaults are false and 0
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", str(DEFAULT_METRICS_ENABLED)).lower() in ("1", "true", "yes")
+METRICS_PORT = int(os.getenv("METRICS_PORT", DEFAULT_METRICS_PORT))
+
+# Level of the "liotbchain" logger, and the file configure_logging() also writes to; empty writes to stderr only
+# The library only logs once the application configures logging, e.g. with liotbchain.utils.configure_logging()
+# Defaults are "WARNING" and ""
+LOG_LEVEL = os.getenv("LOG_LEVEL", DEFAULT_LOG_LEVEL).upper()
+LOG_FILE = os.getenv("LOG_FILE", DEFAULT_LOG_FILE)
+
+# Difficulty retargeting: every RETARGET_WINDOW blocks, the difficulty moves by up to RETARGET_MAX_STEP towards
+# blocks TARGET_BLOCK_INTERVAL seconds apart, within [MIN_DIFFICULTY, MAX_DIFFICULTY]; DIFFICULTY is the starting point
+# Blocks record the difficulty they were mined at, which must match the difficulty recomputed on validation from the
+# difficulties recorded before them
+# Defaults are false, 10 seconds, 16 blocks, 1, 1 and 8
+DIFFICULTY_RETARGET = os.getenv("DIFFICULTY_RETARGET", str(DEFAULT_DIFFICULTY_RETARGET)).lower() in ("1", "true", "yes")
+TARGET_BLOCK_INTERVAL = float(os.getenv("TARGET_BLOCK_INTERVAL", DEFAULT_TARGET_BLOCK_INTERVAL))
+RETARGET_WINDOW = int(os.getenv("RETARGET_WINDOW", DEFAULT_RETARGET_WINDOW))
+RETARGET_MAX_STEP = int(os.getenv("RETARGET_MAX_STEP", DEFAULT_RETARGET_MAX_STEP))
+MIN_DIFFICULTY = int(os.getenv("MIN_DIFFICULTY", DEFAULT_MIN_DIFFICULTY))
+MAX_DIFFICULTY = int(os.getenv("MAX_DIFFICULTY", DEFAULT_MAX_DIFFICULTY))
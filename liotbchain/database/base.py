@@ -0,0 +1,250 @@
+import json
+from abc import ABC, abstractmethod
+from ..block import Block, LEGACY_BLOCK_VERSION
+from ..merkle import hash_leaf
+from liotbchain.config import BINARY_BLOCKS
+
+# The stored fields of a block, in the column order of the blocks table
+BLOCK_COLUMNS = ('index', 'data', 'timestamp', 'previous_hash', 'nonce', 'hash', 'merkle_root', 'version', 'payload',
+                 'difficulty')
+
+# The fields of the transactions index, in the column order of the transactions table
+TRANSACTION_COLUMNS = ('block_index', 'position', 'device', 'timestamp', 'tx_hash')
+
+
+class StorageBackend(ABC):
+    """
+    Interface of the persistence layer used by Blockchain.
+
+    A backend stores blocks keyed by their index, which must be unique: saving a block whose
+    index is already stored raises BlockConflictError. It also stores the validation checkpoint.
+    Backends are used from several threads (mining pipeline, sealing timer, producers) and must
+    be thread-safe. They can be used as context managers, which call close() on exit.
+    """
+
+    @abstractmethod
+    def create(self):
+        """
+        Creates the storage schema if it doesn't exist yet, migrating earlier layouts.
+        """
+
+    @abstractmethod
+    def save_block(self, block):
+        """
+        Saves a single block.
+
+        Args:
+            block (Block): The block to be saved.
+
+        Raises:
+            BlockConflictError: If a block with the same index is already stored.
+        """
+
+    @abstractmethod
+    def save_blocks(self, blocks, on_conflict='skip'):
+        """
+        Saves many blocks in one batched transaction.
+
+        Args:
+            blocks (iterable): The blocks to be saved.
+            on_conflict (str): What to do with a block whose index is already stored: 'skip' it,
+                'update' the stored row, or raise an 'error' and roll back the whole batch.
+
+        Returns:
+            int: The number of blocks written.
+        """
+
+    @abstractmethod
+    def iter_blocks(self, start_index=None, end_index=None, start_time=None, end_time=None, batch_size=None):
+        """
+        Streams stored blocks in ascending order of their index with bounded memory use.
+        All bounds are inclusive and optional.
+
+        Args:
+            start_index (int): The lowest block index to return.
+            end_index (int): The highest block index to return.
+            start_time (float): The earliest block timestamp to return.
+            end_time (float): The latest block timestamp to return.
+            batch_size (int): The number of blocks read per round-trip.
+
+        Yields:
+            Block: The blocks in the requested range.
+        """
+
+    @abstractmethod
+    def get_max_index(self):
+        """
+        Returns:
+            int: The highest stored block index, or None if nothing is stored.
+        """
+
+    @abstractmethod
+    def load_checkpoint(self):
+        """
+        Returns:
+            tuple: The (index, hash) of the highest block verified so far, or None.
+        """
+
+    @abstractmethod
+    def save_checkpoint(self, index, block_hash):
+        """
+        Records the highest block verified so far.
+
+        Args:
+            index (int): The index of the verified block.
+            block_hash (str): The hash of the verified block.
+        """
+
+    def find_transactions(self, device=None, since=None, until=None, tx_hash=None):
+        """
+        Finds stored transactions by device, reading time and hash. All filters are optional
+        and combined; the time bounds are inclusive.
+
+        This implementation scans every stored block; backends that maintain a transactions
+        index answer from it instead.
+
+        Args:
+            device (str): Only transactions of this device.
+            since (float): The earliest reading timestamp to return.
+            until (float): The latest reading timestamp to return.
+            tx_hash (str): Only the transaction with this hash.
+
+        Returns:
+            list: One dict per transaction, keyed by TRANSACTION_COLUMNS, in block order.
+        """
+        matches = []
+        for block in self.iter_blocks():
+            for row in transaction_rows(block):
+                transaction = dict(zip(TRANSACTION_COLUMNS, row))
+                if device is not None and transaction['device'] != device:
+                    continue
+                if since is not None and transaction['timestamp'] < since:
+                    continue
+                if until is not None and transaction['timestamp'] > until:
+                    continue
+                if tx_hash is not None and transaction['tx_hash'] != tx_hash:
+                    continue
+                matches.append(transaction)
+        return matches
+
+    def get_block_by_hash(self, block_hash):
+        """
+        Loads a stored block by its hash. This implementation scans every stored block.
+
+        Args:
+            block_hash (str): The hash of the block.
+
+        Returns:
+            Block: The block, or None if no stored block has this hash.
+        """
+        for block in self.iter_blocks():
+            if block.hash == block_hash:
+                return block
+        return None
+
+    def reindex_transactions(self):
+        """
+        Rebuilds the transactions index from the stored blocks, for databases holding blocks
+        saved before the index existed. Backends without an index have nothing to do.
+
+        Returns:
+            int: The number of transactions indexed.
+        """
+        return 0
+
+    def close(self):
+        """
+        Releases the resources held by the backend.
+        """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def block_row(block, binary=None):
+    """
+    Returns the stored values of a block, in the order of BLOCK_COLUMNS.
+
+    In binary mode the whole block is stored in the ``payload`` column and ``data`` is left
+    empty; otherwise ``data`` holds the canonical JSON text and ``payload`` is empty. The other
+    columns are filled either way so they can be queried, including the difficulty the block
+    was mined at, which is empty when not recorded.
+
+    Args:
+        block (Block): The block to store.
+        binary (bool): Whether to store the binary form. Defaults to BINARY_BLOCKS.
+    """
+    if binary is None:
+        binary = BINARY_BLOCKS
+    if binary:
+        data, payload = None, block.to_bytes()
+    else:
+        data, payload = block.encoded_data(), None
+    return (
+        block.index,
+        data,
+        block.timestamp,
+        block.previous_hash,
+        block.nonce,
+        block.hash,
+        block.calculate_merkle_root(),
+        block.version,
+        payload,
+        block.difficulty
+    )
+
+
+def transaction_rows(block):
+    """
+    Returns the transactions index rows of a block, in the order of TRANSACTION_COLUMNS.
+
+    The device and timestamp are read from the transaction's ``device`` and ``timestamp``
+    fields; a transaction without a numeric timestamp takes its block's. The hash is the
+    transaction's Merkle leaf digest, so it can be checked against an inclusion proof. Blocks
+    whose data is not a list of transactions, like the genesis block, have no rows.
+    """
+    if not isinstance(block.data, list):
+        return []
+    rows = []
+    for position, (transaction, leaf) in enumerate(zip(block.data, block.leaves())):
+        device, timestamp = None, None
+        if isinstance(transaction, dict):
+            device, timestamp = transaction.get('device'), transaction.get('timestamp')
+        if not isinstance(timestamp, (int, float)) or isinstance(timestamp, bool):
+            timestamp = block.timestamp
+        rows.append((
+            block.index,
+            position,
+            None if device is None else str(device),
+            float(timestamp),
+            hash_leaf(leaf).hex()
+        ))
+    return rows
+
+
+def row_to_block(row):
+    """
+    Builds a Block from a mapping of stored values keyed by BLOCK_COLUMNS.
+    """
+    if row.get('payload') is not None:
+        return Block.from_bytes(row['payload'])
+    if row.get('merkle_root') is not None:
+        data, encoded_data = None, row['data']
+    else:
+        # Rows written before the Merkle root was stored may hold non-canonical JSON
+        data, encoded_data = json.loads(row['data']), None
+    return Block(
+        index=row['index'],
+        timestamp=row['timestamp'],
+        data=data,
+        previous_hash=row['previous_hash'],
+        nonce=row['nonce'],
+        hash=row['hash'],
+        merkle_root=row.get('merkle_root'),
+        encoded_data=encoded_data,
+        version=row.get('version') or LEGACY_BLOCK_VERSION,
+        difficulty=row.get('difficulty'),
+    )
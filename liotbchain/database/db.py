@@ -1,12 +1,36 @@
 # db.py
 import psycopg2
-from psycopg2.extras import RealDictCursor
-from ..block import Block
-import json
-from ..utils import DatabaseConnectionError, DatabaseConfigurationError
+from psycopg2.extras import RealDictCursor, execute_values
+from contextlib import contextmanager
+from .base import block_row as _block_row, row_to_block as _row_to_block, transaction_rows as _transaction_rows, \
+    TRANSACTION_COLUMNS
+from .pool import ConnectionPool
+import time
+from ..utils import DatabaseConnectionError, DatabaseConfigurationError, BlockConflictError
+from liotbchain.config import LOAD_BATCH_SIZE
 from liotbchain.utils import logger
 
 
+@contextmanager
+def _connection(db_url):
+    """
+    Yields a connection for a database URL or a ConnectionPool.
+
+    Pooled connections are checked out and returned to the pool; for a plain URL a connection is
+    opened and closed around the block. Either way, the transaction is committed on success.
+    """
+    if isinstance(db_url, ConnectionPool):
+        with db_url.connection() as conn:
+            yield conn
+        return
+    conn = psycopg2.connect(db_url)
+    try:
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
 def create_database(db_url):
     """
     Creates the PostgreSQL database table for storing blockchain blocks if it doesn't already exist.
@@ -18,9 +42,22 @@ def create_database(db_url):
         - "previous_hash" (TEXT): The hash of the previous block in the chain.
         - "nonce" (INTEGER): The nonce value used for the proof-of-work algorithm.
         - "hash" (TEXT): The hash of the current block.
+        - "merkle_root" (TEXT): The Merkle root hash of the block's transactions.
+        - "version" (INTEGER): The block format version; rows from earlier versions default to 1.
+        - "payload" (BYTEA): The whole block in its binary form (see Block.to_bytes); rows that
+          store it leave "data" empty, and rows from earlier versions leave it empty.
+        - "difficulty" (INTEGER): The number of leading zeros the block was mined to; empty for
+          blocks that did not record it, which are checked against the configured difficulty.
+
+    Tables created by earlier versions are migrated by adding any missing columns. A single-row
+    "validation_checkpoint" table records the highest block index verified so far and its hash.
+
+    A "transactions" side table indexes every transaction by its block index and position, with
+    its device, reading timestamp and hash, under B-tree indexes on (device, timestamp),
+    timestamp and hash; blocks are also indexed by hash.
 
     Args:
-        db_url (str): The URL for the PostgreSQL database.
+        db_url (str or ConnectionPool): The URL for the PostgreSQL database, or a pool of connections to it.
     
     Raises:
         DatabaseConfigurationError: If the database URL is missing.
@@ -29,61 +66,137 @@ def create_database(db_url):
     if not db_url:
         raise DatabaseConfigurationError("Database URL is missing. Please provide a valid DATABASE_URL.")
     try:
-        conn = psycopg2.connect(db_url)
-        c = conn.cursor()
-        c.execute('''CREATE TABLE IF NOT EXISTS blocks (
+        with _connection(db_url) as conn:
+            c = conn.cursor()
+            c.execute('''CREATE TABLE IF NOT EXISTS blocks (
             "index" SERIAL PRIMARY KEY,
             "data" TEXT,
             "timestamp" DOUBLE PRECISION,
             "previous_hash" TEXT,
             "nonce" INTEGER,
-            "hash" TEXT
+            "hash" TEXT,
+            "merkle_root" TEXT,
+            "version" INTEGER NOT NULL DEFAULT 1,
+            "payload" BYTEA,
+            "difficulty" INTEGER
+        )''')
+            c.execute('ALTER TABLE blocks ADD COLUMN IF NOT EXISTS "merkle_root" TEXT')
+            c.execute('ALTER TABLE blocks ADD COLUMN IF NOT EXISTS "version" INTEGER NOT NULL DEFAULT 1')
+            c.execute('ALTER TABLE blocks ADD COLUMN IF NOT EXISTS "payload" BYTEA')
+            c.execute('ALTER TABLE blocks ADD COLUMN IF NOT EXISTS "difficulty" INTEGER')
+            c.execute('CREATE INDEX IF NOT EXISTS blocks_hash ON blocks ("hash")')
+            c.execute('''CREATE TABLE IF NOT EXISTS transactions (
+            "block_index" INTEGER NOT NULL,
+            "position" INTEGER NOT NULL,
+            "device" TEXT,
+            "timestamp" DOUBLE PRECISION NOT NULL,
+            "tx_hash" TEXT NOT NULL,
+            PRIMARY KEY ("block_index", "position")
+        )''')
+            c.execute('CREATE INDEX IF NOT EXISTS transactions_device_timestamp ON transactions ("device", "timestamp")')
+            c.execute('CREATE INDEX IF NOT EXISTS transactions_timestamp ON transactions ("timestamp")')
+            c.execute('CREATE INDEX IF NOT EXISTS transactions_tx_hash ON transactions ("tx_hash")')
+            c.execute('''CREATE TABLE IF NOT EXISTS validation_checkpoint (
+            "id" INTEGER PRIMARY KEY CHECK ("id" = 1),
+            "block_index" INTEGER NOT NULL,
+            "block_hash" TEXT NOT NULL,
+            "verified_at" DOUBLE PRECISION NOT NULL
         )''')
-        conn.commit()
-        conn.close()
     except psycopg2.Error as e:
-        logger.error(f"Failed to connect to the database: {e}")
+        logger.error("Failed to connect to the database: %s", e)
         raise DatabaseConnectionError(f"Failed to connect to the database: {e}")
 
 
 def save_block(block, db_url):
     """
-    Saves a block to the PostgreSQL database.
+    Saves a block to the PostgreSQL database, and its transactions to the transactions index.
     
     Args:
-        block (Block): The block to be saved, containing index, data, timestamp, previous_hash, nonce, and hash attributes.
-        db_url (str): The URL for the PostgreSQL database.
+        block (Block): The block to be saved, containing index, data, timestamp, previous_hash, nonce, hash, merkle_root and version attributes.
+            It is stored in its binary form unless BINARY_BLOCKS is disabled.
+        db_url (str or ConnectionPool): The URL for the PostgreSQL database, or a pool of connections to it.
     
     Raises:
         DatabaseConfigurationError: If the database URL is missing.
+        BlockConflictError: If a block with the same index is already stored.
         DatabaseConnectionError: If there is an error saving the block to the database.
     """
     if not db_url:
         raise DatabaseConfigurationError("Database URL is missing. Please provide a valid DATABASE_URL.")
     try:
-        conn = psycopg2.connect(db_url)
-        c = conn.cursor()
-        c.execute('''INSERT INTO blocks ("index", "data", "timestamp", "previous_hash", "nonce", "hash") VALUES (%s, %s, %s, %s, %s, %s)''', (
-            block.index,
-            json.dumps(block.data),
-            block.timestamp,
-            block.previous_hash,
-            block.nonce,
-            block.hash
-        ))
-        conn.commit()
-        conn.close()
-        logger.info(f"Block saved with index: {block.index}")
+        with _connection(db_url) as conn:
+            c = conn.cursor()
+            c.execute('''INSERT INTO blocks ("index", "data", "timestamp", "previous_hash", "nonce", "hash", "merkle_root", "version", "payload", "difficulty") VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)''', _block_row(block))
+            _save_transactions(c, [block], 'error')
+        logger.info("Block saved with index: %s", block.index)
+    except psycopg2.errors.UniqueViolation as e:
+        logger.warning("Block index %s is already taken: %s", block.index, e)
+        raise BlockConflictError(f"Block index {block.index} is already taken: {e}")
     except psycopg2.Error as e:
-        logger.error(f"Error saving block with index {block.index}: {e}")
+        logger.error("Error saving block with index %s: %s", block.index, e)
         raise DatabaseConnectionError(f"Error saving block with index {block.index}: {e}")
 
+def save_blocks(blocks, db_url, on_conflict='skip', page_size=1000):
+    """
+    Saves many blocks to the PostgreSQL database in a single transaction.
+
+    Rows are sent in multi-row INSERT statements of ``page_size`` blocks each, so persisting a
+    long chain costs one connection, one commit and a handful of round-trips. The transactions
+    index rows of each page are written in one more statement.
+
+    Args:
+        blocks (iterable): The blocks to be saved.
+        db_url (str or ConnectionPool): The URL for the PostgreSQL database, or a pool of connections to it.
+        on_conflict (str): What to do with blocks whose index already exists: 'skip' keeps the
+            stored row, 'update' overwrites it and 'error' aborts the whole batch.
+        page_size (int): The number of blocks sent per INSERT statement.
+
+    Returns:
+        int: The number of rows inserted or updated.
+
+    Raises:
+        ValueError: If on_conflict is not one of 'skip', 'update' or 'error'.
+        DatabaseConfigurationError: If the database URL is missing.
+        DatabaseConnectionError: If there is an error saving the blocks to the database.
+    """
+    if on_conflict not in _CONFLICT_CLAUSES:
+        raise ValueError(f"on_conflict must be one of {sorted(_CONFLICT_CLAUSES)}, got {on_conflict!r}")
+    if not db_url:
+        raise DatabaseConfigurationError("Database URL is missing. Please provide a valid DATABASE_URL.")
+    query = '''INSERT INTO blocks ("index", "data", "timestamp", "previous_hash", "nonce", "hash", "merkle_root", "version", "payload", "difficulty") VALUES %s''' + _CONFLICT_CLAUSES[on_conflict]
+    saved = 0
+    try:
+        with _connection(db_url) as conn:
+            c = conn.cursor()
+            page = []
+            for block in blocks:
+                page.append(block)
+                if len(page) >= page_size:
+                    execute_values(c, query, [_block_row(b) for b in page], page_size=page_size)
+                    saved += c.rowcount
+                    _save_transactions(c, page, on_conflict)
+                    page = []
+            if page:
+                execute_values(c, query, [_block_row(b) for b in page], page_size=page_size)
+                saved += c.rowcount
+                _save_transactions(c, page, on_conflict)
+        logger.info("Saved %s blocks", saved)
+        return saved
+    except psycopg2.Error as e:
+        logger.error("Error saving blocks: %s", e)
+        raise DatabaseConnectionError(f"Error saving blocks: {e}")
+
+
 def load_blocks(db_url):
     """
     Loads all blocks from the PostgreSQL database in ascending order of their index.
+
+    Rows with a binary payload are decoded from it. Rows written with a Merkle root store their
+    transactions as canonical JSON, so those blocks keep the stored text and root and can be
+    hashed without decoding or re-encoding their transactions.
     
     Args:
-        db_url (str): The URL for the PostgreSQL database.
+        db_url (str or ConnectionPool): The URL for the PostgreSQL database, or a pool of connections to it.
     
     Returns:
         list: A list of Block objects loaded from the database.
@@ -95,22 +208,289 @@ def load_blocks(db_url):
     if not db_url:
         raise DatabaseConfigurationError("Database URL is missing. Please provide a valid DATABASE_URL.")
     try:
-        conn = psycopg2.connect(db_url, cursor_factory=RealDictCursor)
-        c = conn.cursor()
-        c.execute('SELECT * FROM blocks ORDER BY "index" ASC')
-        blocks = []
-        for row in c.fetchall():
-            block = Block(
-                index=row['index'],
-                timestamp=row['timestamp'],
-                data=json.loads(row['data']),
-                previous_hash=row['previous_hash'],
-                nonce=row['nonce'],
-                hash=row['hash'],
-            )
-            blocks.append(block)
-        conn.close()
+        with _connection(db_url) as conn:
+            c = conn.cursor(cursor_factory=RealDictCursor)
+            c.execute('SELECT * FROM blocks ORDER BY "index" ASC')
+            blocks = []
+            for row in c.fetchall():
+                blocks.append(_row_to_block(row))
         return blocks
     except psycopg2.Error as e:
-        logger.error(f"Error loading blocks: {e}")
+        logger.error("Error loading blocks: %s", e)
         raise DatabaseConnectionError(f"Error loading blocks: {e}")
+
+
+def iter_blocks(db_url, start_index=None, end_index=None, start_time=None, end_time=None, batch_size=None):
+    """
+    Streams blocks from the PostgreSQL database in ascending order of their index.
+
+    Rows are read through a server-side cursor that fetches ``batch_size`` rows per round-trip,
+    so memory use is bounded by the batch size rather than the size of the ledger. All bounds
+    are inclusive and may be combined. The connection is held until the generator is exhausted
+    or closed.
+
+    Args:
+        db_url (str or ConnectionPool): The URL for the PostgreSQL database, or a pool of connections to it.
+        start_index (int): The lowest block index to return.
+        end_index (int): The highest block index to return.
+        start_time (float): The earliest block timestamp to return.
+        end_time (float): The latest block timestamp to return.
+        batch_size (int): The number of rows fetched per round-trip. Defaults to LOAD_BATCH_SIZE.
+
+    Yields:
+        Block: The blocks in the requested range.
+
+    Raises:
+        DatabaseConfigurationError: If the database URL is missing.
+        DatabaseConnectionError: If there is an error loading the blocks from the database.
+    """
+    if not db_url:
+        raise DatabaseConfigurationError("Database URL is missing. Please provide a valid DATABASE_URL.")
+    conditions, params = [], []
+    for column, operator, value in (('"index"', '>=', start_index), ('"index"', '<=', end_index),
+                                    ('"timestamp"', '>=', start_time), ('"timestamp"', '<=', end_time)):
+        if value is not None:
+            conditions.append(f'{column} {operator} %s')
+            params.append(value)
+    query = 'SELECT * FROM blocks'
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+    query += ' ORDER BY "index" ASC'
+    try:
+        with _connection(db_url) as conn:
+            c = conn.cursor(name='liotbchain_iter_blocks', cursor_factory=RealDictCursor)
+            c.itersize = batch_size or LOAD_BATCH_SIZE
+            c.execute(query, params)
+            for row in c:
+                yield _row_to_block(row)
+            c.close()
+    except psycopg2.Error as e:
+        logger.error("Error loading blocks: %s", e)
+        raise DatabaseConnectionError(f"Error loading blocks: {e}")
+
+
+def find_transactions(db_url, device=None, since=None, until=None, tx_hash=None):
+    """
+    Finds transactions through the transactions index. All filters are optional and combined;
+    the time bounds are inclusive.
+
+    Args:
+        db_url (str or ConnectionPool): The URL for the PostgreSQL database, or a pool of connections to it.
+        device (str): Only transactions of this device.
+        since (float): The earliest reading timestamp to return.
+        until (float): The latest reading timestamp to return.
+        tx_hash (str): Only the transaction with this hash.
+
+    Returns:
+        list: One dict per transaction, keyed by TRANSACTION_COLUMNS, in block order.
+
+    Raises:
+        DatabaseConfigurationError: If the database URL is missing.
+        DatabaseConnectionError: If there is an error querying the database.
+    """
+    if not db_url:
+        raise DatabaseConfigurationError("Database URL is missing. Please provide a valid DATABASE_URL.")
+    conditions, params = [], []
+    for column, operator, value in (('"device"', '=', device), ('"timestamp"', '>=', since),
+                                    ('"timestamp"', '<=', until), ('"tx_hash"', '=', tx_hash)):
+        if value is not None:
+            conditions.append(f'{column} {operator} %s')
+            params.append(value)
+    query = 'SELECT ' + ', '.join(f'"{column}"' for column in TRANSACTION_COLUMNS) + ' FROM transactions'
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+    query += ' ORDER BY "block_index" ASC, "position" ASC'
+    try:
+        with _connection(db_url) as conn:
+            c = conn.cursor(cursor_factory=RealDictCursor)
+            c.execute(query, params)
+            return [dict(row) for row in c.fetchall()]
+    except psycopg2.Error as e:
+        logger.error("Error querying transactions: %s", e)
+        raise DatabaseConnectionError(f"Error querying transactions: {e}")
+
+
+def get_block_by_hash(db_url, block_hash):
+    """
+    Loads a block by its hash through the hash index.
+
+    Args:
+        db_url (str or ConnectionPool): The URL for the PostgreSQL database, or a pool of connections to it.
+        block_hash (str): The hash of the block.
+
+    Returns:
+        Block: The block, or None if no stored block has this hash.
+
+    Raises:
+        DatabaseConfigurationError: If the database URL is missing.
+        DatabaseConnectionError: If there is an error querying the database.
+    """
+    if not db_url:
+        raise DatabaseConfigurationError("Database URL is missing. Please provide a valid DATABASE_URL.")
+    try:
+        with _connection(db_url) as conn:
+            c = conn.cursor(cursor_factory=RealDictCursor)
+            c.execute('SELECT * FROM blocks WHERE "hash" = %s', (block_hash,))
+            row = c.fetchone()
+            return _row_to_block(row) if row else None
+    except psycopg2.Error as e:
+        logger.error("Error loading the block with hash %s: %s", block_hash, e)
+        raise DatabaseConnectionError(f"Error loading the block with hash {block_hash}: {e}")
+
+
+def reindex_transactions(db_url, batch_size=None):
+    """
+    Rebuilds the transactions index from the stored blocks in one transaction, for databases
+    holding blocks saved before the index existed.
+
+    Args:
+        db_url (str or ConnectionPool): The URL for the PostgreSQL database, or a pool of connections to it.
+        batch_size (int): The number of blocks read and indexed per round-trip. Defaults to LOAD_BATCH_SIZE.
+
+    Returns:
+        int: The number of transactions indexed.
+
+    Raises:
+        DatabaseConfigurationError: If the database URL is missing.
+        DatabaseConnectionError: If there is an error rebuilding the index.
+    """
+    if not db_url:
+        raise DatabaseConfigurationError("Database URL is missing. Please provide a valid DATABASE_URL.")
+    batch_size = batch_size or LOAD_BATCH_SIZE
+    indexed = 0
+    try:
+        with _connection(db_url) as conn:
+            writer = conn.cursor()
+            writer.execute('DELETE FROM transactions')
+            reader = conn.cursor(name='liotbchain_reindex', cursor_factory=RealDictCursor)
+            reader.itersize = batch_size
+            reader.execute('SELECT * FROM blocks ORDER BY "index" ASC')
+            page = []
+            for row in reader:
+                page.append(_row_to_block(row))
+                if len(page) >= batch_size:
+                    indexed += _save_transactions(writer, page, 'error')
+                    page = []
+            indexed += _save_transactions(writer, page, 'error')
+            reader.close()
+        logger.info("Indexed %s transactions", indexed)
+        return indexed
+    except psycopg2.Error as e:
+        logger.error("Error rebuilding the transactions index: %s", e)
+        raise DatabaseConnectionError(f"Error rebuilding the transactions index: {e}")
+
+
+def _save_transactions(c, blocks, on_conflict):
+    """
+    Writes the transactions index rows of some blocks in a single statement, handling rows
+    already indexed for the same blocks as the blocks themselves were handled.
+
+    Returns:
+        int: The number of rows sent.
+    """
+    if on_conflict == 'update':
+        c.execute('DELETE FROM transactions WHERE "block_index" = ANY(%s)', ([block.index for block in blocks],))
+    rows = [row for block in blocks for row in _transaction_rows(block)]
+    if rows:
+        # One array parameter per column, unnested server-side into rows
+        c.execute(_INSERT_TRANSACTIONS + _TRANSACTION_CONFLICT_CLAUSES[on_conflict], [list(column) for column in zip(*rows)])
+    return len(rows)
+
+
+def get_max_index(db_url):
+    """
+    Retrieves the highest block index stored in the PostgreSQL database.
+
+    Args:
+        db_url (str or ConnectionPool): The URL for the PostgreSQL database, or a pool of connections to it.
+
+    Returns:
+        int: The highest stored index, or None if the table is empty.
+
+    Raises:
+        DatabaseConfigurationError: If the database URL is missing.
+        DatabaseConnectionError: If there is an error querying the database.
+    """
+    if not db_url:
+        raise DatabaseConfigurationError("Database URL is missing. Please provide a valid DATABASE_URL.")
+    try:
+        with _connection(db_url) as conn:
+            c = conn.cursor()
+            c.execute('SELECT MAX("index") FROM blocks')
+            return c.fetchone()[0]
+    except psycopg2.Error as e:
+        logger.error("Error querying the maximum block index: %s", e)
+        raise DatabaseConnectionError(f"Error querying the maximum block index: {e}")
+
+
+def load_checkpoint(db_url):
+    """
+    Loads the validation checkpoint from the PostgreSQL database.
+
+    Args:
+        db_url (str or ConnectionPool): The URL for the PostgreSQL database, or a pool of connections to it.
+
+    Returns:
+        tuple: The (index, hash) of the highest block verified so far, or None if there is none.
+
+    Raises:
+        DatabaseConfigurationError: If the database URL is missing.
+        DatabaseConnectionError: If there is an error querying the database.
+    """
+    if not db_url:
+        raise DatabaseConfigurationError("Database URL is missing. Please provide a valid DATABASE_URL.")
+    try:
+        with _connection(db_url) as conn:
+            c = conn.cursor()
+            c.execute('SELECT "block_index", "block_hash" FROM validation_checkpoint WHERE "id" = 1')
+            for block_index, block_hash in c.fetchall():
+                return block_index, block_hash
+            return None
+    except psycopg2.Error as e:
+        logger.error("Error loading the validation checkpoint: %s", e)
+        raise DatabaseConnectionError(f"Error loading the validation checkpoint: {e}")
+
+
+def save_checkpoint(db_url, index, block_hash):
+    """
+    Records the highest block verified so far in the PostgreSQL database.
+
+    Args:
+        db_url (str or ConnectionPool): The URL for the PostgreSQL database, or a pool of connections to it.
+        index (int): The index of the verified block.
+        block_hash (str): The hash of the verified block.
+
+    Raises:
+        DatabaseConfigurationError: If the database URL is missing.
+        DatabaseConnectionError: If there is an error saving the checkpoint.
+    """
+    if not db_url:
+        raise DatabaseConfigurationError("Database URL is missing. Please provide a valid DATABASE_URL.")
+    try:
+        with _connection(db_url) as conn:
+            c = conn.cursor()
+            c.execute('''INSERT INTO validation_checkpoint ("id", "block_index", "block_hash", "verified_at") VALUES (1, %s, %s, %s)
+                ON CONFLICT ("id") DO UPDATE SET "block_index" = EXCLUDED."block_index", "block_hash" = EXCLUDED."block_hash",
+                "verified_at" = EXCLUDED."verified_at"''', (index, block_hash, time.time()))
+    except psycopg2.Error as e:
+        logger.error("Error saving the validation checkpoint: %s", e)
+        raise DatabaseConnectionError(f"Error saving the validation checkpoint: {e}")
+
+
+_CONFLICT_CLAUSES = {
+    'skip': ' ON CONFLICT ("index") DO NOTHING',
+    'update': ''' ON CONFLICT ("index") DO UPDATE SET "data" = EXCLUDED."data", "timestamp" = EXCLUDED."timestamp",
+        "previous_hash" = EXCLUDED."previous_hash", "nonce" = EXCLUDED."nonce", "hash" = EXCLUDED."hash",
+        "merkle_root" = EXCLUDED."merkle_root", "version" = EXCLUDED."version", "payload" = EXCLUDED."payload",
+        "difficulty" = EXCLUDED."difficulty"''',
+    'error': '',
+}
+
+_INSERT_TRANSACTIONS = '''INSERT INTO transactions ("block_index", "position", "device", "timestamp", "tx_hash")
+    SELECT * FROM unnest(%s::integer[], %s::integer[], %s::text[], %s::double precision[], %s::text[])'''
+
+_TRANSACTION_CONFLICT_CLAUSES = {
+    'skip': ' ON CONFLICT ("block_index", "position") DO NOTHING',
+    'update': '',  # The block's previous rows are deleted first
+    'error': '',
+}
@@ -0,0 +1,241 @@
+import json
+import os
+import struct
+import threading
+import time
+from .base import StorageBackend, BLOCK_COLUMNS, block_row, row_to_block
+from ..block import Block
+from ..utils import DatabaseConnectionError, DatabaseConfigurationError, BlockConflictError, BlockchainOperationError
+from liotbchain.config import BINARY_BLOCKS
+from liotbchain.utils import logger
+
+# One fixed-size index record per block: segment number, byte offset and length of the record
+_INDEX_RECORD = struct.Struct('<IQI')
+
+
+class FileStore(StorageBackend):
+    """
+    Append-only storage in segmented log files with a fixed-width index file.
+
+    Each block is appended to the current segment file as one record followed by a newline: its
+    binary form from Block.to_bytes(), or a JSON list of its columns with BINARY_BLOCKS disabled
+    (both kinds of record are readable). A new segment is started once the current one exceeds
+    ``segment_size`` bytes. The index file holds one
+    fixed-size record per block, at offset ``index * record size``, giving the block's segment,
+    offset and length, so any block is read with one seek and no scan. Blocks must be stored
+    contiguously from index 0; stored blocks are never rewritten.
+
+    A block is durable once its index record is written: the segment is written first, and on
+    startup any segment bytes beyond the last indexed block, and any torn index record, are
+    truncated away. With ``fsync`` set, both files are fsynced on every save.
+
+    The store has no transactions index: find_transactions() scans the stored blocks. Lookups
+    by block hash go through an in-memory map of hashes to indexes, built on first use.
+
+    The store is meant for a single writing process; threads within it are serialized by a lock.
+
+    Attributes:
+        directory (str): The directory holding the segments, the index and the checkpoint.
+        segment_size (int): The size in bytes after which a new segment is started.
+        fsync (bool): Whether every save is fsynced before it returns.
+    """
+
+    def __init__(self, directory, segment_size=64 * 1024 * 1024, fsync=True):
+        if not directory:
+            raise DatabaseConfigurationError("File store directory is missing.")
+        self.directory = directory
+        self.segment_size = segment_size
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._index_file = None
+        self._segment_file = None
+        self._hashes = None  # Block indexes by hash, built by the first get_block_by_hash()
+
+    def create(self):
+        with self._lock:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                self._index_file = open(os.path.join(self.directory, 'index'), 'a+b')
+                self._recover()
+            except OSError as e:
+                logger.error("Failed to open the file store %s: %s", self.directory, e)
+                raise DatabaseConnectionError(f"Failed to open the file store {self.directory}: {e}")
+
+    def save_block(self, block):
+        with self._lock:
+            if block.index < self._count:
+                raise BlockConflictError(f"Block index {block.index} is already taken")
+            self._append([block])
+        logger.info("Block saved with index: %s", block.index)
+
+    def save_blocks(self, blocks, on_conflict='skip'):
+        if on_conflict not in ('skip', 'error'):
+            raise ValueError(f"on_conflict must be 'skip' or 'error' for the append-only file store, got {on_conflict!r}")
+        with self._lock:
+            new_blocks = []
+            for block in blocks:
+                if block.index < self._count:
+                    if on_conflict == 'error':
+                        raise BlockConflictError(f"Block index {block.index} is already taken")
+                    continue
+                new_blocks.append(block)
+            self._append(new_blocks)
+        logger.info("Saved %s blocks", len(new_blocks))
+        return len(new_blocks)
+
+    def iter_blocks(self, start_index=None, end_index=None, start_time=None, end_time=None, batch_size=None):
+        with self._lock:
+            count = self._count
+        index = max(0, start_index or 0)
+        stop = count if end_index is None else min(count, end_index + 1)
+        handles = {}
+        try:
+            while index < stop:
+                with self._lock:
+                    segment, offset, length = self._locate(index)
+                if segment not in handles:
+                    handles[segment] = open(self._segment_path(segment), 'rb')
+                handle = handles[segment]
+                handle.seek(offset)
+                block = _decode_record(handle.read(length))
+                index += 1
+                if start_time is not None and block.timestamp < start_time:
+                    continue
+                if end_time is not None and block.timestamp > end_time:
+                    continue
+                yield block
+        except OSError as e:
+            logger.error("Error loading blocks: %s", e)
+            raise DatabaseConnectionError(f"Error loading blocks: {e}")
+        finally:
+            for handle in handles.values():
+                handle.close()
+
+    def get_max_index(self):
+        with self._lock:
+            return self._count - 1 if self._count else None
+
+    def get_block_by_hash(self, block_hash):
+        with self._lock:
+            hashes, count = self._hashes, self._count
+        if hashes is None:
+            hashes = {block.hash: block.index for block in self.iter_blocks(end_index=count - 1)}
+            with self._lock:
+                # Index the blocks appended during the scan; later ones are added by _append
+                for index in range(count, self._count):
+                    segment, offset, length = self._locate(index)
+                    with open(self._segment_path(segment), 'rb') as f:
+                        f.seek(offset)
+                        hashes[_decode_record(f.read(length)).hash] = index
+                self._hashes = hashes
+        index = hashes.get(block_hash)
+        if index is None:
+            return None
+        return next(self.iter_blocks(start_index=index, end_index=index), None)
+
+    def load_checkpoint(self):
+        try:
+            with open(os.path.join(self.directory, 'checkpoint'), 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except FileNotFoundError:
+            return None
+        return checkpoint['block_index'], checkpoint['block_hash']
+
+    def save_checkpoint(self, index, block_hash):
+        path = os.path.join(self.directory, 'checkpoint')
+        with self._lock:
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump({'block_index': index, 'block_hash': block_hash, 'verified_at': time.time()}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + '.tmp', path)
+
+    def close(self):
+        with self._lock:
+            for f in (self._segment_file, self._index_file):
+                if f is not None:
+                    f.close()
+
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, f'segment-{segment:06d}.log')
+
+    def _locate(self, index):
+        self._index_file.seek(index * _INDEX_RECORD.size)
+        return _INDEX_RECORD.unpack(self._index_file.read(_INDEX_RECORD.size))
+
+    def _recover(self):
+        """
+        Drops a torn index record and any segment bytes written after the last indexed block.
+        """
+        self._index_file.seek(0, os.SEEK_END)
+        size = self._index_file.tell()
+        self._count = size // _INDEX_RECORD.size
+        if size % _INDEX_RECORD.size:
+            self._index_file.truncate(self._count * _INDEX_RECORD.size)
+        if self._count:
+            self._segment, offset, length = self._locate(self._count - 1)
+            end = offset + length + 1  # Include the newline
+        else:
+            self._segment, end = 0, 0
+        self._segment_file = open(self._segment_path(self._segment), 'a+b')
+        self._segment_file.seek(0, os.SEEK_END)
+        if self._segment_file.tell() > end:
+            logger.warning("Truncating %s unindexed bytes from segment %s",
+                           self._segment_file.tell() - end, self._segment)
+            self._segment_file.truncate(end)
+
+    def _append(self, blocks):
+        """
+        Appends blocks to the segments and the index. The caller must hold the lock.
+        """
+        for position, block in enumerate(blocks):
+            if block.index != self._count + position:
+                raise BlockchainOperationError(
+                    f"Block index {block.index} is not the next index {self._count + position} of the file store")
+        if not blocks:
+            return
+        try:
+            index_records = []
+            for block in blocks:
+                self._segment_file.seek(0, os.SEEK_END)
+                offset = self._segment_file.tell()
+                if offset >= self.segment_size:
+                    self._roll_segment()
+                    offset = 0
+                if BINARY_BLOCKS:
+                    record = block.to_bytes()
+                else:
+                    record = json.dumps(block_row(block, binary=False)).encode('utf-8')
+                self._segment_file.write(record + b'\n')
+                index_records.append(_INDEX_RECORD.pack(self._segment, offset, len(record)))
+            self._segment_file.flush()
+            if self.fsync:
+                os.fsync(self._segment_file.fileno())
+            self._index_file.seek(0, os.SEEK_END)
+            self._index_file.write(b''.join(index_records))
+            self._index_file.flush()
+            if self.fsync:
+                os.fsync(self._index_file.fileno())
+            self._count += len(index_records)
+            if self._hashes is not None:
+                self._hashes.update((block.hash, block.index) for block in blocks)
+        except OSError as e:
+            logger.error("Error appending to the file store: %s", e)
+            raise DatabaseConnectionError(f"Error appending to the file store: {e}")
+
+    def _roll_segment(self):
+        self._segment_file.flush()
+        if self.fsync:
+            os.fsync(self._segment_file.fileno())
+        self._segment_file.close()
+        self._segment += 1
+        self._segment_file = open(self._segment_path(self._segment), 'a+b')
+
+
+def _decode_record(record):
+    """
+    Decodes a segment record, written either in the binary block form or as a JSON row.
+    """
+    if record[:1] == b'[':
+        return row_to_block(dict(zip(BLOCK_COLUMNS, json.loads(record))))
+    return Block.from_bytes(record)
@@ -0,0 +1,127 @@
+# pool.py
+import threading
+import time
+from contextlib import contextmanager
+import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
+from ..utils import DatabaseConnectionError, DatabaseConfigurationError
+from liotbchain.utils import logger
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of PostgreSQL connections shared by the database functions.
+
+    Up to ``min_size`` idle connections are kept open between calls, and at most ``max_size``
+    connections are checked out at once; further callers wait for a connection to be returned.
+    Connections that have been idle for longer than ``health_check_interval`` seconds are
+    pinged before being handed out, and replaced if the server has dropped them.
+
+    Attributes:
+        db_url (str): The URL for the PostgreSQL database.
+        min_size (int): The number of idle connections kept open.
+        max_size (int): The maximum number of connections open at once.
+        health_check_interval (float): The idle time in seconds after which a connection is pinged.
+    """
+
+    def __init__(self, db_url, min_size=1, max_size=5, health_check_interval=30):
+        if not db_url:
+            raise DatabaseConfigurationError("Database URL is missing. Please provide a valid DATABASE_URL.")
+        self.db_url = db_url
+        self.min_size = min_size
+        self.max_size = max_size
+        self.health_check_interval = health_check_interval
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._last_used = {}
+        try:
+            self._pool = ThreadedConnectionPool(min_size, max_size, db_url)
+        except psycopg2.Error as e:
+            logger.error("Failed to connect to the database: %s", e)
+            raise DatabaseConnectionError(f"Failed to connect to the database: {e}")
+
+    @property
+    def closed(self):
+        """
+        bool: Whether the pool has been closed.
+        """
+        return self._pool.closed
+
+    def _is_healthy(self, conn):
+        last_used = self._last_used.get(id(conn))
+        if last_used is None or time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            c = conn.cursor()
+            c.execute('SELECT 1')
+            c.close()
+            conn.rollback()
+            return True
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            logger.warning("Discarding broken pooled connection: %s", e)
+            return False
+
+    def _getconn(self):
+        # One retry per pool slot is enough to flush every stale idle connection
+        for _ in range(self.max_size + 1):
+            conn = self._pool.getconn()
+            if self._is_healthy(conn):
+                return conn
+            self._last_used.pop(id(conn), None)
+            self._pool.putconn(conn, close=True)
+        raise DatabaseConnectionError("Failed to obtain a healthy database connection from the pool")
+
+    @contextmanager
+    def connection(self):
+        """
+        Checks out a connection for the duration of a ``with`` block.
+
+        The transaction is committed when the block exits normally and rolled back if it raises.
+
+        Yields:
+            connection: A psycopg2 connection.
+
+        Raises:
+            DatabaseConnectionError: If the pool is closed or no healthy connection can be obtained.
+        """
+        if self.closed:
+            raise DatabaseConnectionError("The connection pool is closed")
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._getconn()
+            except psycopg2.Error as e:
+                logger.error("Failed to connect to the database: %s", e)
+                raise DatabaseConnectionError(f"Failed to connect to the database: {e}")
+            broken = False
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    broken = True
+                raise
+            finally:
+                if broken:
+                    self._last_used.pop(id(conn), None)
+                else:
+                    self._last_used[id(conn)] = time.monotonic()
+                if not self.closed:
+                    self._pool.putconn(conn, close=broken)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """
+        Closes every connection in the pool. Further checkouts raise DatabaseConnectionError.
+        """
+        if not self.closed:
+            self._pool.closeall()
+            self._last_used.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,61 @@
+from .base import StorageBackend
+from .db import create_database, save_block, save_blocks, iter_blocks, get_max_index, load_checkpoint, save_checkpoint, \
+    find_transactions, get_block_by_hash, reindex_transactions
+from .pool import ConnectionPool
+
+
+class PostgresBackend(StorageBackend):
+    """
+    PostgreSQL storage through a pool of connections, with a transactions index table.
+
+    Several processes may write to the same database: the primary key on the block index
+    turns a concurrent commit of the same index into a BlockConflictError.
+
+    Attributes:
+        pool (ConnectionPool): The connection pool owned by this backend.
+    """
+
+    def __init__(self, db_url, min_size=1, max_size=5, health_check_interval=30):
+        """
+        Args:
+            db_url (str): The URL for the PostgreSQL database.
+            min_size (int): The number of idle connections kept open.
+            max_size (int): The maximum number of connections open at once.
+            health_check_interval (float): Seconds a connection may sit idle before it is pinged.
+        """
+        self.pool = ConnectionPool(db_url, min_size=min_size, max_size=max_size,
+                                   health_check_interval=health_check_interval)
+
+    def create(self):
+        create_database(self.pool)
+
+    def save_block(self, block):
+        save_block(block, self.pool)
+
+    def save_blocks(self, blocks, on_conflict='skip'):
+        return save_blocks(blocks, self.pool, on_conflict=on_conflict)
+
+    def iter_blocks(self, start_index=None, end_index=None, start_time=None, end_time=None, batch_size=None):
+        return iter_blocks(self.pool, start_index=start_index, end_index=end_index, start_time=start_time,
+                           end_time=end_time, batch_size=batch_size)
+
+    def get_max_index(self):
+        return get_max_index(self.pool)
+
+    def load_checkpoint(self):
+        return load_checkpoint(self.pool)
+
+    def save_checkpoint(self, index, block_hash):
+        save_checkpoint(self.pool, index, block_hash)
+
+    def find_transactions(self, device=None, since=None, until=None, tx_hash=None):
+        return find_transactions(self.pool, device=device, since=since, until=until, tx_hash=tx_hash)
+
+    def get_block_by_hash(self, block_hash):
+        return get_block_by_hash(self.pool, block_hash)
+
+    def reindex_transactions(self):
+        return reindex_transactions(self.pool)
+
+    def close(self):
+        self.pool.close()
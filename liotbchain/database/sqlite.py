@@ -0,0 +1,226 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from .base import StorageBackend, BLOCK_COLUMNS, TRANSACTION_COLUMNS, block_row, row_to_block, transaction_rows
+from ..utils import DatabaseConnectionError, DatabaseConfigurationError, BlockConflictError
+from liotbchain.config import LOAD_BATCH_SIZE
+from liotbchain.utils import logger
+
+_INSERT_BLOCK = 'INSERT INTO blocks ("index", "data", "timestamp", "previous_hash", "nonce", "hash", "merkle_root", "version", "payload", "difficulty") VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'
+
+_INSERT_TRANSACTION = 'INSERT INTO transactions ("block_index", "position", "device", "timestamp", "tx_hash") VALUES (?, ?, ?, ?, ?)'
+
+_CONFLICT_VERBS = {
+    'skip': 'INSERT OR IGNORE',
+    'update': 'INSERT OR REPLACE',
+    'error': 'INSERT',
+}
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Embedded storage in a local SQLite database file, for gateways without a database server.
+
+    The database runs in WAL journal mode with ``synchronous=NORMAL``, so a commit appends to the
+    journal without waiting for a checkpoint, and readers never block the writer. Statements use
+    fixed SQL with ``?`` parameters, so sqlite3 compiles each one once and reuses it from its
+    statement cache. Batches of blocks are written with ``executemany`` in a single transaction.
+
+    Every transaction is also indexed in a ``transactions`` table by block index and position,
+    with its device, reading timestamp and hash, under B-tree indexes for lookups by device and
+    time range and by hash; blocks are indexed by hash as well.
+
+    One connection is shared by all threads and serialized by a lock. Several processes may
+    write to the same file: the primary key on the block index turns a concurrent commit of
+    the same index into a BlockConflictError.
+
+    Attributes:
+        path (str): The location of the database file, or ``:memory:``.
+    """
+
+    def __init__(self, path, timeout=30.0):
+        """
+        Args:
+            path (str): The location of the database file, or ``:memory:``.
+            timeout (float): Seconds to wait for another process's write lock.
+        """
+        if not path:
+            raise DatabaseConfigurationError("SQLite database path is missing.")
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False, isolation_level=None,
+                                         cached_statements=256)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+        except sqlite3.Error as e:
+            logger.error("Failed to open the SQLite database %s: %s", path, e)
+            raise DatabaseConnectionError(f"Failed to open the SQLite database {path}: {e}")
+
+    def create(self):
+        with self._cursor(transaction=True) as c:
+            c.execute('''CREATE TABLE IF NOT EXISTS blocks (
+            "index" INTEGER PRIMARY KEY,
+            "data" TEXT,
+            "timestamp" REAL,
+            "previous_hash" TEXT,
+            "nonce" INTEGER,
+            "hash" TEXT,
+            "merkle_root" TEXT,
+            "version" INTEGER NOT NULL DEFAULT 1,
+            "payload" BLOB,
+            "difficulty" INTEGER
+        )''')
+            columns = {row[1] for row in c.execute('PRAGMA table_info(blocks)')}
+            if 'payload' not in columns:
+                c.execute('ALTER TABLE blocks ADD COLUMN "payload" BLOB')
+            if 'difficulty' not in columns:
+                c.execute('ALTER TABLE blocks ADD COLUMN "difficulty" INTEGER')
+            c.execute('CREATE INDEX IF NOT EXISTS blocks_timestamp ON blocks ("timestamp")')
+            c.execute('CREATE INDEX IF NOT EXISTS blocks_hash ON blocks ("hash")')
+            c.execute('''CREATE TABLE IF NOT EXISTS transactions (
+            "block_index" INTEGER NOT NULL,
+            "position" INTEGER NOT NULL,
+            "device" TEXT,
+            "timestamp" REAL NOT NULL,
+            "tx_hash" TEXT NOT NULL,
+            PRIMARY KEY ("block_index", "position")
+        )''')
+            c.execute('CREATE INDEX IF NOT EXISTS transactions_device_timestamp ON transactions ("device", "timestamp")')
+            c.execute('CREATE INDEX IF NOT EXISTS transactions_timestamp ON transactions ("timestamp")')
+            c.execute('CREATE INDEX IF NOT EXISTS transactions_tx_hash ON transactions ("tx_hash")')
+            c.execute('''CREATE TABLE IF NOT EXISTS validation_checkpoint (
+            "id" INTEGER PRIMARY KEY CHECK ("id" = 1),
+            "block_index" INTEGER NOT NULL,
+            "block_hash" TEXT NOT NULL,
+            "verified_at" REAL NOT NULL
+        )''')
+
+    def save_block(self, block):
+        with self._cursor(transaction=True) as c:
+            try:
+                c.execute(_INSERT_BLOCK, block_row(block))
+            except sqlite3.IntegrityError as e:
+                logger.warning("Block index %s is already taken: %s", block.index, e)
+                raise BlockConflictError(f"Block index {block.index} is already taken: {e}")
+            c.executemany(_INSERT_TRANSACTION, transaction_rows(block))
+        logger.info("Block saved with index: %s", block.index)
+
+    def save_blocks(self, blocks, on_conflict='skip'):
+        if on_conflict not in _CONFLICT_VERBS:
+            raise ValueError(f"on_conflict must be one of {sorted(_CONFLICT_VERBS)}, got {on_conflict!r}")
+        verb = _CONFLICT_VERBS[on_conflict]
+        blocks = list(blocks)
+        with self._cursor(transaction=True) as c:
+            before = self._conn.total_changes
+            try:
+                c.executemany(_INSERT_BLOCK.replace('INSERT', verb, 1), (block_row(block) for block in blocks))
+            except sqlite3.IntegrityError as e:
+                # Only a plain insert can collide, and only on the primary key; other violations stay database errors
+                if 'blocks.index' not in str(e):
+                    raise
+                logger.warning("Block index already taken: %s", e)
+                raise BlockConflictError(f"A block index is already taken: {e}")
+            saved = self._conn.total_changes - before
+            if on_conflict == 'update':
+                c.executemany('DELETE FROM transactions WHERE "block_index" = ?', ((block.index,) for block in blocks))
+            c.executemany(_INSERT_TRANSACTION.replace('INSERT', verb, 1),
+                          (row for block in blocks for row in transaction_rows(block)))
+        logger.info("Saved %s blocks", saved)
+        return saved
+
+    def iter_blocks(self, start_index=None, end_index=None, start_time=None, end_time=None, batch_size=None):
+        conditions, params = [], []
+        for column, operator, value in (('"index"', '<=', end_index), ('"timestamp"', '>=', start_time),
+                                        ('"timestamp"', '<=', end_time)):
+            if value is not None:
+                conditions.append(f'{column} {operator} ?')
+                params.append(value)
+        query = 'SELECT ' + ', '.join(f'"{column}"' for column in BLOCK_COLUMNS) + ' FROM blocks WHERE "index" >= ?'
+        query += ''.join(' AND ' + condition for condition in conditions)
+        query += ' ORDER BY "index" ASC LIMIT ?'
+        batch_size = batch_size or LOAD_BATCH_SIZE
+        next_index = start_index or 0
+        while True:
+            # Keyset pagination: each batch is a short read, so the lock is never held while the caller iterates
+            with self._cursor() as c:
+                rows = c.execute(query, [next_index, *params, batch_size]).fetchall()
+            for row in rows:
+                yield row_to_block(dict(zip(BLOCK_COLUMNS, row)))
+            if len(rows) < batch_size:
+                return
+            next_index = rows[-1][0] + 1
+
+    def find_transactions(self, device=None, since=None, until=None, tx_hash=None):
+        conditions, params = [], []
+        for column, operator, value in (('"device"', '=', device), ('"timestamp"', '>=', since),
+                                        ('"timestamp"', '<=', until), ('"tx_hash"', '=', tx_hash)):
+            if value is not None:
+                conditions.append(f'{column} {operator} ?')
+                params.append(value)
+        query = 'SELECT ' + ', '.join(f'"{column}"' for column in TRANSACTION_COLUMNS) + ' FROM transactions'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY "block_index" ASC, "position" ASC'
+        with self._cursor() as c:
+            return [dict(zip(TRANSACTION_COLUMNS, row)) for row in c.execute(query, params)]
+
+    def get_block_by_hash(self, block_hash):
+        query = 'SELECT ' + ', '.join(f'"{column}"' for column in BLOCK_COLUMNS) + ' FROM blocks WHERE "hash" = ?'
+        with self._cursor() as c:
+            row = c.execute(query, (block_hash,)).fetchone()
+        return row_to_block(dict(zip(BLOCK_COLUMNS, row))) if row else None
+
+    def reindex_transactions(self):
+        # Read the blocks first: they are streamed in short batches that each take the lock
+        rows = [row for block in self.iter_blocks() for row in transaction_rows(block)]
+        with self._cursor(transaction=True) as c:
+            c.execute('DELETE FROM transactions')
+            c.executemany(_INSERT_TRANSACTION, rows)
+        logger.info("Indexed %s transactions", len(rows))
+        return len(rows)
+
+    def get_max_index(self):
+        with self._cursor() as c:
+            return c.execute('SELECT MAX("index") FROM blocks').fetchone()[0]
+
+    def load_checkpoint(self):
+        with self._cursor() as c:
+            row = c.execute('SELECT "block_index", "block_hash" FROM validation_checkpoint WHERE "id" = 1').fetchone()
+        return tuple(row) if row else None
+
+    def save_checkpoint(self, index, block_hash):
+        with self._cursor(transaction=True) as c:
+            c.execute('INSERT OR REPLACE INTO validation_checkpoint ("id", "block_index", "block_hash", "verified_at") VALUES (1, ?, ?, ?)',
+                      (index, block_hash, time.time()))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def _cursor(self, transaction=False):
+        """
+        Yields a cursor while holding the connection lock, optionally inside an immediate
+        transaction that is committed on success and rolled back on error.
+        """
+        with self._lock:
+            try:
+                c = self._conn.cursor()
+                try:
+                    if transaction:
+                        c.execute('BEGIN IMMEDIATE')
+                    try:
+                        yield c
+                    except BaseException:
+                        if transaction:
+                            c.execute('ROLLBACK')
+                        raise
+                    if transaction:
+                        c.execute('COMMIT')
+                finally:
+                    c.close()
+            except sqlite3.Error as e:
+                logger.error("SQLite error on %s: %s", self.path, e)
+                raise DatabaseConnectionError(f"SQLite error on {self.path}: {e}")
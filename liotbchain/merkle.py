@@ -0,0 +1,166 @@
+import hashlib
+import json
+
+# Domain-separation prefixes so a leaf hash can never be mistaken for an interior node hash
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+DIGEST_SIZE = 32
+
+
+def hash_leaf(leaf):
+    """
+    Hashes an encoded transaction into a Merkle leaf digest.
+
+    Args:
+        leaf (bytes): The canonical encoding of the transaction.
+
+    Returns:
+        bytes: The raw 32-byte leaf digest.
+    """
+    return hashlib.sha256(LEAF_PREFIX + leaf).digest()
+
+
+def hash_node(left, right):
+    """
+    Hashes two child digests into their parent digest.
+
+    Args:
+        left (bytes): The raw digest of the left child.
+        right (bytes): The raw digest of the right child.
+
+    Returns:
+        bytes: The raw 32-byte parent digest.
+    """
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def encode_transaction(transaction):
+    """
+    Returns the canonical encoding of a transaction used for its Merkle leaf.
+
+    Args:
+        transaction: The transaction, or its already-encoded bytes.
+
+    Returns:
+        bytes: The key-sorted JSON encoding of the transaction.
+    """
+    if isinstance(transaction, bytes):
+        return transaction
+    return json.dumps(transaction, sort_keys=True).encode()
+
+
+class MerkleTree:
+    """
+    Binary Merkle tree over raw SHA-256 digests.
+
+    All levels are built iteratively into one preallocated buffer, leaves first, and kept so
+    that inclusion proofs can be read off without rehashing. A node without a sibling at the
+    end of an odd-sized level is promoted unchanged to the next level.
+
+    Attributes:
+        leaf_count (int): The number of leaves (transactions) in the tree.
+    """
+
+    def __init__(self, leaves):
+        """
+        Builds the tree.
+
+        Args:
+            leaves (list): The canonical encodings of the transactions, in block order.
+        """
+        self.leaf_count = len(leaves)
+        self._levels = []  # (node offset, node count) per level, leaves first
+        count, total = self.leaf_count, 0
+        while count:
+            self._levels.append((total, count))
+            total += count
+            if count == 1:
+                break
+            count = (count + 1) // 2
+
+        self._buffer = bytearray(total * DIGEST_SIZE)
+        buffer, view = self._buffer, memoryview(self._buffer)
+        sha256 = hashlib.sha256
+
+        for i, leaf in enumerate(leaves):
+            start = i * DIGEST_SIZE
+            buffer[start:start + DIGEST_SIZE] = sha256(LEAF_PREFIX + leaf).digest()
+
+        for (offset, count), (parent_offset, _) in zip(self._levels, self._levels[1:]):
+            for i in range(0, count - 1, 2):
+                start = (offset + i) * DIGEST_SIZE
+                h = sha256(NODE_PREFIX)
+                h.update(view[start:start + 2 * DIGEST_SIZE])
+                target = (parent_offset + i // 2) * DIGEST_SIZE
+                buffer[target:target + DIGEST_SIZE] = h.digest()
+            if count % 2:
+                start = (offset + count - 1) * DIGEST_SIZE
+                target = (parent_offset + count // 2) * DIGEST_SIZE
+                buffer[target:target + DIGEST_SIZE] = view[start:start + DIGEST_SIZE]
+
+    def _node(self, level, position):
+        offset = (self._levels[level][0] + position) * DIGEST_SIZE
+        return bytes(self._buffer[offset:offset + DIGEST_SIZE])
+
+    @property
+    def root(self):
+        """
+        bytes: The raw root digest, or empty bytes for a tree without leaves.
+        """
+        if not self._levels:
+            return b''
+        return self._node(len(self._levels) - 1, 0)
+
+    def root_hex(self):
+        """
+        Returns the root digest as a hexadecimal string.
+
+        Returns:
+            str: The hexadecimal Merkle root, or an empty string for a tree without leaves.
+        """
+        return self.root.hex()
+
+    def get_proof(self, tx_index):
+        """
+        Builds the inclusion proof for a single transaction.
+
+        Args:
+            tx_index (int): The position of the transaction within the block.
+
+        Returns:
+            list: The (side, sibling_hash) pairs from the leaf up to the root, where side is
+            'left' or 'right' depending on which side of the path the sibling sits.
+
+        Raises:
+            IndexError: If the transaction index is out of range.
+        """
+        if not 0 <= tx_index < self.leaf_count:
+            raise IndexError(f"Transaction index {tx_index} out of range for {self.leaf_count} leaves")
+        proof = []
+        position = tx_index
+        for level, (_, count) in enumerate(self._levels[:-1]):
+            sibling = position ^ 1
+            if sibling < count:
+                side = 'left' if sibling < position else 'right'
+                proof.append((side, self._node(level, sibling).hex()))
+            position //= 2
+        return proof
+
+    @staticmethod
+    def verify_proof(transaction, proof, merkle_root):
+        """
+        Verifies that a transaction is included under a Merkle root.
+
+        Args:
+            transaction: The transaction, or its canonical encoding as bytes.
+            proof (list): The (side, sibling_hash) pairs returned by get_proof().
+            merkle_root (str): The hexadecimal Merkle root recorded in the block header.
+
+        Returns:
+            bool: True if the proof links the transaction to the root.
+        """
+        digest = hash_leaf(encode_transaction(transaction))
+        for side, sibling in proof:
+            sibling = bytes.fromhex(sibling)
+            digest = hash_node(sibling, digest) if side == 'left' else hash_node(digest, sibling)
+        return digest.hex() == merkle_root
@@ -0,0 +1,310 @@
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Default histogram buckets, in seconds: from sub-millisecond database calls to multi-second mining runs
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Counter:
+    """
+    A value that only goes up, such as a number of events.
+
+    Attributes:
+        name (str): The metric name.
+        help (str): A one-line description of the metric.
+    """
+
+    kind = 'counter'
+
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+        self._value = 0
+
+    def inc(self, amount=1):
+        """
+        Args:
+            amount (float): The non-negative amount to add.
+        """
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self):
+        return self._value
+
+
+class Gauge:
+    """
+    A value that goes up and down, either set explicitly or read from a function whenever the
+    metrics are collected.
+
+    Attributes:
+        name (str): The metric name.
+        help (str): A one-line description of the metric.
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, name, help, function=None):
+        self.name = name
+        self.help = help
+        self._function = function
+        self._value = 0
+
+    def set(self, value):
+        """
+        Args:
+            value (float): The new value.
+        """
+        self._value = value
+
+    @property
+    def value(self):
+        return self._function() if self._function else self._value
+
+
+class Histogram:
+    """
+    A distribution of observed values, such as latencies, counted in cumulative buckets.
+
+    Attributes:
+        name (str): The metric name.
+        help (str): A one-line description of the metric.
+        buckets (tuple): The upper bounds of the buckets, in increasing order.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(self.buckets) + 1)  # The last slot counts values above every bound
+        self._sum = 0.0
+        self._count = 0
+
+    def observe(self, value):
+        """
+        Args:
+            value (float): The observed value.
+        """
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[slot] += 1
+            self._sum += value
+            self._count += 1
+
+    @contextmanager
+    def time(self):
+        """
+        Observes the seconds spent in a ``with`` block.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    @property
+    def value(self):
+        """
+        dict: The 'count', the 'sum' and the cumulative 'buckets' counts keyed by upper bound.
+        """
+        with self._lock:
+            counts, total, count = list(self._counts), self._sum, self._count
+        buckets, running = {}, 0
+        for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+            running += bucket_count
+            buckets[bound] = running
+        return {'count': count, 'sum': total, 'buckets': buckets}
+
+
+class MetricsRegistry:
+    """
+    The set of metrics of a process or of one Blockchain instance.
+
+    Metrics are created with counter(), gauge() and histogram(), which return the existing
+    metric when the name is already registered. The registry can be read as a dict with
+    snapshot() or in the Prometheus text exposition format with to_prometheus().
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def counter(self, name, help):
+        """
+        Returns:
+            Counter: The counter registered under ``name``, created if needed.
+        """
+        return self._register(Counter, name, help)
+
+    def gauge(self, name, help, function=None):
+        """
+        Args:
+            function (callable): Called without arguments to read the value at collection time.
+
+        Returns:
+            Gauge: The gauge registered under ``name``, created if needed.
+        """
+        return self._register(Gauge, name, help, function)
+
+    def histogram(self, name, help, buckets=DEFAULT_BUCKETS):
+        """
+        Returns:
+            Histogram: The histogram registered under ``name``, created if needed.
+        """
+        return self._register(Histogram, name, help, buckets)
+
+    def snapshot(self):
+        """
+        Reads every metric.
+
+        Returns:
+            dict: The value of each metric keyed by name; histograms are dicts as returned by
+            Histogram.value.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.value for metric in metrics}
+
+    def to_prometheus(self):
+        """
+        Renders every metric in the Prometheus text exposition format (version 0.0.4).
+
+        Returns:
+            str: The exposition text.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            value = metric.value
+            if metric.kind == 'histogram':
+                for bound, count in value['buckets'].items():
+                    lines.append(f'{metric.name}_bucket{{le="{_format(bound)}"}} {count}')
+                lines.append(f"{metric.name}_sum {_format(value['sum'])}")
+                lines.append(f"{metric.name}_count {value['count']}")
+            else:
+                lines.append(f"{metric.name} {_format(value)}")
+        return '\n'.join(lines) + '\n'
+
+    def _register(self, cls, name, help, *args):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, *args)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+
+class _NullMetric:
+    """
+    Stands in for every kind of metric in a NullRegistry; all updates are no-ops.
+    """
+
+    value = 0
+
+    def inc(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+    def observe(self, value):
+        pass
+
+    @contextmanager
+    def time(self):
+        yield
+
+
+class NullRegistry:
+    """
+    A registry for disabled metrics: it hands out metrics whose updates do nothing, so
+    instrumented code costs no more than a method call, and it reports nothing.
+    """
+
+    enabled = False
+    _metric = _NullMetric()
+
+    def counter(self, name, help):
+        return self._metric
+
+    def gauge(self, name, help, function=None):
+        return self._metric
+
+    def histogram(self, name, help, buckets=DEFAULT_BUCKETS):
+        return self._metric
+
+    def snapshot(self):
+        return {}
+
+    def to_prometheus(self):
+        return ''
+
+
+class MetricsServer:
+    """
+    Serves a registry over HTTP in the Prometheus text format, from a background thread.
+
+    Attributes:
+        registry (MetricsRegistry): The metrics served.
+        port (int): The port listened on.
+    """
+
+    def __init__(self, registry, port, host=''):
+        """
+        Args:
+            registry (MetricsRegistry): The metrics to serve.
+            port (int): The port to listen on; 0 picks a free port.
+            host (str): The address to bind; all interfaces by default.
+        """
+        self.registry = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                body = registry.to_prometheus().encode()
+                handler.send_response(200)
+                handler.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                handler.send_header('Content-Length', str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, format, *args):
+                pass  # Scrapes are not worth a log line each
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='liotbchain-metrics', daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """
+        Stops serving and releases the port.
+        """
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+
+def _format(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
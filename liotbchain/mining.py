@@ -0,0 +1,160 @@
+import hashlib
+import multiprocessing
+import struct
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+
+def meets_difficulty(digest, difficulty):
+    """
+    Checks whether a raw SHA-256 digest starts with the required number of zero hex digits.
+
+    Args:
+        digest (bytes): The raw 32-byte digest.
+        difficulty (int): The number of leading zero hex digits required.
+
+    Returns:
+        bool: True if the digest satisfies the difficulty.
+    """
+    zero_bytes, odd = divmod(difficulty, 2)
+    if digest[:zero_bytes] != bytes(zero_bytes):
+        return False
+    return not odd or digest[zero_bytes] < 16
+
+
+# Nonce encoding of the binary (version 3) header
+_BINARY_NONCE = struct.Struct('<Q')
+
+
+def search_nonce(prefix, suffix, difficulty, start=0, stop=None, step=1, binary_nonce=False):
+    """
+    Searches for a nonce whose header hash satisfies the difficulty.
+
+    The invariant header prefix is absorbed into a SHA-256 midstate once, and each attempt only
+    hashes a copy of that midstate with the encoded nonce and the (short) header suffix.
+
+    Args:
+        prefix (bytes): The serialized header bytes preceding the nonce.
+        suffix (bytes): The serialized header bytes following the nonce.
+        difficulty (int): The number of leading zero hex digits required.
+        start (int): The first nonce to try.
+        stop (int): The nonce at which to stop searching (exclusive).
+        step (int): The stride between consecutive nonces.
+        binary_nonce (bool): Whether the nonce is encoded as 8 little-endian bytes, as in
+            version 3 headers, rather than as decimal digits (see Block.binary_nonce).
+
+    Returns:
+        tuple: The (nonce, hash) pair of the first match, or None if the range is exhausted.
+    """
+    midstate = hashlib.sha256(prefix)
+    zero_bytes, odd = divmod(difficulty, 2)
+    zeros = bytes(zero_bytes)
+    copy = midstate.copy
+    encode = _BINARY_NONCE.pack if binary_nonce else b'%d'.__mod__
+
+    for nonce in range(start, stop, step):
+        h = copy()
+        h.update(encode(nonce) + suffix)
+        digest = h.digest()
+        if digest[:zero_bytes] == zeros and (not odd or digest[zero_bytes] < 16):
+            return nonce, h.hexdigest()
+    return None
+
+
+# Shared lowest-winning-nonce bound, installed in each pool process by _init_worker
+_best_nonce = None
+
+
+def _init_worker(best_nonce):
+    global _best_nonce
+    _best_nonce = best_nonce
+
+
+def _search_stride(prefix, suffix, difficulty, start, stop, step, deterministic, chunk_size, binary_nonce):
+    """
+    Scans the strided nonce range start, start + step, ... in chunks, checking the shared bound
+    between chunks so that the search stops once another worker has found a winning nonce.
+    """
+    nonce = start
+    while nonce < stop:
+        bound = _best_nonce.value
+        if deterministic:
+            if nonce > bound:
+                return None
+        elif bound < stop:
+            return None
+        chunk_stop = nonce + step * chunk_size
+        result = search_nonce(prefix, suffix, difficulty, nonce, min(chunk_stop, stop, bound + 1), step,
+                              binary_nonce)
+        if result is not None:
+            with _best_nonce.get_lock():
+                if result[0] < _best_nonce.value:
+                    _best_nonce.value = result[0]
+            return result
+        nonce = chunk_stop
+    return None
+
+
+class ParallelMiner:
+    """
+    Searches the nonce space across a pool of worker processes.
+
+    Worker k of N scans the strided range k, k + N, k + 2N, ... so every worker covers an equal,
+    interleaved share of the low nonces. Workers publish winning nonces to a shared bound; once
+    it is set, the remaining workers stop at their next chunk boundary.
+
+    Attributes:
+        workers (int): The number of worker processes.
+        deterministic (bool): Whether to always return the lowest winning nonce.
+        chunk_size (int): The number of nonces a worker tries between checks of the shared bound.
+    """
+
+    def __init__(self, workers, deterministic=False, chunk_size=4096):
+        self.workers = workers
+        self.deterministic = deterministic
+        self.chunk_size = chunk_size
+        self._best_nonce = multiprocessing.Value('q', 0)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def search(self, prefix, suffix, difficulty, stop, binary_nonce=False):
+        """
+        Searches nonces in range(0, stop) in parallel.
+
+        When deterministic, workers keep scanning until they pass the lowest winning nonce found
+        so far, so the result is the same nonce the serial search would return.
+
+        Args:
+            prefix (bytes): The serialized header bytes preceding the nonce.
+            suffix (bytes): The serialized header bytes following the nonce.
+            difficulty (int): The number of leading zero hex digits required.
+            stop (int): The nonce at which to stop searching (exclusive).
+            binary_nonce (bool): Whether the nonce is encoded as 8 little-endian bytes.
+
+        Returns:
+            tuple: The (nonce, hash) pair of the winning nonce, or None if every range is exhausted.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, initializer=_init_worker, initargs=(self._best_nonce,)
+                )
+            self._best_nonce.value = stop
+            futures = [
+                self._executor.submit(
+                    _search_stride, prefix, suffix, difficulty, k, stop, self.workers, self.deterministic,
+                    self.chunk_size, binary_nonce
+                )
+                for k in range(self.workers)
+            ]
+            found = [result for result in (future.result() for future in futures) if result is not None]
+            return min(found) if found else None
+
+    def close(self):
+        """
+        Shuts down the worker processes.
+        """
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
@@ -0,0 +1,206 @@
+import queue
+import threading
+import time
+from .block import Block
+from .utils import MiningFailedError
+from liotbchain.utils import logger
+
+
+class MiningPipeline:
+    """
+    Three-stage ingest pipeline: collect, mine, persist.
+
+    The caller keeps collecting transactions into the next batch while a mining thread runs
+    proof-of-work on sealed batches and a persistence thread saves mined blocks, so throughput
+    is bound by the slowest stage instead of the sum of all of them. Both hand-off queues are
+    bounded by ``depth``; when they are full, sealing a batch waits, which applies backpressure
+    to the collector.
+
+    The mining thread builds each block on the last block it mined rather than the last block
+    persisted, so block N + 1 is mined while block N is being saved. The persistence thread only
+    appends a block to the chain if it links to the current tip; a block built on a block that
+    failed to persist, or that lost its index to another writer, is re-mined on top of the actual
+    tip, and the mining tip is reset to it. The mining thread keeps the last blocks it built on, so
+    a retargeted difficulty is computed from each block's actual predecessors, including blocks
+    that are still waiting to be persisted.
+
+    When the chain keeps a write-ahead log, the persistence thread compacts it after each commit,
+    keeping the batches still in flight, so the log stays about as long as the pipeline.
+
+    Attributes:
+        depth (int): The capacity of each hand-off queue.
+        failed (list): Transaction batches that could not be mined or persisted.
+    """
+
+    def __init__(self, blockchain, depth=4):
+        self.blockchain = blockchain
+        self.depth = depth
+        self.failed = []
+        self._sealed = queue.Queue(maxsize=depth)
+        self._mined = queue.Queue(maxsize=depth)
+        self._tip_lock = threading.Lock()
+        # Submitted batches not yet persisted or failed, in sealing order
+        self._in_flight = []
+        self._in_flight_lock = threading.Lock()
+        # The blocks ending at the mining tip that the next block's difficulty depends on
+        self._mining_history = blockchain._history()
+        self._errors = []
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'batches_sealed': 0,
+            'blocks_mined': 0,
+            'blocks_persisted': 0,
+            'blocks_rebased': 0,
+            'mining_seconds': 0.0,
+            'persist_seconds': 0.0,
+            'last_mining_seconds': 0.0,
+            'last_persist_seconds': 0.0,
+        }
+        self._miner = threading.Thread(target=self._mine_loop, name='liotbchain-miner', daemon=True)
+        self._persister = threading.Thread(target=self._persist_loop, name='liotbchain-persister', daemon=True)
+        self._miner.start()
+        self._persister.start()
+
+    def submit(self, batch):
+        """
+        Hands a sealed batch of transactions to the mining stage, waiting if the queue is full.
+
+        Args:
+            batch (list): The transactions of the next block.
+        """
+        with self._in_flight_lock:
+            self._in_flight.append(batch)
+        self._sealed.put(batch)
+        self._count('batches_sealed')
+
+    def join(self):
+        """
+        Waits until every submitted batch has been mined and persisted.
+
+        Raises:
+            MiningFailedError: If any batch failed since the last call. The failed batches are
+                kept in ``failed``.
+        """
+        self._sealed.join()
+        self._mined.join()
+        if self._errors:
+            errors, self._errors = self._errors, []
+            raise MiningFailedError(f"{len(errors)} block(s) failed in the mining pipeline; first error: {errors[0]}")
+
+    def idle(self):
+        """
+        Returns:
+            bool: True if no submitted batch is waiting to be mined or persisted.
+        """
+        return self._sealed.unfinished_tasks == 0 and self._mined.unfinished_tasks == 0
+
+    def unpersisted(self):
+        """
+        Returns the transactions handed to the pipeline that are not stored in a block.
+
+        Returns:
+            list: The transactions of the failed batches, then of the batches in flight.
+        """
+        with self._in_flight_lock:
+            batches = self.failed + self._in_flight
+        return [transaction for batch in batches for transaction in batch]
+
+    def stats(self):
+        """
+        Returns a snapshot of the pipeline metrics.
+
+        Returns:
+            dict: Queue depths, block counts and cumulative and last stage times in seconds.
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['sealed_queue_depth'] = self._sealed.qsize()
+        stats['mined_queue_depth'] = self._mined.qsize()
+        stats['failed_batches'] = len(self.failed)
+        return stats
+
+    def close(self):
+        """
+        Drains the pipeline and stops its threads.
+        """
+        if self._miner.is_alive():
+            self._sealed.put(None)
+            self._miner.join()
+            self._persister.join()
+
+    def _count(self, name, seconds_name=None, seconds=0.0):
+        with self._stats_lock:
+            self._stats[name] += 1
+            if seconds_name:
+                self._stats[seconds_name] += seconds
+                self._stats['last_' + seconds_name] = seconds
+
+    def _fail(self, batch, error):
+        logger.error("Mining pipeline error: %s", error)
+        with self._in_flight_lock:
+            self._discard(batch)
+            self.failed.append(batch)
+        self._errors.append(error)
+
+    def _discard(self, batch):
+        # Batches are compared by identity: two batches may hold equal transactions
+        for i, in_flight in enumerate(self._in_flight):
+            if in_flight is batch:
+                del self._in_flight[i]
+                return
+
+    def _mine_loop(self):
+        while True:
+            batch = self._sealed.get()
+            try:
+                if batch is None:
+                    self._mined.put(None)
+                    return
+                started = time.perf_counter()
+                with self._tip_lock:
+                    history = list(self._mining_history)
+                tip = history[-1]
+                block = Block(tip.index + 1, time.time(), batch, tip.hash)
+                self.blockchain.proof_of_work(block, history)
+                with self._tip_lock:
+                    # The persistence stage may have reset the tip while this block was mined
+                    if self._mining_history[-1] is tip:
+                        self._mining_history.append(block)
+                self._count('blocks_mined', 'mining_seconds', time.perf_counter() - started)
+                self._mined.put(block)
+            except Exception as e:
+                self._fail(batch, e)
+            finally:
+                self._sealed.task_done()
+
+    def _persist_loop(self):
+        while True:
+            block = self._mined.get()
+            try:
+                if block is None:
+                    return
+                started = time.perf_counter()
+                # Hold the chain's mining lock so a concurrent add_block cannot move the tip mid-commit
+                with self.blockchain._mining_lock:
+                    mined_hash = block.hash
+                    tip = self.blockchain.get_latest_block()
+                    if block.previous_hash != tip.hash or block.index != tip.index + 1:
+                        block.index = tip.index + 1
+                        block.previous_hash = tip.hash
+                        block.difficulty = None  # Assigned again for the new predecessor
+                        self.blockchain.proof_of_work(block)
+                    # Committing may also rebase the block onto blocks saved by another writer
+                    self.blockchain._commit_block(block)
+                    if block.hash != mined_hash:
+                        with self._tip_lock:
+                            self._mining_history = self.blockchain._history()
+                        self._count('blocks_rebased')
+                    with self._in_flight_lock:
+                        self._discard(block.data)
+                    if self.blockchain.wal:
+                        self.blockchain._try_compact_wal()
+                self._count('blocks_persisted', 'persist_seconds', time.perf_counter() - started)
+            except Exception as e:
+                self._fail(block.data, e)
+            finally:
+                self._mined.task_done()
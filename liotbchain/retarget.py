@@ -0,0 +1,100 @@
+import math
+
+# Each difficulty step is one more leading hex zero, which multiplies the expected work by 16
+_WORK_PER_STEP = 16
+
+
+class Retargeter:
+    """
+    Adjusts the mining difficulty so that blocks are committed about ``target_interval``
+    seconds apart.
+
+    The difficulty changes only at the first block of each window of ``window`` blocks. That
+    block's difficulty follows from how long the previous window took, measured between the
+    block timestamps, compared with ``window * target_interval``; the other blocks keep their
+    predecessor's difficulty. Because one step multiplies the work by 16, the step is the
+    base-16 logarithm of the ratio, rounded: the difficulty moves only once blocks come at least
+    4 times too fast or too slow. Each change is clamped to ``max_step`` and the result to
+    [``min_difficulty``, ``max_difficulty``].
+
+    Block timestamps are taken when mining starts, so the interval includes the time spent
+    waiting for transactions: with a slow ingest rate the difficulty settles at
+    ``min_difficulty`` rather than burning CPU to fill the gap.
+
+    Attributes:
+        target_interval (float): The desired seconds between blocks.
+        window (int): The number of blocks between difficulty changes.
+        max_step (int): The largest change of the difficulty at one retarget.
+        min_difficulty (int): The lowest difficulty the retargeter assigns.
+        max_difficulty (int): The highest difficulty the retargeter assigns.
+    """
+
+    def __init__(self, target_interval, window=16, max_step=1, min_difficulty=1, max_difficulty=8):
+        """
+        Raises:
+            ValueError: If the interval, window or step is not positive, or the bounds are inverted.
+        """
+        if target_interval <= 0 or window < 1 or max_step < 1:
+            raise ValueError("target_interval, window and max_step must be positive")
+        if not 0 <= min_difficulty <= max_difficulty <= 64:
+            raise ValueError(f"Invalid difficulty bounds [{min_difficulty}, {max_difficulty}]")
+        self.target_interval = target_interval
+        self.window = window
+        self.max_step = max_step
+        self.min_difficulty = min_difficulty
+        self.max_difficulty = max_difficulty
+
+    @property
+    def depth(self):
+        """
+        int: The number of trailing blocks next_difficulty() reads: a window and its predecessor.
+        """
+        return self.window + 1
+
+    def next_difficulty(self, chain, default):
+        """
+        Returns the difficulty for the block after the tip of a chain.
+
+        Args:
+            chain (sequence): The chain up to the tip, or at least its last ``depth`` blocks. Only
+                the tip and, at a window boundary, the block ``window`` blocks before it are read.
+            default (int): The difficulty of blocks that did not record one.
+
+        Returns:
+            int: The difficulty to mine the next block at.
+        """
+        tip = chain[-1]
+        current = tip.difficulty if tip.difficulty is not None else default
+        if (tip.index + 1) % self.window or len(chain) <= self.window:
+            return self._clamp(current)
+        elapsed = tip.timestamp - chain[-self.window - 1].timestamp
+        expected = self.window * self.target_interval
+        if elapsed <= 0:
+            step = self.max_step
+        else:
+            step = round(math.log(expected / elapsed, _WORK_PER_STEP))
+            step = max(-self.max_step, min(self.max_step, step))
+        return self._clamp(current + step)
+
+    def _clamp(self, difficulty):
+        return max(self.min_difficulty, min(self.max_difficulty, difficulty))
+
+
+def build_retargeter(enabled, target_interval, window=16, max_step=1, min_difficulty=1, max_difficulty=8):
+    """
+    Builds the retargeter described by the configuration.
+
+    Args:
+        enabled (bool): Whether the difficulty is retargeted at all.
+        target_interval (float): The desired seconds between blocks.
+        window (int): The number of blocks between difficulty changes.
+        max_step (int): The largest change of the difficulty at one retarget.
+        min_difficulty (int): The lowest difficulty assigned.
+        max_difficulty (int): The highest difficulty assigned.
+
+    Returns:
+        Retargeter: The retargeter, or None when retargeting is disabled.
+    """
+    if not enabled:
+        return None
+    return Retargeter(target_interval, window, max_step, min_difficulty, max_difficulty)
@@ -0,0 +1,152 @@
+class SealingPolicy:
+    """
+    Decides when the pending transactions are sealed into a block.
+
+    The blockchain consults the policy after every accepted transaction with the number of
+    pending transactions, their serialized size and the age of the oldest one. Policies with a
+    ``max_age`` are also checked by a background timer, so a quiet period cannot leave readings
+    unsealed indefinitely.
+
+    Attributes:
+        max_age (float): The age in seconds after which pending transactions must be sealed,
+            or None if the policy is not time-based.
+        tracks_bytes (bool): Whether the policy needs the serialized size of pending transactions.
+    """
+
+    max_age = None
+    tracks_bytes = False
+
+    def should_seal(self, count, size, age):
+        """
+        Args:
+            count (int): The number of pending transactions.
+            size (int): The serialized size of the pending transactions in bytes (0 unless
+                ``tracks_bytes`` is set).
+            age (float): The seconds since the oldest pending transaction was accepted.
+
+        Returns:
+            bool: True if the pending transactions should be sealed now.
+        """
+        raise NotImplementedError
+
+    def on_seal(self, count, age):
+        """
+        Called whenever a batch is sealed, so adaptive policies can adjust.
+
+        Args:
+            count (int): The number of transactions sealed.
+            age (float): The seconds the batch took to fill.
+        """
+
+
+class CountPolicy(SealingPolicy):
+    """
+    Seals once a fixed number of transactions is pending (the TRANSACTIONS_PER_BLOCK behaviour).
+    """
+
+    def __init__(self, max_transactions):
+        self.max_transactions = max_transactions
+
+    def should_seal(self, count, size, age):
+        return count >= self.max_transactions
+
+
+class SizePolicy(SealingPolicy):
+    """
+    Seals once the pending transactions reach a serialized size in bytes.
+    """
+
+    tracks_bytes = True
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+
+    def should_seal(self, count, size, age):
+        return size >= self.max_bytes
+
+
+class AgePolicy(SealingPolicy):
+    """
+    Seals once the oldest pending transaction is ``max_age`` seconds old, bounding commit latency.
+    """
+
+    def __init__(self, max_age):
+        self.max_age = max_age
+
+    def should_seal(self, count, size, age):
+        return count > 0 and age >= self.max_age
+
+
+class AdaptivePolicy(SealingPolicy):
+    """
+    Count-based policy whose batch size follows the ingest rate.
+
+    When a batch fills faster than ``target_interval`` seconds, the system is under load and the
+    batch size doubles (up to ``max_transactions``), amortizing proof-of-work and database cost
+    over more readings. When a batch takes more than twice the target to fill, the batch size
+    halves (down to ``min_transactions``) to keep commit latency low.
+
+    Attributes:
+        batch_size (int): The current number of transactions per block.
+    """
+
+    def __init__(self, min_transactions, max_transactions, target_interval=1.0):
+        self.min_transactions = min_transactions
+        self.max_transactions = max(min_transactions, max_transactions)
+        self.target_interval = target_interval
+        self.batch_size = min_transactions
+
+    def should_seal(self, count, size, age):
+        return count >= self.batch_size
+
+    def on_seal(self, count, age):
+        if count >= self.batch_size and age < self.target_interval:
+            self.batch_size = min(self.max_transactions, self.batch_size * 2)
+        elif age > 2 * self.target_interval:
+            self.batch_size = max(self.min_transactions, self.batch_size // 2)
+
+
+class AnyPolicy(SealingPolicy):
+    """
+    Seals as soon as any of the combined policies would.
+    """
+
+    def __init__(self, *policies):
+        self.policies = policies
+        ages = [policy.max_age for policy in policies if policy.max_age is not None]
+        self.max_age = min(ages) if ages else None
+        self.tracks_bytes = any(policy.tracks_bytes for policy in policies)
+
+    def should_seal(self, count, size, age):
+        return any(policy.should_seal(count, size, age) for policy in self.policies)
+
+    def on_seal(self, count, age):
+        for policy in self.policies:
+            policy.on_seal(count, age)
+
+
+def build_policy(transactions_per_block, max_bytes=0, max_age=0, adaptive=False, max_transactions=None,
+                 target_interval=1.0):
+    """
+    Builds the sealing policy described by the configuration.
+
+    Args:
+        transactions_per_block (int): The batch size, or the minimum batch size when adaptive.
+        max_bytes (int): The serialized size that triggers a seal; 0 disables it.
+        max_age (float): The pending age in seconds that triggers a seal; 0 disables it.
+        adaptive (bool): Whether the batch size adapts to the ingest rate.
+        max_transactions (int): The largest adaptive batch size.
+        target_interval (float): The adaptive target time to fill a batch, in seconds.
+
+    Returns:
+        SealingPolicy: The combined policy.
+    """
+    if adaptive:
+        policies = [AdaptivePolicy(transactions_per_block, max_transactions or transactions_per_block, target_interval)]
+    else:
+        policies = [CountPolicy(transactions_per_block)]
+    if max_bytes:
+        policies.append(SizePolicy(max_bytes))
+    if max_age:
+        policies.append(AgePolicy(max_age))
+    return policies[0] if len(policies) == 1 else AnyPolicy(*policies)
@@ -1,43 +1,91 @@
 # utils.py
 
+import atexit
+import copy
 import logging
-import logging.config
-import os
-
-LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG")
-
-logging_config = {
-    'version': 1,
-    'disable_existing_loggers': False,
-    'formatters': {
-        'standard': {
-            'format': '%(asctime)s [%(levelname)s] %(name)s: %(message)s'
-        },
-    },
-    'handlers': {
-        'default': {
-            'level': LOG_LEVEL,
-            'formatter': 'standard',
-            'class': 'logging.StreamHandler',
-        },
-        'file': {
-            'level': LOG_LEVEL,
-            'formatter': 'standard',
-            'class': 'logging.FileHandler',
-            'filename': 'liotbchain.log',
-        },
-    },
-    'loggers': {
-        '': {
-            'handlers': ['default', 'file'],
-            'level': LOG_LEVEL,
-            'propagate': True
-        }
-    }
-}
-
-logging.config.dictConfig(logging_config)
-logger = logging.getLogger(__name__)
+import logging.handlers
+import queue
+from liotbchain.config import LOG_LEVEL, LOG_FILE
+
+LOG_FORMAT = '%(asctime)s [%(levelname)s] %(name)s: %(message)s'
+
+# The library logs to its own logger and leaves the root logger to the application: records reach
+# the application's handlers through propagation, and are dropped when it configures none
+logger = logging.getLogger('liotbchain')
+logger.addHandler(logging.NullHandler())
+logger.setLevel(LOG_LEVEL)
+
+_queue_handler = None
+_listener = None
+
+
+class _SnapshotQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queues a copy of each record without formatting it. The stdlib QueueHandler merges the
+    arguments into the message and renders the traceback on the logging thread; here the
+    record keeps its ``args`` and ``exc_info``, and the listener's handlers format it.
+    """
+
+    def prepare(self, record):
+        return copy.copy(record)
+
+
+def configure_logging(level=None, log_file=None, stream=True):
+    """
+    Writes the library's log records to stderr and/or a file from a background thread.
+
+    Records are put on an in-memory queue by the calling thread, unformatted, and formatted and
+    written by a QueueListener, so mining and ingest never wait on formatting, a terminal or a
+    disk write. Records of
+    the "liotbchain" logger are then no longer propagated to the root logger. Calling it again
+    replaces the previous configuration.
+
+    Args:
+        level (str or int): The logger level. Defaults to LOG_LEVEL.
+        log_file (str): A file to append the records to. Defaults to LOG_FILE; no file if empty.
+        stream (bool): Whether to write the records to stderr.
+
+    Returns:
+        logging.handlers.QueueListener: The running background writer.
+    """
+    global _queue_handler, _listener
+    stop_logging()
+    log_file = LOG_FILE if log_file is None else log_file
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = []
+    if stream:
+        handlers.append(logging.StreamHandler())
+    if log_file:
+        handlers.append(logging.FileHandler(log_file))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    records = queue.SimpleQueue()
+    _queue_handler = _SnapshotQueueHandler(records)
+    _listener = logging.handlers.QueueListener(records, *handlers)
+    _listener.start()
+    logger.addHandler(_queue_handler)
+    logger.setLevel(level or LOG_LEVEL)
+    logger.propagate = False
+    return _listener
+
+
+def stop_logging():
+    """
+    Flushes and stops the background writer started by configure_logging(), if any, and
+    restores propagation to the root logger. Also called at interpreter exit.
+    """
+    global _queue_handler, _listener
+    if _listener is None:
+        return
+    logger.removeHandler(_queue_handler)
+    _listener.stop()  # Writes the records still queued
+    for handler in _listener.handlers:
+        handler.close()
+    logger.propagate = True
+    _queue_handler = _listener = None
+
+
+atexit.register(stop_logging)
 
 
 class Error(Exception):
@@ -56,6 +104,10 @@ class BlockchainOperationError(Error):
     """Raised when a blockchain operation fails."""
     pass
 
+class BlockConflictError(BlockchainOperationError):
+    """Raised when a block index has already been committed by another writer."""
+    pass
+
 class MiningFailedError(Error):
     """Raised when mining a new block fails."""
     pass
@@ -0,0 +1,254 @@
+import itertools
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from .block import DIFFICULTY_HEADER_VERSION
+
+
+class ValidationReport:
+    """
+    Outcome of a chain validation run.
+
+    The report is truthy when the chain is valid, so it can be used wherever the boolean
+    result of ``is_chain_valid`` was used before.
+
+    Attributes:
+        valid (bool): Whether every checked block passed.
+        start_index (int): The index of the first block checked.
+        blocks_checked (int): The number of blocks whose hash and links were verified.
+        first_bad_index (int): The index of the first invalid block, or None.
+        reason (str): Why the first invalid block failed, or None.
+        elapsed (float): The wall-clock duration of the run in seconds.
+        incremental (bool): Whether the run resumed from a validation checkpoint.
+    """
+
+    def __init__(self, start_index=1, incremental=False):
+        self.valid = True
+        self.start_index = start_index
+        self.blocks_checked = 0
+        self.first_bad_index = None
+        self.reason = None
+        self.elapsed = 0.0
+        self.incremental = incremental
+        self._started = time.perf_counter()
+
+    def fail(self, index, reason):
+        """
+        Records the first invalid block and marks the report as invalid.
+
+        Args:
+            index (int): The index of the invalid block.
+            reason (str): Why the block is invalid.
+        """
+        self.valid = False
+        self.first_bad_index = index
+        self.reason = reason
+
+    def finish(self):
+        """
+        Stops the clock on the run.
+
+        Returns:
+            ValidationReport: The report itself.
+        """
+        self.elapsed = time.perf_counter() - self._started
+        return self
+
+    @property
+    def blocks_per_second(self):
+        """
+        float: The validation throughput of the run.
+        """
+        return self.blocks_checked / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __bool__(self):
+        return self.valid
+
+    def __repr__(self):
+        if self.valid:
+            return (f"ValidationReport(valid=True, blocks_checked={self.blocks_checked}, "
+                    f"blocks_per_second={self.blocks_per_second:.1f})")
+        return f"ValidationReport(valid=False, first_bad_index={self.first_bad_index}, reason={self.reason!r})"
+
+
+def expected_difficulty(history, difficulty, retargeter=None):
+    """
+    Returns the difficulty the block after ``history`` must record.
+
+    The expectation follows from the difficulties the preceding blocks recorded, starting with
+    the one the genesis block records: without a retargeter it never changes, and with one it
+    is the retargeter's choice after them. ``difficulty`` is only used where none of the blocks
+    read recorded a difficulty, on chains written before blocks recorded theirs.
+
+    Args:
+        history (sequence): The blocks preceding it, ending with its predecessor; at least the
+            last ``retargeter.depth`` of them.
+        difficulty (int): The difficulty of blocks that did not record one.
+        retargeter (Retargeter): The chain's retargeter, or None.
+
+    Returns:
+        int: The number of leading zeros the block must record.
+    """
+    if retargeter is not None:
+        return retargeter.next_difficulty(history, difficulty)
+    tip = history[-1]
+    return tip.difficulty if tip.difficulty is not None else difficulty
+
+
+def required_difficulty(block, history, difficulty, retargeter=None):
+    """
+    Returns the difficulty a block must have been mined at: expected_difficulty() for a block
+    that records its difficulty (version 4 on), and ``difficulty`` for older blocks.
+
+    Args:
+        block (Block): The block to check.
+        history (sequence): The blocks preceding it, ending with its predecessor; at least the
+            last ``retargeter.depth`` of them.
+        difficulty (int): The difficulty of blocks that did not record one.
+        retargeter (Retargeter): The chain's retargeter, or None.
+
+    Returns:
+        int: The number of leading zeros required of the block's hash.
+    """
+    if block.version < DIFFICULTY_HEADER_VERSION:
+        return difficulty
+    return expected_difficulty(history, difficulty, retargeter)
+
+
+def verify_block(block, previous_hash, difficulty):
+    """
+    Checks a single block against its predecessor's hash and the proof-of-work target.
+
+    The block hash is calculated once, and the checks run in the order the chain validator has
+    always reported them: Merkle root, hash, link, then proof of work. A block whose header
+    records its difficulty (version 4 on) must record exactly ``difficulty``, so it cannot have
+    been mined at a lower difficulty of its own choosing, and its hash is checked against the
+    difficulty it records.
+
+    Args:
+        block (Block): The block to check.
+        previous_hash (str): The stored hash of the preceding block.
+        difficulty (int): The number of leading zeros required, as returned by required_difficulty().
+
+    Returns:
+        str: A description of the first failed check, or None if the block is valid.
+    """
+    i = block.index
+    if not block.verify_merkle_root():
+        return f"Merkle root mismatch: Block {i}'s stored Merkle root {block.merkle_root} does not match its transactions."
+    calculated_hash = block.calculate_hash()
+    if block.hash != calculated_hash:
+        return f"Hash mismatch: Block {i}'s stored hash {block.hash} does not match calculated hash {calculated_hash}."
+    if block.previous_hash != previous_hash:
+        return f"Link error: Block {i}'s previous hash {block.previous_hash} does not link to Block {i-1}'s hash {previous_hash}."
+    if block.version >= DIFFICULTY_HEADER_VERSION and block.difficulty is not None:
+        if block.difficulty != difficulty:
+            return f"Difficulty error: Block {i} records difficulty {block.difficulty}, but {difficulty} is required."
+        difficulty = block.difficulty
+    if not block.hash.startswith('0' * difficulty):
+        return f"Proof of Work error: Block {i}'s hash {block.hash} does not meet the difficulty requirement."
+    return None
+
+
+def verify_blocks(blocks, history, difficulty, retargeter=None):
+    """
+    Checks consecutive blocks, each against the block before it.
+
+    Args:
+        blocks (iterable): The blocks to check, in index order.
+        history (deque): The blocks preceding the first one, ending with its predecessor and
+            bounded to ``history_depth(retargeter)`` entries. Each block that passes is appended.
+        difficulty (int): The difficulty of blocks that did not record one.
+        retargeter (Retargeter): The chain's retargeter, or None.
+
+    Yields:
+        tuple: The (block, reason) of each block checked, where reason describes the failed
+        check or is None. Checking stops after the first invalid block.
+    """
+    for block in blocks:
+        reason = verify_block(block, history[-1].hash, required_difficulty(block, history, difficulty, retargeter))
+        yield block, reason
+        if reason:
+            return
+        history.append(block)
+
+
+def history_depth(retargeter):
+    """
+    Returns:
+        int: The number of trailing blocks needed to check the next one: its predecessor, and
+        with a retargeter the blocks it reads as well.
+    """
+    return retargeter.depth if retargeter else 1
+
+
+def _verify_chunk(blocks, history, difficulty, retargeter):
+    """
+    Verifies a run of consecutive blocks in a worker process.
+
+    Returns:
+        tuple: The (index, reason) of the first invalid block in the chunk, or None.
+    """
+    history = deque(history, maxlen=history_depth(retargeter))
+    for block, reason in verify_blocks(blocks, history, difficulty, retargeter):
+        if reason:
+            return block.index, reason
+    return None
+
+
+def verify_chain_parallel(blocks, difficulty, workers=None, chunk_size=1000, retargeter=None):
+    """
+    Verifies a stream of blocks across a pool of worker processes.
+
+    The stream is cut into chunks of consecutive blocks. Each chunk is sent to a worker together
+    with the blocks preceding it that its checks read, so the link and the difficulty across the
+    chunk boundary are checked exactly as the serial validator would check them. Results are consumed in chunk
+    order, so the first failure reported is the one the serial validator would report. At most
+    two chunks per worker are in flight, keeping memory bounded on long chains.
+
+    Args:
+        blocks (iterable): The blocks in index order, starting with the genesis block.
+        difficulty (int): The difficulty of blocks that did not record one.
+        workers (int): The number of worker processes. Defaults to the number of CPUs.
+        chunk_size (int): The number of blocks verified per task.
+        retargeter (Retargeter): The chain's retargeter, or None.
+
+    Returns:
+        ValidationReport: The outcome of the run; ``last_block`` holds the (index, hash) of the
+        last block verified.
+    """
+    report = ValidationReport(start_index=1)
+    report.last_block = None
+    blocks = iter(blocks)
+    genesis = next(blocks, None)
+    if genesis is None:
+        return report.finish()
+    history = deque([genesis], maxlen=history_depth(retargeter))
+    report.last_block = (genesis.index, genesis.hash)
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < 2 * workers:
+                chunk = list(itertools.islice(blocks, chunk_size))
+                if not chunk:
+                    exhausted = True
+                    break
+                pending.append((executor.submit(_verify_chunk, chunk, list(history), difficulty, retargeter), chunk[0].index, chunk[-1]))
+                history.extend(chunk)
+            if not pending:
+                break
+            future, first_index, last = pending.popleft()
+            failure = future.result()
+            if failure:
+                report.fail(*failure)
+                report.blocks_checked += failure[0] - first_index
+                for future, _, _ in pending:
+                    future.cancel()
+                break
+            report.blocks_checked += last.index - first_index + 1
+            report.last_block = (last.index, last.hash)
+    return report.finish()
@@ -0,0 +1,173 @@
+import json
+import os
+import threading
+from liotbchain.utils import logger
+
+
+class WriteAheadLog:
+    """
+    Append-only local log of accepted transactions that have not been persisted in a block yet.
+
+    The file holds one JSON object per line: a header ``{"base": index}`` naming the chain tip
+    when the log was last rewritten, followed by one ``{"tx": transaction}`` record per accepted
+    transaction. On startup, the transactions already stored in blocks after the base index are
+    subtracted from the log and the rest are replayed as pending transactions. Once everything
+    that was pending has been persisted, the log is rewritten atomically to just the header and
+    the transactions still pending, so it stays about one block long.
+
+    Records are made durable with group commit. With a ``sync_interval`` of 0, ``commit`` returns
+    only after the record is fsynced, but one fsync covers every record written by concurrent
+    producers in the meantime. With a positive interval, a background thread fsyncs every
+    ``sync_interval`` seconds and ``commit`` does not wait, trading a bounded window of loss on
+    power failure for throughput.
+
+    Attributes:
+        path (str): The location of the log file.
+        sync_interval (float): The seconds between background fsyncs, or 0 to sync on every append.
+    """
+
+    def __init__(self, path, sync_interval=0.0):
+        self.path = path
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()  # Guards the file and the write sequence
+        self._sync_lock = threading.Lock()  # Held by the thread running an fsync
+        self._written = 0
+        self._synced = 0
+        self._file = open(path, 'a', encoding='utf-8')
+        self._stop = threading.Event()
+        self._flusher = None
+        if sync_interval > 0:
+            self._flusher = threading.Thread(target=self._flush_loop, name='liotbchain-wal', daemon=True)
+            self._flusher.start()
+
+    def read(self):
+        """
+        Reads the log, ignoring a torn record left by a crash mid-write.
+
+        Returns:
+            tuple: The base block index (None for an empty log) and the logged transactions.
+        """
+        base, transactions = None, []
+        with self._lock, open(self.path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning("Ignoring a torn record at line %s of %s", line_number, self.path)
+                    continue
+                if 'base' in record:
+                    base = record['base']
+                elif 'tx' in record:
+                    transactions.append(record['tx'])
+        return base, transactions
+
+    def append(self, transaction):
+        """
+        Writes an accepted transaction to the log without waiting for it to reach the disk.
+
+        Args:
+            transaction: The transaction data; it must be JSON-serializable.
+
+        Returns:
+            int: The sequence number of the record, to be passed to ``commit``.
+        """
+        line = json.dumps({'tx': transaction}, sort_keys=True) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._written += 1
+            return self._written
+
+    def commit(self, sequence):
+        """
+        Makes a record durable according to the sync policy. With a sync interval of 0 this
+        waits for an fsync covering the record, shared with any concurrent callers; otherwise
+        the background flusher syncs it and this returns immediately.
+
+        Args:
+            sequence (int): The sequence number returned by ``append``.
+        """
+        if not self.sync_interval:
+            self._sync(sequence)
+
+    def rewrite(self, base_index, transactions):
+        """
+        Atomically replaces the log with a header and the transactions still pending.
+
+        Args:
+            base_index (int): The index of the last persisted block.
+            transactions (list): The accepted transactions not yet stored in a block.
+        """
+        tmp_path = self.path + '.tmp'
+        # Take the sync lock first, as _sync does, so no fsync runs on the file being replaced
+        with self._sync_lock, self._lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'base': base_index}) + '\n')
+                for transaction in transactions:
+                    f.write(json.dumps({'tx': transaction}, sort_keys=True) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self._file.close()
+            os.replace(tmp_path, self.path)
+            _fsync_directory(os.path.dirname(os.path.abspath(self.path)))
+            self._file = open(self.path, 'a', encoding='utf-8')
+            self._synced = self._written
+
+    def sync(self):
+        """
+        Forces every record written so far to disk.
+        """
+        with self._lock:
+            sequence = self._written
+        self._sync(sequence)
+
+    def close(self):
+        """
+        Stops the background flusher, syncs outstanding records and closes the file.
+        """
+        self._stop.set()
+        if self._flusher:
+            self._flusher.join()
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    def _sync(self, sequence):
+        if self._synced >= sequence:
+            return
+        with self._sync_lock:
+            # Another thread's fsync may have covered this record while we waited
+            if self._synced >= sequence:
+                return
+            with self._lock:
+                self._file.flush()
+                target = self._written
+                fd = self._file.fileno()
+            os.fsync(fd)
+            self._synced = max(self._synced, target)
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.sync_interval):
+            try:
+                self.sync()
+            except (OSError, ValueError) as e:
+                logger.error("Failed to sync the write-ahead log: %s", e)
+
+
+def _fsync_directory(path):
+    """
+    Fsyncs a directory so a rename within it survives a crash. Platforms that cannot open a
+    directory, such as Windows, are skipped.
+
+    Args:
+        path (str): The directory to sync.
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
@@ -17,11 +17,12 @@ setup(
     url='https://github.com/sharhan-alhassan/liotbchain',
     packages=find_packages(exclude=['tests']),
     install_requires=requirements,
+    extras_require={'msgpack': ['msgpack'], 'numpy': ['numpy']},
     keywords='blockchain python iot framework',
     classifiers=[
         'Programming Language :: Python :: 3',
         'License :: OSI Approved :: MIT License',
         'Operating System :: OS Independent',
     ],
-    python_requires='>=3.6',
+    python_requires='>=3.7',
 )
@@ -1,5 +1,6 @@
 import pytest
 from liotbchain.block import Block
+from liotbchain.utils import BlockchainOperationError
 import time
 import json
 
@@ -28,3 +29,98 @@ def test_calculate_merkle_root(block):
     merkle_root = block.calculate_merkle_root()
     assert merkle_root is not None
     assert isinstance(merkle_root, str)
+
+def test_merkle_root_is_memoized_and_invalidated(block):
+    block.hash = block.calculate_hash()
+    merkle_root = block.merkle_root
+    assert merkle_root == block.calculate_merkle_root()
+    assert block.verify_merkle_root()
+
+    block.data = [{"device": "Tampered Device", "distance": 100, "timestamp": block.timestamp}]
+    assert block.merkle_root is None
+    assert block.calculate_merkle_root() != merkle_root
+    assert block.calculate_hash() != block.hash
+
+@pytest.mark.parametrize("version", [1, 2, 4])
+def test_in_place_change_fails_merkle_verification(block, version):
+    block.version = version
+    block.hash = block.calculate_hash()
+    block.to_bytes()  # Memoizes the encoded transactions and the tree
+    block.data[0]['distance'] = 999
+    assert block.calculate_hash() == block.hash  # The memoized header does not see the change
+    assert not block.verify_merkle_root()
+
+    loaded = Block.from_bytes(block.to_bytes())
+    loaded.data[0]['distance'] = 555
+    assert not loaded.verify_merkle_root()
+
+def test_block_from_encoded_data(block):
+    block.hash = block.calculate_hash()
+    loaded = Block(block.index, block.timestamp, None, block.previous_hash, block.nonce, block.hash,
+                   merkle_root=block.merkle_root, encoded_data=block.encoded_data())
+    assert loaded.calculate_hash() == block.hash
+    assert loaded._data is None  # hashing did not decode the transactions
+    assert loaded.data == block.data
+    assert loaded.verify_merkle_root()
+
+    forged = Block(block.index, block.timestamp, None, block.previous_hash, block.nonce, block.hash,
+                   merkle_root="f" * 64, encoded_data=block.encoded_data())
+    assert not forged.verify_merkle_root()
+
+def test_binary_round_trip(block):
+    block.hash = block.calculate_hash()
+    payload = block.to_bytes()
+    assert len(payload) < len(block.encoded_data()) + 3 * 64
+
+    loaded = Block.from_bytes(payload)
+    assert loaded.calculate_hash() == block.hash
+    assert loaded._data is None  # hashing did not decode the transactions
+    assert loaded.data == block.data
+    assert loaded.merkle_root == block.merkle_root and loaded.verify_merkle_root()
+    assert loaded.to_bytes() == payload
+
+def test_binary_round_trip_keeps_difficulty(block):
+    block.difficulty = 3
+    block.hash = block.calculate_hash()
+    loaded = Block.from_bytes(block.to_bytes())
+    assert loaded.difficulty == 3
+    assert loaded.calculate_hash() == block.hash
+    assert Block.from_bytes(Block(0, 1.0, "Genesis Block", "0").to_bytes()).difficulty is None
+
+@pytest.mark.parametrize("version", [1, 2, 3])
+def test_binary_round_trip_keeps_earlier_versions(block, version):
+    block.version = version
+    block.previous_hash = "f" * 64
+    block.hash = block.calculate_hash()
+    loaded = Block.from_bytes(block.to_bytes())
+    assert loaded.version == version
+    assert loaded.calculate_hash() == block.hash
+
+def test_binary_round_trip_of_genesis_block():
+    genesis = Block(0, 1700000000, "Genesis Block", "0")
+    genesis.hash = genesis.calculate_hash()
+    loaded = Block.from_bytes(genesis.to_bytes())
+    assert loaded.data == "Genesis Block"
+    assert loaded.previous_hash == "0"
+    assert isinstance(loaded.timestamp, int)
+    assert loaded.calculate_hash() == genesis.hash
+
+def test_binary_round_trip_with_msgpack(block):
+    pytest.importorskip("msgpack")
+    block.hash = block.calculate_hash()
+    payload = block.to_bytes(codec='msgpack')
+    assert payload != block.to_bytes(codec='json')
+    loaded = Block.from_bytes(payload)
+    assert loaded.data == block.data
+    assert loaded.verify_merkle_root()
+    assert loaded.calculate_hash() == block.hash
+
+def test_from_bytes_rejects_corrupt_payloads(block):
+    payload = block.to_bytes()
+    for corrupt in (payload[:-1], payload + b'\x00', b'XX' + payload[2:], payload[:10]):
+        with pytest.raises(BlockchainOperationError):
+            Block.from_bytes(corrupt)
+
+def test_to_bytes_rejects_unknown_codec(block):
+    with pytest.raises(ValueError):
+        block.to_bytes(codec='cbor')
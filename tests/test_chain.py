@@ -0,0 +1,57 @@
+import pytest
+from unittest.mock import MagicMock
+from liotbchain.block import Block
+from liotbchain.chain import LazyChain
+
+@pytest.fixture
+def stored_blocks():
+    blocks = []
+    previous_hash = "0"
+    for index in range(10):
+        block = Block(index, 1700000000.0 + index, [{"device": "Raspberry Pi", "distance": index}], previous_hash)
+        block.hash = block.calculate_hash()
+        previous_hash = block.hash
+        blocks.append(block)
+    return blocks
+
+@pytest.fixture
+def chain(stored_blocks):
+    queries = []
+
+    def fake_iter_blocks(start_index=None, end_index=None, **kwargs):
+        queries.append((start_index, end_index))
+        start = 0 if start_index is None else start_index
+        end = len(stored_blocks) - 1 if end_index is None else end_index
+        return iter(stored_blocks[start:end + 1])
+
+    storage = MagicMock()
+    storage.iter_blocks.side_effect = fake_iter_blocks
+    storage.get_max_index.return_value = len(stored_blocks) - 1
+    chain = LazyChain(storage, window=2, cache_size=3)
+    chain.load()
+    chain.queries = queries
+    return chain
+
+def test_lazy_chain_keeps_only_tail(chain, stored_blocks):
+    assert len(chain) == 10
+    assert chain.queries == [(8, None)]
+    assert chain[-1] is stored_blocks[9]
+    assert chain[8] is stored_blocks[8]
+    assert len(chain.queries) == 1
+
+def test_lazy_chain_fetches_and_caches_old_blocks(chain, stored_blocks):
+    assert chain[3].hash == stored_blocks[3].hash
+    assert chain[3].hash == stored_blocks[3].hash
+    assert chain.queries[1:] == [(3, 3)]
+    assert [b.index for b in chain[6:10]] == [6, 7, 8, 9]
+    assert [b.index for b in chain[::4]] == [0, 4, 8]
+    with pytest.raises(IndexError):
+        chain[10]
+
+def test_lazy_chain_iteration_and_append(chain, stored_blocks):
+    assert [b.index for b in chain] == list(range(10))
+    block = Block(10, 1700000010.0, [], stored_blocks[-1].hash)
+    chain.append(block)
+    assert len(chain) == 11
+    assert chain[-1] is block
+    assert chain._cache[8] is stored_blocks[8]
@@ -0,0 +1,114 @@
+import math
+import pytest
+from unittest.mock import patch
+from liotbchain import columnar
+from liotbchain.block import Block
+from liotbchain.blockchain import Blockchain
+from liotbchain.columnar import ReadingIndex
+from liotbchain.database.sqlite import SQLiteBackend
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def backend(request):
+    if request.param == 'numpy':
+        if columnar.np is None:
+            pytest.skip("numpy is not installed")
+        yield
+    else:
+        with patch('liotbchain.columnar.np', None):
+            yield
+
+
+def make_index():
+    readings = [
+        [{"device": "pi-1", "distance": 100, "timestamp": 10.0}, {"device": "pi-2", "distance": 200, "timestamp": 11.0}],
+        [{"device": "pi-1", "distance": 110, "timestamp": 20.0}, {"device": "pi-2", "timestamp": 21.0}],
+        [{"device": "pi-1", "distance": 120, "timestamp": 30.0}, {"device": "pi-3", "distance": "n/a"}],
+    ]
+    index = ReadingIndex()
+    index.add_block(Block(0, 0.0, "Genesis Block", "0"))
+    index.extend(Block(i + 1, 25.0, data, "0") for i, data in enumerate(readings))
+    return index
+
+
+def test_query_filters_by_device_and_time(backend):
+    index = make_index()
+    assert len(index) == 6
+    assert index.devices() == ["pi-1", "pi-2", "pi-3"]
+
+    result = index.query(device="pi-1", since=15.0)
+    assert list(result['block_index']) == [2, 3]
+    assert list(result['position']) == [0, 0]
+    assert list(result['distance']) == [110.0, 120.0]
+    assert list(result['device']) == ["pi-1", "pi-1"]
+
+    # A reading without a timestamp takes its block's
+    assert list(index.query(until=25.0)['device']) == ["pi-1", "pi-2", "pi-1", "pi-2", "pi-3"]
+    assert len(index.query(device="unknown")['timestamp']) == 0
+
+
+def test_aggregate(backend):
+    index = make_index()
+    assert index.aggregate('distance', 'mean', device="pi-1") == 110.0
+    assert index.aggregate('distance', 'count') == 4  # Missing and non-numeric values are ignored
+    assert index.aggregate('distance', 'max', since=11.0, until=20.0) == 200.0
+    assert index.aggregate('distance', 'sum', device="pi-3") is None
+    assert index.aggregate('distance', 'mean', by_device=True) == {"pi-1": 110.0, "pi-2": 200.0}
+    assert index.aggregate('distance', 'min', device="unknown", by_device=True) == {}
+
+
+def test_invalid_queries_are_rejected():
+    index = make_index()
+    with pytest.raises(ValueError):
+        index.aggregate('humidity')
+    with pytest.raises(ValueError):
+        index.aggregate('distance', 'median')
+
+
+def test_blocks_are_indexed_once():
+    index = make_index()
+    index.add_block(Block(2, 25.0, [{"device": "pi-1", "distance": 1}], "0"))
+    assert len(index) == 6
+    assert not math.isnan(index.aggregate('distance', 'sum'))
+
+
+def test_queries_read_in_place_while_columns_grow(backend):
+    with patch('liotbchain.columnar.INITIAL_CAPACITY', 2):
+        index = ReadingIndex()
+    index.add_block(Block(1, 1.0, [{"device": "pi-1", "distance": 1}, {"device": "pi-1", "distance": 2}], "0"))
+    with index._lock:
+        _, columns = index._snapshot(None, ['distance'])
+    # Growing the columns past their capacity leaves the rows an in-flight query reads untouched
+    index.extend(Block(i, float(i), [{"device": "pi-2", "distance": i}] * 3, "0") for i in range(2, 6))
+    assert list(columns['distance']) == [1.0, 2.0]
+    assert len(index) == 14
+    assert index.aggregate('distance', 'sum', by_device=True) == {"pi-1": 3.0, "pi-2": 42.0}
+
+
+def test_blockchain_feeds_the_index(tmp_path):
+    path = str(tmp_path / "chain.db")
+    with SQLiteBackend(path) as store, \
+            Blockchain(storage=store, difficulty=1, transactions_per_block=2, columnar_index=True) as blockchain:
+        persisted = []
+        blockchain.add_block_listener(persisted.append)
+        for i in range(4):
+            blockchain.add_transaction({"device": f"pi-{i % 2}", "distance": i, "timestamp": 100.0 + i})
+        assert [block.index for block in persisted] == [1, 2]
+        assert blockchain.readings.aggregate('distance', 'sum', by_device=True) == {"pi-0": 2.0, "pi-1": 4.0}
+
+    # On startup the index is rebuilt from the stored blocks
+    with SQLiteBackend(path) as store, \
+            Blockchain(storage=store, difficulty=1, lazy_chain=True, columnar_index=True) as blockchain:
+        assert len(blockchain.readings) == 4
+        assert blockchain.readings.aggregate('distance', 'mean', since=101.0) == 2.0
+
+
+def test_failing_listener_does_not_break_mining(tmp_path):
+    with SQLiteBackend(str(tmp_path / "chain.db")) as store, \
+            Blockchain(storage=store, difficulty=1, transactions_per_block=1) as blockchain:
+        def fail(block):
+            raise RuntimeError("listener failure")
+        blockchain.add_block_listener(fail)
+        blockchain.add_transaction({"device": "pi-1", "distance": 1})
+        blockchain.remove_block_listener(fail)
+        assert len(blockchain.chain) == 2
@@ -0,0 +1,64 @@
+import logging
+import threading
+from liotbchain import utils
+from liotbchain.utils import logger, configure_logging, stop_logging
+
+
+def test_library_logger_leaves_the_root_logger_alone():
+    assert logger.name == 'liotbchain'
+    assert any(isinstance(handler, logging.NullHandler) for handler in logger.handlers)
+    assert not any(getattr(handler, 'baseFilename', '').endswith('liotbchain.log')
+                   for handler in logging.getLogger().handlers)
+
+
+def test_configure_logging_writes_from_a_background_thread(tmp_path):
+    path = tmp_path / "liotbchain.log"
+    level = logger.level
+    listener = configure_logging(level='INFO', log_file=str(path), stream=False)
+    try:
+        assert listener._thread is not None
+        assert not logger.propagate
+        logger.info("Block saved with index: %s", 7)
+        logger.debug("Not written at INFO: %s", 8)
+    finally:
+        stop_logging()
+        logger.setLevel(level)
+    assert logger.propagate
+    assert utils._listener is None
+    lines = path.read_text().splitlines()
+    assert len(lines) == 1
+    assert lines[0].endswith("[INFO] liotbchain: Block saved with index: 7")
+
+
+def test_reconfiguring_replaces_the_writer(tmp_path):
+    level = logger.level
+    first = configure_logging(log_file=str(tmp_path / "first.log"), stream=False)
+    second = configure_logging(log_file=str(tmp_path / "second.log"), stream=False)
+    try:
+        assert first is not second
+        assert first._thread is None  # Stopped
+        assert sum(isinstance(h, logging.handlers.QueueHandler) for h in logger.handlers) == 1
+    finally:
+        stop_logging()
+        logger.setLevel(level)
+
+
+def test_records_are_formatted_by_the_background_thread(tmp_path):
+    formatted_on = []
+
+    class Reading:
+        def __str__(self):
+            formatted_on.append(threading.current_thread())
+            return "reading"
+
+    path = tmp_path / "liotbchain.log"
+    level = logger.level
+    listener = configure_logging(level='INFO', log_file=str(path), stream=False)
+    thread = listener._thread
+    try:
+        logger.info("Stored %s", Reading())
+    finally:
+        stop_logging()
+        logger.setLevel(level)
+    assert formatted_on == [thread]
+    assert path.read_text().splitlines()[0].endswith("Stored reading")
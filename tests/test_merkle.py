@@ -0,0 +1,61 @@
+import pytest
+import hashlib
+import json
+from liotbchain.block import Block, LEGACY_BLOCK_VERSION
+from liotbchain.merkle import MerkleTree, encode_transaction
+from liotbchain.utils import BlockchainOperationError
+
+def make_transactions(count):
+    return [{"device": f"Raspberry Pi {i}", "distance": 100 + i, "timestamp": 1700000000.0 + i} for i in range(count)]
+
+def recursive_legacy_root(transactions):
+    # The original recursive Merkle root, kept here to pin the version 1 format
+    if len(transactions) == 1:
+        return hashlib.sha256(transactions[0]).hexdigest()
+    new_level = []
+    for i in range(0, len(transactions), 2):
+        left = transactions[i]
+        right = transactions[i + 1] if i + 1 < len(transactions) else left
+        new_level.append(hashlib.sha256(left + right).hexdigest().encode())
+    return recursive_legacy_root(new_level)
+
+@pytest.mark.parametrize("count", [1, 2, 3, 5, 8, 13])
+def test_proofs_verify_for_every_leaf(count):
+    transactions = make_transactions(count)
+    tree = MerkleTree([encode_transaction(tx) for tx in transactions])
+    root = tree.root_hex()
+    for i, tx in enumerate(transactions):
+        proof = tree.get_proof(i)
+        assert len(proof) <= count.bit_length()
+        assert MerkleTree.verify_proof(tx, proof, root)
+
+def test_proof_rejects_other_transaction():
+    transactions = make_transactions(4)
+    tree = MerkleTree([encode_transaction(tx) for tx in transactions])
+    assert not MerkleTree.verify_proof(transactions[1], tree.get_proof(0), tree.root_hex())
+    with pytest.raises(IndexError):
+        tree.get_proof(4)
+
+def test_empty_tree():
+    assert MerkleTree([]).root_hex() == ''
+
+def test_odd_level_is_not_malleable():
+    transactions = make_transactions(3)
+    tree = MerkleTree([encode_transaction(tx) for tx in transactions])
+    padded = MerkleTree([encode_transaction(tx) for tx in transactions + transactions[-1:]])
+    assert tree.root_hex() != padded.root_hex()
+
+def test_block_proof():
+    transactions = make_transactions(6)
+    block = Block(1, 1700000000.0, transactions, "0")
+    proof = block.get_proof(4)
+    assert MerkleTree.verify_proof(transactions[4], proof, block.calculate_merkle_root())
+
+@pytest.mark.parametrize("count", [1, 2, 3, 7])
+def test_legacy_block_merkle_root(count):
+    transactions = make_transactions(count)
+    block = Block(1, 1700000000.0, transactions, "0", version=LEGACY_BLOCK_VERSION)
+    expected = recursive_legacy_root([json.dumps(tx, sort_keys=True).encode() for tx in transactions])
+    assert block.calculate_merkle_root() == expected
+    with pytest.raises(BlockchainOperationError):
+        block.get_proof(0)
@@ -0,0 +1,82 @@
+import math
+import urllib.request
+import pytest
+from liotbchain.blockchain import Blockchain
+from liotbchain.database.sqlite import SQLiteBackend
+from liotbchain.metrics import MetricsRegistry, NullRegistry, MetricsServer
+
+
+def test_registry_snapshot_and_prometheus_text():
+    registry = MetricsRegistry()
+    counter = registry.counter('events_total', 'Events seen.')
+    counter.inc()
+    counter.inc(2)
+    assert registry.counter('events_total', 'Events seen.') is counter
+    registry.gauge('queue_depth', 'Items queued.', lambda: 7)
+    histogram = registry.histogram('latency_seconds', 'Latency.', buckets=(0.1, 1.0))
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5.0)
+
+    snapshot = registry.snapshot()
+    assert snapshot['events_total'] == 3
+    assert snapshot['queue_depth'] == 7
+    assert snapshot['latency_seconds'] == {'count': 3, 'sum': 5.55, 'buckets': {0.1: 1, 1.0: 2, math.inf: 3}}
+
+    text = registry.to_prometheus()
+    assert "# TYPE events_total counter\nevents_total 3\n" in text
+    assert "queue_depth 7\n" in text
+    assert 'latency_seconds_bucket{le="0.1"} 1\n' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3\n' in text
+    assert "latency_seconds_count 3\n" in text
+
+    with pytest.raises(ValueError):
+        registry.gauge('events_total', 'Events seen.')
+
+
+def test_null_registry_reports_nothing():
+    registry = NullRegistry()
+    registry.counter('events_total', 'Events seen.').inc()
+    with registry.histogram('latency_seconds', 'Latency.').time():
+        pass
+    assert registry.snapshot() == {}
+    assert registry.to_prometheus() == ''
+
+
+def test_metrics_server():
+    registry = MetricsRegistry()
+    registry.counter('events_total', 'Events seen.').inc(5)
+    server = MetricsServer(registry, 0, host='127.0.0.1')
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics") as response:
+            assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+            assert "events_total 5\n" in response.read().decode()
+    finally:
+        server.close()
+
+
+def test_blockchain_instrumentation(tmp_path):
+    registry = MetricsRegistry()
+    with SQLiteBackend(str(tmp_path / "chain.db")) as store, \
+            Blockchain(storage=store, difficulty=1, transactions_per_block=2, metrics=registry) as blockchain:
+        blockchain.add_transaction({"device": "pi-1", "distance": 1})
+        assert registry.snapshot()['liotbchain_pending_transactions'] == 1
+        blockchain.add_transaction({"device": "pi-1", "distance": 2})
+        blockchain.validate_chain(full=True)
+
+        snapshot = registry.snapshot()
+        assert snapshot['liotbchain_transactions_total'] == 2
+        assert snapshot['liotbchain_pending_transactions'] == 0
+        assert snapshot['liotbchain_chain_length'] == 2
+        assert snapshot['liotbchain_pow_seconds']['count'] == 1
+        assert snapshot['liotbchain_pow_attempts_total'] == blockchain.chain[1].nonce + 1
+        assert snapshot['liotbchain_storage_save_seconds']['count'] == 1
+        assert snapshot['liotbchain_storage_load_seconds']['count'] == 1
+        assert snapshot['liotbchain_validated_blocks_total'] == 1
+        assert snapshot['liotbchain_validation_seconds']['count'] == 1
+
+
+def test_metrics_are_disabled_by_default(tmp_path):
+    with SQLiteBackend(str(tmp_path / "chain.db")) as store, Blockchain(storage=store, difficulty=1) as blockchain:
+        assert not blockchain.metrics.enabled
+        assert blockchain.metrics.snapshot() == {}
@@ -0,0 +1,102 @@
+import pytest
+import hashlib
+import json
+import time
+from collections import OrderedDict
+import struct
+from liotbchain.block import Block, LEGACY_BLOCK_VERSION
+from liotbchain.mining import search_nonce, meets_difficulty, ParallelMiner
+
+@pytest.fixture
+def block():
+    timestamp = time.time()
+    data = [
+        {"device": "Raspberry Pi 1", "distance": 120, "timestamp": timestamp},
+        {"device": "Raspberry Pi 2", "distance": 151, "timestamp": timestamp},
+        {"device": "Raspberry Pi 3", "distance": 130, "timestamp": timestamp},
+    ]
+    return Block(1, timestamp, data, "0" * 64)
+
+def test_header_parts_match_legacy_json_serialization(block):
+    block.version = LEGACY_BLOCK_VERSION
+    block.nonce = 1234
+    block_dict = OrderedDict({
+        'index': block.index,
+        'timestamp': block.timestamp,
+        'data': block.data,
+        'previous_hash': block.previous_hash,
+        'nonce': block.nonce,
+        'merkle_root': block.calculate_merkle_root()
+    })
+    expected = hashlib.sha256(json.dumps(block_dict, sort_keys=True).encode()).hexdigest()
+    assert block.calculate_hash() == expected
+
+def test_header_records_version(block):
+    block.version = 2
+    prefix, suffix = block.header_parts()
+    assert suffix.endswith(b', "version": 2}')
+
+def test_binary_header_layout(block):
+    block.version = 3
+    block.nonce = 1234
+    prefix, suffix = block.header_parts()
+    assert suffix == b''
+    assert prefix == struct.pack('<BQd32s32s', 3, 1, block.timestamp, bytes(32),
+                                 bytes.fromhex(block.calculate_merkle_root()))
+    assert block.calculate_hash() == hashlib.sha256(prefix + struct.pack('<Q', 1234)).hexdigest()
+
+def test_difficulty_header_layout(block):
+    block.difficulty = 5
+    block.nonce = 1234
+    prefix, suffix = block.header_parts()
+    assert suffix == b''
+    assert prefix == struct.pack('<BQdB32s32s', 4, 1, block.timestamp, 5, bytes(32),
+                                 bytes.fromhex(block.calculate_merkle_root()))
+    assert block.calculate_hash() == hashlib.sha256(prefix + struct.pack('<Q', 1234)).hexdigest()
+    # The header commits to the difficulty
+    first = block.calculate_hash()
+    block.difficulty = 4
+    assert block.calculate_hash() != first
+
+def test_binary_header_hashes_non_digest_fields(block):
+    block.previous_hash = "0"
+    prefix, _ = block.header_parts()
+    assert prefix[18:50] == hashlib.sha256(b'liotbchain-text:0').digest()
+
+@pytest.mark.parametrize("version", [2, 3])
+def test_search_nonce_matches_calculate_hash(block, version):
+    block.version = version
+    prefix, suffix = block.header_parts()
+    nonce, block_hash = search_nonce(prefix, suffix, 3, 0, 1000000, binary_nonce=block.binary_nonce)
+    block.nonce = nonce
+    assert block.calculate_hash() == block_hash
+    assert block_hash.startswith('000')
+
+def test_search_nonce_exhausted(block):
+    prefix, suffix = block.header_parts()
+    assert search_nonce(prefix, suffix, 64, 0, 100) is None
+
+def test_meets_difficulty():
+    assert meets_difficulty(bytes.fromhex('000f' + '0' * 60), 3)
+    assert not meets_difficulty(bytes.fromhex('001f' + '0' * 60), 3)
+    assert meets_difficulty(bytes.fromhex('ff' * 32), 0)
+
+def test_parallel_miner_deterministic_matches_serial(block):
+    prefix, suffix = block.header_parts()
+    miner = ParallelMiner(3, deterministic=True, chunk_size=64)
+    try:
+        assert miner.search(prefix, suffix, 3, 1000000, True) == search_nonce(prefix, suffix, 3, 0, 1000000,
+                                                                               binary_nonce=True)
+        assert miner.search(prefix, suffix, 64, 500, True) is None
+    finally:
+        miner.close()
+
+def test_parallel_miner_first_found(block):
+    prefix, suffix = block.header_parts()
+    miner = ParallelMiner(2, chunk_size=64)
+    try:
+        nonce, block_hash = miner.search(prefix, suffix, 2, 1000000, block.binary_nonce)
+        block.nonce = nonce
+        assert block.calculate_hash() == block_hash
+    finally:
+        miner.close()
@@ -0,0 +1,132 @@
+import pytest
+from liotbchain.block import Block
+from liotbchain.blockchain import Blockchain
+from liotbchain.database.sqlite import SQLiteBackend
+from liotbchain.retarget import Retargeter, build_retargeter
+from liotbchain.utils import InvalidChainError
+
+
+def make_chain(length, interval, difficulty=2):
+    chain = [Block(0, 1000.0, "Genesis Block", "0")]
+    for index in range(1, length):
+        chain.append(Block(index, 1000.0 + index * interval, [], "0", difficulty=difficulty))
+    return chain
+
+
+def test_difficulty_only_changes_at_window_boundaries():
+    retargeter = Retargeter(target_interval=10.0, window=4)
+    # The next block, index 5, is not the first of a window
+    assert retargeter.next_difficulty(make_chain(5, 0.1), 1) == 2
+    # Blocks of the last window came 100 times too fast
+    assert retargeter.next_difficulty(make_chain(8, 0.1), 1) == 3
+
+
+@pytest.mark.parametrize("interval, expected", [
+    (10.0, 2),  # On target
+    (5.0, 2),  # Twice too fast is within one step
+    (2.0, 3),  # 5 times too fast
+    (50.0, 1),  # 5 times too slow
+    (100000.0, 1),  # Clamped to one step per window
+])
+def test_step_follows_the_observed_interval(interval, expected):
+    retargeter = Retargeter(target_interval=10.0, window=4)
+    assert retargeter.next_difficulty(make_chain(8, interval), 1) == expected
+
+
+def test_difficulty_stays_within_bounds():
+    assert Retargeter(10.0, window=4, max_difficulty=2).next_difficulty(make_chain(8, 0.1), 1) == 2
+    assert Retargeter(10.0, window=4, min_difficulty=2).next_difficulty(make_chain(8, 1000.0), 1) == 2
+    assert Retargeter(10.0, window=4, max_step=3).next_difficulty(make_chain(8, 0.001), 1) == 5
+    # Blocks without a recorded difficulty count as the default
+    assert Retargeter(10.0, window=4).next_difficulty(make_chain(6, 0.1, difficulty=None), 3) == 3
+
+
+def test_invalid_settings_are_rejected():
+    with pytest.raises(ValueError):
+        Retargeter(0)
+    with pytest.raises(ValueError):
+        Retargeter(10.0, min_difficulty=4, max_difficulty=2)
+    assert build_retargeter(False, 10.0) is None
+
+
+def test_blockchain_retargets_and_validates_each_block_at_its_difficulty(tmp_path):
+    path = str(tmp_path / "chain.db")
+    # Blocks mined back to back are far faster than one per 1000 seconds
+    retargeter = Retargeter(target_interval=1000.0, window=2, max_difficulty=3)
+    with SQLiteBackend(path) as store, Blockchain(storage=store, difficulty=1, transactions_per_block=1,
+                                                  retargeter=retargeter) as blockchain:
+        for i in range(7):
+            blockchain.add_transaction({"device": "pi-1", "distance": i})
+        assert [block.difficulty for block in blockchain.chain] == [1, 1, 1, 1, 2, 2, 3, 3]
+        assert all(block.hash.startswith('0' * block.difficulty) for block in blockchain.chain[1:])
+        assert blockchain.next_difficulty() == 3
+        assert blockchain.validate_chain(full=True)
+
+    # Reopened with the same retargeter, the recorded difficulties are recomputed and accepted, whatever
+    # the configured starting difficulty
+    with SQLiteBackend(path) as store, Blockchain(storage=store, difficulty=3, transactions_per_block=1,
+                                                  retargeter=retargeter) as blockchain:
+        assert blockchain.validate_chain(full=True)
+        blockchain.add_transaction({"device": "pi-1", "distance": 7})
+        assert blockchain.chain[-1].difficulty == 3
+
+    # Without one, the difficulty cannot change
+    with SQLiteBackend(path) as store, Blockchain(storage=store, difficulty=1, transactions_per_block=1) as blockchain:
+        report = blockchain.validate_chain(full=True)
+        assert report.first_bad_index == 4 and report.reason.startswith("Difficulty error")
+
+
+def test_stored_chain_stays_valid_under_a_different_difficulty(tmp_path):
+    path = str(tmp_path / "chain.db")
+    with SQLiteBackend(path) as store, Blockchain(storage=store, difficulty=2, transactions_per_block=1) as blockchain:
+        for i in range(3):
+            blockchain.add_transaction({"device": "pi-1", "distance": i})
+
+    with SQLiteBackend(path) as store, Blockchain(storage=store, difficulty=3, transactions_per_block=1) as blockchain:
+        assert [block.difficulty for block in blockchain.chain] == [2, 2, 2, 2]
+        assert blockchain.validate_chain(full=True)
+        assert blockchain.sync() == 0
+        # New blocks follow the difficulty the chain was started at
+        blockchain.add_transaction({"device": "pi-1", "distance": 3})
+        assert blockchain.chain[-1].difficulty == 2
+        assert blockchain.verify_chain_parallel(workers=1)
+
+
+def test_sync_rejects_a_block_mined_below_the_difficulty(tmp_path):
+    path = str(tmp_path / "chain.db")
+    with SQLiteBackend(path) as store, Blockchain(storage=store, difficulty=3, nonce_limit=10 ** 7) as blockchain:
+        tip = blockchain.get_latest_block()
+        forged = Block(tip.index + 1, tip.timestamp + 1, [{"device": "Forger", "distance": 1}], tip.hash, difficulty=1)
+        with Blockchain(storage=store, difficulty=1) as forger:
+            forger.proof_of_work(forged)
+        store.save_block(forged)
+        with pytest.raises(InvalidChainError, match="Difficulty error"):
+            blockchain.sync()
+
+
+def test_rebased_block_is_mined_at_the_difficulty_after_its_new_predecessor(tmp_path):
+    path = str(tmp_path / "chain.db")
+    retargeter = Retargeter(target_interval=1000.0, window=2, max_difficulty=3)
+    with SQLiteBackend(path) as store, Blockchain(storage=store, difficulty=1, retargeter=retargeter) as blockchain:
+        blockchain.mine_block([{"device": "pi-1", "distance": 1}])
+        blockchain.mine_block([{"device": "pi-1", "distance": 2}])
+        # Another writer takes index 3, so this block is rebased onto index 4, the first of a window
+        with SQLiteBackend(path) as other_store, \
+                Blockchain(storage=other_store, difficulty=1, retargeter=retargeter) as other:
+            other.mine_block([{"device": "pi-2", "distance": 3}])
+        block = blockchain.mine_block([{"device": "pi-1", "distance": 4}])
+        assert block.index == 4
+        assert [b.difficulty for b in blockchain.chain[1:]] == [1, 1, 1, 2]
+        assert blockchain.validate_chain(full=True)
+
+
+def test_pipelined_blocks_are_retargeted_from_their_real_predecessors(tmp_path):
+    retargeter = Retargeter(target_interval=1000.0, window=2, max_difficulty=3)
+    with SQLiteBackend(str(tmp_path / "chain.db")) as store, \
+            Blockchain(storage=store, difficulty=1, transactions_per_block=1, pipelined=True,
+                       retargeter=retargeter) as blockchain:
+        for i in range(8):
+            blockchain.add_transaction({"device": "pi-1", "distance": i})
+        blockchain.flush()
+        assert [block.difficulty for block in blockchain.chain] == [1, 1, 1, 1, 2, 2, 3, 3, 3]
+        assert blockchain.validate_chain(full=True)
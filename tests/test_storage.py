@@ -0,0 +1,223 @@
+import os
+import sqlite3
+import pytest
+from unittest.mock import patch
+from liotbchain.block import Block
+from liotbchain.blockchain import Blockchain
+from liotbchain.database.sqlite import SQLiteBackend
+from liotbchain.database.filestore import FileStore
+from liotbchain.merkle import MerkleTree, hash_leaf
+from liotbchain.utils import BlockConflictError
+
+
+def make_blocks(count, start=0, previous_hash="0"):
+    blocks = []
+    for index in range(start, start + count):
+        block = Block(index, 1700000000.0 + index, [{"device": "Raspberry Pi", "distance": index}], previous_hash)
+        block.hash = block.calculate_hash()
+        previous_hash = block.hash
+        blocks.append(block)
+    return blocks
+
+
+@pytest.fixture(params=['sqlite', 'file'])
+def open_storage(request, tmp_path):
+    opened = []
+
+    def open_storage():
+        if request.param == 'sqlite':
+            storage = SQLiteBackend(str(tmp_path / "chain.db"))
+        else:
+            storage = FileStore(str(tmp_path / "chain"), segment_size=512)
+        storage.create()
+        opened.append(storage)
+        return storage
+
+    yield open_storage
+    for storage in opened:
+        storage.close()
+
+
+def test_save_and_iterate(open_storage):
+    storage = open_storage()
+    blocks = make_blocks(6)
+    assert storage.get_max_index() is None
+    storage.save_block(blocks[0])
+    assert storage.save_blocks(blocks, on_conflict='skip') == 5
+    assert storage.get_max_index() == 5
+
+    loaded = list(storage.iter_blocks(batch_size=4))
+    assert [b.hash for b in loaded] == [b.hash for b in blocks]
+    assert loaded[3].data == blocks[3].data
+    assert all(b.verify_merkle_root() and b.calculate_hash() == b.hash for b in loaded)
+    assert [b.index for b in storage.iter_blocks(start_index=2, end_index=4)] == [2, 3, 4]
+    assert [b.index for b in storage.iter_blocks(start_time=1700000001.0, end_time=1700000003.0)] == [1, 2, 3]
+
+
+def test_duplicate_index_is_a_conflict(open_storage):
+    storage = open_storage()
+    blocks = make_blocks(2)
+    storage.save_blocks(blocks)
+    with pytest.raises(BlockConflictError):
+        storage.save_block(make_blocks(1, start=1)[0])
+    with pytest.raises(BlockConflictError):
+        storage.save_blocks(make_blocks(2, start=1), on_conflict='error')
+    assert storage.get_max_index() == 1
+
+
+def test_sqlite_mine_block_rebases_after_conflicting_writer(tmp_path):
+    path = str(tmp_path / "chain.db")
+    with SQLiteBackend(path) as first_store, SQLiteBackend(path) as second_store:
+        first = Blockchain(storage=first_store, difficulty=1, transactions_per_block=10)
+        second = Blockchain(storage=second_store, difficulty=1, transactions_per_block=10)
+        with first, second:
+            other = first.mine_block([{"device": "Other writer", "distance": 7}])
+            # The second writer still has genesis as its tip, so index 1 collides on the primary key
+            block = second.mine_block([{"device": "Raspberry Pi", "distance": 1}])
+
+            assert [b.hash for b in second.chain] == [second.chain[0].hash, other.hash, block.hash]
+            assert block.index == 2 and block.previous_hash == other.hash
+            assert second.is_chain_valid(full=True)
+            assert [b.index for b in second_store.iter_blocks()] == [0, 1, 2]
+
+
+def test_blocks_and_checkpoint_survive_reopen(open_storage):
+    storage = open_storage()
+    blocks = make_blocks(4)
+    storage.save_blocks(blocks)
+    storage.save_checkpoint(3, blocks[3].hash)
+    storage.close()
+
+    reopened = open_storage()
+    assert reopened.get_max_index() == 3
+    assert reopened.load_checkpoint() == (3, blocks[3].hash)
+    assert [b.hash for b in reopened.iter_blocks()] == [b.hash for b in blocks]
+
+
+def test_file_store_recovers_from_torn_writes(tmp_path):
+    directory = str(tmp_path / "chain")
+    storage = FileStore(directory, segment_size=512)
+    storage.create()
+    blocks = make_blocks(5)
+    storage.save_blocks(blocks)
+    storage.close()
+    assert len([name for name in os.listdir(directory) if name.startswith('segment-')]) > 1
+
+    # A crash left half an index record and a block that was never indexed
+    with open(os.path.join(directory, 'index'), 'ab') as f:
+        f.write(b'\x01\x02\x03')
+    last_segment = sorted(name for name in os.listdir(directory) if name.startswith('segment-'))[-1]
+    with open(os.path.join(directory, last_segment), 'ab') as f:
+        f.write(b'[5, "unindexed')
+
+    storage = FileStore(directory, segment_size=512)
+    storage.create()
+    assert storage.get_max_index() == 4
+    next_block = make_blocks(1, start=5, previous_hash=blocks[-1].hash)[0]
+    storage.save_block(next_block)
+    assert [b.hash for b in storage.iter_blocks()] == [b.hash for b in blocks + [next_block]]
+    storage.close()
+
+
+@pytest.mark.parametrize('backend', ['sqlite', 'file'])
+def test_blockchain_on_embedded_storage(tmp_path, backend):
+    def storage():
+        if backend == 'sqlite':
+            return SQLiteBackend(str(tmp_path / "chain.db"))
+        return FileStore(str(tmp_path / "chain"))
+
+    with storage() as store, Blockchain(storage=store, difficulty=1, transactions_per_block=2) as blockchain:
+        for i in range(5):
+            blockchain.add_transaction({"device": "Raspberry Pi", "distance": i})
+        blockchain.flush()
+        assert blockchain.is_chain_valid()
+        hashes = [b.hash for b in blockchain.chain]
+        assert [t['position'] for t in blockchain.find_transactions(device="Raspberry Pi")] == [0, 1, 0, 1, 0]
+        assert blockchain.get_block_by_hash(hashes[2]).index == 2
+
+    with storage() as store, Blockchain(storage=store, difficulty=1, lazy_chain=True) as blockchain:
+        assert [b.hash for b in blockchain.chain] == hashes
+        assert blockchain.checkpoint == (3, hashes[3])
+        assert blockchain.validate_chain(full=True).blocks_checked == 3
+
+
+def test_text_and_binary_rows_are_both_readable(open_storage):
+    storage = open_storage()
+    blocks = make_blocks(6)
+    with patch('liotbchain.database.base.BINARY_BLOCKS', False), \
+            patch('liotbchain.database.filestore.BINARY_BLOCKS', False):
+        storage.save_blocks(blocks[:3])
+    storage.save_blocks(blocks[3:])
+    loaded = list(storage.iter_blocks())
+    assert [b.hash for b in loaded] == [b.hash for b in blocks]
+    assert all(b.verify_merkle_root() and b.calculate_hash() == b.hash for b in loaded)
+
+
+def test_difficulty_is_stored_in_text_and_binary_rows(open_storage):
+    storage = open_storage()
+    blocks = make_blocks(4)
+    for block in blocks[1:]:
+        block.difficulty = block.index
+        block.hash = block.calculate_hash()
+    with patch('liotbchain.database.base.BINARY_BLOCKS', False), \
+            patch('liotbchain.database.filestore.BINARY_BLOCKS', False):
+        storage.save_blocks(blocks[:2])
+    storage.save_blocks(blocks[2:])
+    loaded = list(storage.iter_blocks())
+    assert [b.difficulty for b in loaded] == [None, 1, 2, 3]
+    assert all(b.calculate_hash() == b.hash for b in loaded)
+
+
+def test_sqlite_migrates_tables_without_payload(tmp_path):
+    path = str(tmp_path / "chain.db")
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE blocks ("index" INTEGER PRIMARY KEY, "data" TEXT, "timestamp" REAL, "previous_hash" TEXT, '
+                 '"nonce" INTEGER, "hash" TEXT, "merkle_root" TEXT, "version" INTEGER NOT NULL DEFAULT 1)')
+    conn.close()
+    with SQLiteBackend(path) as storage:
+        storage.create()
+        blocks = make_blocks(2)
+        blocks[1].difficulty = 2
+        storage.save_blocks(blocks)
+        assert [(b.index, b.difficulty) for b in storage.iter_blocks()] == [(0, None), (1, 2)]
+
+
+def test_find_transactions_and_get_block_by_hash(open_storage):
+    storage = open_storage()
+    blocks = []
+    previous_hash = "0"
+    for index in range(4):
+        data = [{"device": f"pi-{position}", "distance": index, "timestamp": 100.0 + index} for position in range(2)]
+        block = Block(index, 1700000000.0 + index, data, previous_hash)
+        block.hash = block.calculate_hash()
+        previous_hash = block.hash
+        blocks.append(block)
+    storage.save_block(blocks[0])
+    storage.save_blocks(blocks)
+
+    found = storage.find_transactions(device="pi-1", since=101.0, until=102.0)
+    assert [(t['block_index'], t['position'], t['device'], t['timestamp']) for t in found] == [
+        (1, 1, "pi-1", 101.0), (2, 1, "pi-1", 102.0)]
+    # The transaction hash is its Merkle leaf, so the match can be proven against the block
+    proof = blocks[2].get_proof(1)
+    assert MerkleTree.verify_proof(blocks[2].data[1], proof, blocks[2].merkle_root)
+    assert found[1]['tx_hash'] == hash_leaf(blocks[2].leaves()[1]).hex()
+    assert storage.find_transactions(tx_hash=found[1]['tx_hash']) == [found[1]]
+    assert len(storage.find_transactions()) == 8
+
+    assert storage.get_block_by_hash(blocks[2].hash).index == 2
+    assert storage.get_block_by_hash("f" * 64) is None
+    more = make_blocks(1, start=4, previous_hash=blocks[3].hash)[0]
+    storage.save_block(more)
+    assert storage.get_block_by_hash(more.hash).index == 4
+
+
+def test_sqlite_reindexes_transactions(tmp_path):
+    with SQLiteBackend(str(tmp_path / "chain.db")) as storage:
+        storage.create()
+        storage.save_blocks(make_blocks(3))
+        with storage._cursor(transaction=True) as c:
+            c.execute('DELETE FROM transactions')
+        assert storage.find_transactions() == []
+        assert storage.reindex_transactions() == 3
+        assert [t['block_index'] for t in storage.find_transactions(device="Raspberry Pi")] == [0, 1, 2]
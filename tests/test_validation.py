@@ -0,0 +1,94 @@
+import pytest
+from collections import deque
+from liotbchain.block import Block
+from liotbchain.mining import search_nonce
+from liotbchain.retarget import Retargeter
+from liotbchain.validation import verify_chain_parallel, verify_block, verify_blocks, required_difficulty
+
+DIFFICULTY = 1
+
+def build_chain(length):
+    genesis = Block(0, 1700000000.0, "Genesis Block", "0")
+    genesis.hash = genesis.calculate_hash()
+    chain = [genesis]
+    for index in range(1, length):
+        block = Block(index, 1700000000.0 + index, [{"device": "Raspberry Pi", "distance": index}], chain[-1].hash)
+        block.nonce, block.hash = search_nonce(*block.header_parts(), DIFFICULTY, 0, 1000000,
+                                                  binary_nonce=block.binary_nonce)
+        chain.append(block)
+    return chain
+
+def serial_first_failure(chain):
+    for previous, block in zip(chain, chain[1:]):
+        reason = verify_block(block, previous.hash, DIFFICULTY)
+        if reason:
+            return block.index, reason
+    return None
+
+def mine_at(block, difficulty):
+    block.difficulty = difficulty
+    block.nonce, block.hash = search_nonce(*block.header_parts(), difficulty, 0, 1000000,
+                                              binary_nonce=block.binary_nonce)
+    return block
+
+def test_block_must_record_the_required_difficulty():
+    chain = build_chain(2)
+    block = mine_at(Block(2, 1700000002.0, [{"device": "Raspberry Pi", "distance": 2}], chain[-1].hash), 3)
+    assert verify_block(block, chain[-1].hash, 3) is None
+    # The hash meets a lower requirement, but the block was not mined at it
+    assert "Difficulty error" in verify_block(block, chain[-1].hash, 1)
+    # The recorded difficulty is hashed, so raising it afterwards breaks the hash
+    block.difficulty = 5
+    assert "Hash mismatch" in verify_block(block, chain[-1].hash, 5)
+
+def test_under_difficulty_block_is_rejected_without_a_retargeter():
+    chain = build_chain(3)
+    history = deque(chain[:2], maxlen=1)
+    forged = mine_at(Block(2, 1700000002.0, [{"device": "Forger", "distance": 2}], chain[1].hash), 1)
+    assert required_difficulty(forged, history, 4) == 4
+    [(block, reason)] = verify_blocks([forged], history, 4)
+    assert block is forged and reason.startswith("Difficulty error")
+
+def test_under_difficulty_block_is_rejected_with_a_retargeter():
+    retargeter = Retargeter(target_interval=1000.0, window=2)
+    genesis = Block(0, 1700000000.0, "Genesis Block", "0")
+    genesis.hash = genesis.calculate_hash()
+    chain = [genesis]
+    for index in range(1, 5):
+        block = Block(index, 1700000000.0 + index, [{"device": "Raspberry Pi", "distance": index}], chain[-1].hash)
+        chain.append(mine_at(block, retargeter.next_difficulty(chain, 1)))
+    # Blocks 2 and 3 came a second apart against a target of 1000 seconds: block 4 steps up to 2
+    assert [block.difficulty for block in chain[1:]] == [1, 1, 1, 2]
+    history = deque(chain[:1], maxlen=retargeter.depth)
+    assert [reason for _, reason in verify_blocks(chain[1:], history, 1, retargeter)] == [None] * 4
+
+    forged = mine_at(Block(4, chain[4].timestamp, chain[4].data, chain[3].hash), 1)
+    history = deque(chain[:4], maxlen=retargeter.depth)
+    [(_, reason)] = verify_blocks([forged], history, 1, retargeter)
+    assert reason.startswith("Difficulty error")
+    # Without the retargeter the configured difficulty would have accepted it
+    assert verify_block(forged, chain[3].hash, 1) is None
+
+def test_parallel_verification_of_valid_chain():
+    chain = build_chain(20)
+    report = verify_chain_parallel(chain, DIFFICULTY, workers=2, chunk_size=3)
+    assert report
+    assert report.blocks_checked == 19
+    assert report.last_block == (19, chain[-1].hash)
+
+@pytest.mark.parametrize("bad_index", [1, 3, 4, 10, 19])
+def test_parallel_verification_matches_serial_failure(bad_index):
+    chain = build_chain(20)
+    chain[bad_index].data = [{"device": "Tampered Device"}]
+    # A second failure later in the chain must not mask the first one
+    chain[15].previous_hash = "f" * 64
+    report = verify_chain_parallel(chain, DIFFICULTY, workers=2, chunk_size=3)
+    assert not report
+    assert (report.first_bad_index, report.reason) == serial_first_failure(chain)
+
+def test_parallel_verification_at_chunk_boundary():
+    chain = build_chain(10)
+    chain[3].hash = "0" + "f" * 63  # block 4 starts the second chunk and links to block 3
+    report = verify_chain_parallel(chain, DIFFICULTY, workers=2, chunk_size=3)
+    assert report.first_bad_index == 3
+    assert (report.first_bad_index, report.reason) == serial_first_failure(chain)